@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+"""
+asyncio 애플리케이션에서 곡 다운로드/변환과 모드 생성을 사용하기 위한 비동기 API
+블로킹 작업(다운로드, 인코딩, 파일 작성)은 실행기 스레드에서 실행하고, 진행 상황은 크기가 제한된 이벤트 스트림으로 전달
+
+    stream = ProgressStream()
+    task = asyncio.create_task(build_mod("hoi4_music_mod", stations, events=stream))
+    async for event in stream:
+        print(event['type'], event.get('message', ''))
+    success = await task
+"""
+import asyncio
+import concurrent.futures
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from mod_generator import HOI4MusicModGenerator
+from mod_builder import ModBuilder
+from resource_scheduler import MemoryBudget, DEFAULT_MEMORY_BUDGET_MB, PauseController, BuildCancelled
+
+DEFAULT_EVENT_QUEUE_SIZE = 1000
+EMIT_POLL_SECONDS = 0.2
+LOG, SONG_DONE, SONG_FAILED, FINISHED, CANCELLED = 'log', 'song_done', 'song_failed', 'finished', 'cancelled'
+_END = object()
+
+
+class ProgressStream:
+    """
+    진행 이벤트({'type', 'time', ...})를 크기가 제한된 asyncio 큐로 전달하는 비동기 반복자
+    큐가 가득 차면 작업 스레드의 emit()과 이벤트 루프의 put()이 소비자가 꺼낼 때까지 기다림 (소비가 느리면 작업도 느려짐)
+    스트림을 작업에 넘겼으면 끝까지 읽거나 close()를 호출해야 함
+    """
+    def __init__(self, maxsize=DEFAULT_EVENT_QUEUE_SIZE):
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._loop = None
+        self._loop_thread = None
+        self._queue = None
+        self._finished = False
+        self._closed = threading.Event()
+
+    def bind(self):
+        """현재 실행 중인 이벤트 루프에 연결 (처음 한 번만 적용, 이벤트 루프 안에서 호출)"""
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self._loop_thread = threading.get_ident()
+            self._queue = asyncio.Queue(self.maxsize)
+        return self
+
+    @property
+    def closed(self):
+        return self._closed.is_set()
+
+    def _put_nowait(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def put(self, event_type, **fields):
+        """이벤트 루프에서 이벤트를 보냄. 큐가 가득 차면 자리가 날 때까지 기다림"""
+        self.bind()
+        if not self.closed:
+            await self._queue.put({'type': event_type, 'time': time.time(), **fields})
+
+    def emit(self, event_type, **fields):
+        """
+        어느 스레드에서나 호출 가능. 작업 스레드에서는 큐에 자리가 날 때까지 기다리고,
+        이벤트 루프 스레드에서 호출하거나 finish() 이후에는 기다리지 않고 큐가 가득 차면 버림
+        """
+        if self._loop is None or self.closed:
+            return False
+        event = {'type': event_type, 'time': time.time(), **fields}
+        try:
+            if threading.get_ident() == self._loop_thread:
+                self._put_nowait(event)
+                return True
+            if self._finished:
+                self._loop.call_soon_threadsafe(self._put_nowait, event)
+                return True
+            future = asyncio.run_coroutine_threadsafe(self._queue.put(event), self._loop)
+        except RuntimeError:  # 이벤트 루프가 이미 닫힘
+            return False
+        while True:
+            try:
+                future.result(timeout=EMIT_POLL_SECONDS)
+                return True
+            except concurrent.futures.TimeoutError:
+                if self.closed or self._finished:
+                    future.cancel()
+                    return False
+            except concurrent.futures.CancelledError:
+                return False
+
+    def log(self, message):
+        """progress_callback으로 사용"""
+        self.emit(LOG, message=message)
+
+    def finish(self):
+        """더 이상 기다리며 보낼 이벤트가 없음을 알림 (이벤트 루프에서 호출). 소비자는 남은 이벤트를 읽은 뒤 반복을 마침"""
+        self._finished = True
+        if self._queue is not None and not self._queue.full():
+            self._queue.put_nowait(_END)
+
+    def close(self):
+        """소비자가 더 읽지 않을 때 호출. 남은 이벤트를 버리고 기다리던 작업을 풀어줌"""
+        self._closed.set()
+        self._finished = True
+        if self._queue is None:
+            return
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(_END)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        self.bind()
+        while True:
+            if self.closed or (self._finished and self._queue.empty()):
+                raise StopAsyncIteration
+            event = await self._queue.get()
+            if event is not _END:
+                return event
+
+
+class AsyncModGenerator:
+    """
+    HOI4MusicModGenerator의 비동기 버전. 다운로드는 다운로드 실행기에서 동시에, 로컬 파일 변환은 변환 실행기에서 실행
+    (동시 변환 수는 메모리 예산이 추가로 제한). 작업을 취소하면 받던 다운로드는 중단되고,
+    이미 시작된 변환은 끝까지 실행되지만 곡 목록에는 추가되지 않음
+    """
+    def __init__(self, station_name="my_station", output_dir="hoi4_music_mod", progress_callback=None, events=None,
+                 max_downloads=4, max_encoders=None, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, source=None):
+        self.station_name = station_name
+        self.output_dir = output_dir
+        self.progress_callback = progress_callback
+        self.events = events
+        self.source = source
+        self.memory_budget = MemoryBudget(memory_budget_mb * 1024 * 1024, self._log)
+        self.generator = None
+        self._generator_lock = None
+        self._download_executor = ThreadPoolExecutor(max_workers=max_downloads, thread_name_prefix="hoi4-download")
+        self._encode_executor = ThreadPoolExecutor(max_workers=max_encoders or os.cpu_count() or 1,
+                                                   thread_name_prefix="hoi4-encode")
+
+    def _log(self, message):
+        if self.progress_callback:
+            self.progress_callback(message)
+        if self.events:
+            self.events.log(message)
+
+    async def _put(self, event_type, **fields):
+        if self.events:
+            await self.events.put(event_type, **fields)
+
+    async def _run(self, executor, fn, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+    @property
+    def songs(self):
+        return self.generator.songs if self.generator else []
+
+    async def open(self):
+        """디렉토리 구조를 만들고 HOI4MusicModGenerator를 준비 (처음 한 번만)"""
+        if self.events:
+            self.events.bind()
+        if self._generator_lock is None:
+            self._generator_lock = asyncio.Lock()
+        async with self._generator_lock:
+            if self.generator is None:
+                self.generator = await self._run(
+                    self._encode_executor, HOI4MusicModGenerator, station_name=self.station_name, output_dir=self.output_dir,
+                    progress_callback=self._log, memory_budget=self.memory_budget, source=self.source)
+        return self.generator
+
+    async def _download(self, song_info, encoding=None):
+        generator = await self.open()
+        cancelled = threading.Event()
+
+        def on_chunk(size):
+            if cancelled.is_set():
+                raise BuildCancelled()
+
+        try:
+            return await self._run(
+                self._download_executor, generator.media_processor.download_and_convert_song,
+                url=song_info['url'], korean_name=song_info.get('korean_name'), english_name=song_info.get('english_name'),
+                trim_start=song_info.get('trim_start', 0), volume=song_info.get('volume', 0.8),
+                on_chunk=on_chunk, raise_errors=True, encoding=encoding)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def _convert(self, song_info, encoding=None):
+        generator = await self.open()
+        result = await self._run(self._encode_executor, generator.media_processor.process_local_song, song_info, encoding)
+        if not result:
+            raise Exception(f"로컬 파일 변환 실패: {song_info.get('url')}")
+        return result
+
+    async def _process(self, song_info, encoding=None):
+        if song_info.get('source') == 'local':
+            return {**song_info, **await self._convert(song_info, encoding)}
+        return {**song_info, **await self._download(song_info, encoding)}
+
+    async def download(self, url, korean_name=None, english_name=None, trim_start=0, volume=0.8, encoding=None):
+        """유튜브 URL의 곡을 다운로드/변환하여 곡 목록에 추가하고 곡 정보를 반환 (실패하면 예외 발생)"""
+        song_info = await self._download({'url': url, 'korean_name': korean_name, 'english_name': english_name,
+                                          'trim_start': trim_start, 'volume': volume}, encoding)
+        self.generator.songs.append(song_info)
+        return song_info
+
+    async def convert(self, song_info, encoding=None):
+        """로컬 오디오 파일을 변환하여 곡 목록에 추가하고 곡 정보를 반환 (실패하면 예외 발생)"""
+        processed_info = await self._convert(song_info, encoding)
+        self.generator.songs.append(processed_info)
+        return processed_info
+
+    async def add_songs(self, songs, encoding=None):
+        """
+        곡 정보 목록(mod_data.json 형식)을 동시에 처리하여 입력 순서대로 곡 목록에 추가
+        곡마다 song_done/song_failed 이벤트를 보내고, 처리 결과 목록(실패한 곡은 None)을 반환
+        """
+        async def process(index, song_info):
+            try:
+                result = await self._process(song_info, encoding)
+            except Exception as e:
+                await self._put(SONG_FAILED, index=index, url=song_info.get('url'), error=str(e))
+                return None
+            await self._put(SONG_DONE, index=index, song=result)
+            return result
+
+        results = await asyncio.gather(*(process(index, song_info) for index, song_info in enumerate(songs)))
+        self.generator.songs.extend(result for result in results if result)
+        return results
+
+    async def generate(self):
+        """곡 목록으로 모드 파일 생성. 성공하면 True"""
+        generator = await self.open()
+        success = await self._run(self._encode_executor, generator.generate_all_files)
+        await self._put(FINISHED, success=success, songs=len(generator.songs))
+        return success
+
+    async def close(self):
+        """실행기를 정리하고 이벤트 스트림을 마침 (아직 시작하지 않은 작업은 취소)"""
+        self._download_executor.shutdown(wait=False, cancel_futures=True)
+        self._encode_executor.shutdown(wait=False, cancel_futures=True)
+        if self.events:
+            self.events.finish()
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        await self.close()
+
+
+async def build_mod(output_dir, stations, events=None, progress_callback=None, resume=False, retry_job_ids=None,
+                    executor=None, **builder_options):
+    """
+    ModBuilder로 전체 모드를 빌드 (작업 큐, 변환 캐시, 다운로드 스케줄러 등 기존 빌드와 동일)
+    태스크를 취소하면 새 작업을 시작하지 않고, 받던 다운로드를 중단하고, 진행 중인 변환이 끝나기를 기다린 뒤
+    CancelledError를 다시 발생시킴. 남은 작업은 build_queue.json에 남아 resume=True로 이어서 진행할 수 있음
+    """
+    loop = asyncio.get_running_loop()
+    if events:
+        events.bind()
+
+    def log(message):
+        if progress_callback:
+            progress_callback(message)
+        if events:
+            events.log(message)
+
+    pause_controller = builder_options.pop('pause_controller', None) or PauseController()
+    pause_controller.reset()
+    builder = ModBuilder(output_dir, stations, progress_callback=log, pause_controller=pause_controller, **builder_options)
+
+    def run():
+        builder.prepare(resume=resume, retry_job_ids=retry_job_ids)
+        return builder.run()
+
+    future = loop.run_in_executor(executor, run)
+    try:
+        success = await asyncio.shield(future)
+        if events:
+            await events.put(FINISHED, success=success)
+        return success
+    except asyncio.CancelledError:
+        pause_controller.cancel()
+        if events:
+            events.emit(CANCELLED)
+            events.finish()  # 정리 중인 작업 스레드가 소비자를 기다리지 않도록 함
+        await asyncio.wait([future])
+        raise
+    finally:
+        if events:
+            events.finish()
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+여러 모드 정의를 하나의 설정 파일로 받아 한 프로세스에서 차례로 빌드
+변환 스레드 풀, 다운로드 동시성 상태, 메모리 예산, 변환/앨범 아트 캐시를 모든 모드가 공유하므로
+여러 모드에 같은 원본(같은 자르기/인코딩)이 있으면 한 번만 다운로드/변환됨
+
+    python batch_build.py mods.json [--resume]
+
+설정 예:
+{
+    "max_downloads": 4,
+    "memory_budget_mb": 2048,
+    "max_encoders": 8,
+    "background": false,
+    "cache_dir": "hoi4_cache",
+    "mods": [
+        {"output_dir": "mods/jazz_radio", "mod_data": "lists/jazz/mod_data.json", "zip": true},
+        {"output_dir": "mods/rock_radio", "stations": {"rock": {"songs": [], "album_art": ""}}, "target_size_mb": 300, "dedupe": "merge", "shard_max_songs": 300}
+    ]
+}
+상대 경로는 설정 파일이 있는 폴더 기준
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from mod_builder import ModBuilder, SONG_JOB_KINDS
+from job_queue import PENDING, DONE, FAILED
+from download_scheduler import DownloadScheduler
+from resource_scheduler import (MemoryBudget, DEFAULT_MEMORY_BUDGET_MB, PauseController, background_worker_count,
+                                lower_current_thread_priority)
+from media_sources import create_media_source
+from transcode_cache import TranscodeCache
+
+
+class BatchBuilder:
+    def __init__(self, config, base_dir=".", progress_callback=None):
+        self.config = config
+        self.base_dir = Path(base_dir)
+        self.progress_callback = progress_callback
+        self.max_downloads = config.get('max_downloads', 4)
+        self.max_encoders = config.get('max_encoders') or os.cpu_count() or 1
+        self.background = config.get('background', False)
+        if self.background:
+            self.max_downloads = background_worker_count(self.max_downloads)
+            self.max_encoders = background_worker_count(self.max_encoders)
+        self.pause_controller = PauseController()
+        bandwidth_limit_kb = config.get('bandwidth_limit_kb')
+
+        self.memory_budget = MemoryBudget(config.get('memory_budget_mb', DEFAULT_MEMORY_BUDGET_MB) * 1024 * 1024, progress_callback)
+        self.download_scheduler = DownloadScheduler(
+            progress_callback=progress_callback,
+            max_workers=self.max_downloads,
+            initial_workers=min(2, self.max_downloads),
+            bandwidth_limit=int(bandwidth_limit_kb * 1024) if bandwidth_limit_kb else None
+        )
+        self.source = create_media_source()
+        mods = config.get('mods', [])
+        if config.get('cache_dir'):
+            self.transcode_cache = TranscodeCache(self._resolve(config['cache_dir']))
+        elif mods:
+            self.transcode_cache = TranscodeCache.for_output_dir(self._resolve(mods[0]['output_dir']))
+        else:
+            self.transcode_cache = None
+
+    def _log(self, message):
+        if self.progress_callback:
+            self.progress_callback(message)
+
+    def _resolve(self, path):
+        path = Path(path)
+        return path if path.is_absolute() else self.base_dir / path
+
+    def _load_stations(self, mod):
+        if 'stations' in mod:
+            return mod['stations']
+        mod_data_path = self._resolve(mod.get('mod_data') or Path(mod['output_dir']) / "mod_data.json")
+        with open(mod_data_path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('stations', {})
+
+    def run(self, resume=False):
+        """모든 모드를 빌드하고 모드별 결과(곡 수, 변환/캐시/실패 수, 소요 시간) 목록을 반환"""
+        reports = []
+        started_at = time.monotonic()
+        with self.encode_pool() as encode_executor:
+            for index, mod in enumerate(self.config.get('mods', []), 1):
+                output_dir = self._resolve(mod['output_dir'])
+                self._log("\n" + "#" * 20 + f" [{index}/{len(self.config['mods'])}] 모드 빌드: {output_dir.name} " + "#" * 20)
+                reports.append(self.build_mod(mod, encode_executor, resume))
+        self._report(reports, time.monotonic() - started_at)
+        return reports
+
+    def encode_pool(self):
+        """모드들이 함께 쓰는 변환 스레드 풀. 백그라운드 모드면 풀의 스레드 우선순위를 낮춤"""
+        return ThreadPoolExecutor(max_workers=self.max_encoders,
+                                  initializer=lower_current_thread_priority if self.background else None)
+
+    def build_mod(self, mod, encode_executor, resume=False):
+        """
+        모드 정의 하나를 공유 자원으로 빌드하고 결과(곡 수, 변환/캐시/실패 수, 소요 시간, 최종 스테이션)를 반환
+        모드 정의의 resume, retry_job_ids가 있으면 그 값을 사용 (빌드 데몬에서 사용)
+        """
+        return self._build_mod(mod, self._resolve(mod['output_dir']), encode_executor, mod.get('resume', resume))
+
+    def _build_mod(self, mod, output_dir, encode_executor, resume):
+        report = {'mod': output_dir.name, 'songs': 0, 'converted': 0, 'cached': 0, 'failed': 0, 'seconds': 0.0, 'success': False,
+                  'cancelled': False}
+        started_at = time.monotonic()
+        try:
+            builder = ModBuilder(
+                output_dir, self._load_stations(mod), progress_callback=self.progress_callback,
+                zip_mod=mod.get('zip', False), max_encoders=self.max_encoders, source=self.source,
+                target_size_mb=mod.get('target_size_mb'), dedupe_mode=mod.get('dedupe', 'flag'),
+                transcode_cache=self.transcode_cache or TranscodeCache.for_output_dir(output_dir), memory_budget=self.memory_budget,
+                encode_executor=encode_executor, download_scheduler=self.download_scheduler,
+                shard_max_songs=mod.get('shard_max_songs'), shard_max_decoded_mb=mod.get('shard_max_decoded_mb'),
+                background=self.background, pause_controller=self.pause_controller
+            )
+            builder.prepare(resume=resume or bool(mod.get('retry_job_ids')), retry_job_ids=mod.get('retry_job_ids'))
+            song_jobs = [job for job in builder.queue.jobs if job['kind'] in SONG_JOB_KINDS]
+            pending_jobs = [job for job in song_jobs if job['state'] == PENDING]
+            report['success'] = builder.run()
+            report['cancelled'] = builder.cancelled
+            report['songs'] = len(song_jobs)
+            report['cached'] = builder.cache_hits
+            report['converted'] = sum(1 for job in pending_jobs if job['state'] == DONE) - builder.cache_hits
+            report['failed'] = sum(1 for job in pending_jobs if job['state'] == FAILED)
+            report['stations'] = builder.stations
+        except Exception as e:
+            self._log(f"❌ 모드 '{output_dir.name}' 빌드 실패: {e}")
+            report['error'] = str(e)
+        report['seconds'] = round(time.monotonic() - started_at, 1)
+        return report
+
+    def _report(self, reports, elapsed):
+        self._log("\n" + "=" * 60)
+        self._log("📊 배치 빌드 결과")
+        self._log(f"  {'모드':<24} {'곡':>5} {'변환':>5} {'캐시':>5} {'실패':>5} {'시간(초)':>9}")
+        for report in reports:
+            status = "✅" if report['success'] else "❌"
+            self._log(f"{status} {report['mod']:<24} {report['songs']:>5} {report['converted']:>5} "
+                      f"{report['cached']:>5} {report['failed']:>5} {report['seconds']:>9.1f}")
+        self._log(f"  총 {len(reports)}개 모드, {elapsed:.1f}초")
+        self._log("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="여러 HOI4 음악 모드를 한 번에 빌드")
+    parser.add_argument('config', help="모드 정의 JSON 파일")
+    parser.add_argument('--resume', action='store_true', help="중단된 빌드가 있으면 이어서 진행")
+    parser.add_argument('--background', action='store_true', help="게임 실행 중에도 쓸 수 있도록 낮은 우선순위, 적은 작업자로 빌드")
+    args = parser.parse_args()
+
+    config_path = Path(args.config)
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    if args.background:
+        config['background'] = True
+    reports = BatchBuilder(config, base_dir=config_path.parent, progress_callback=print).run(resume=args.resume)
+    raise SystemExit(0 if all(report['success'] for report in reports) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,503 @@
+# -*- coding: utf-8 -*-
+"""
+모드 빌드 작업을 받는 로컬 빌드 데몬
+한 번 띄워 두면 import, 변환 스레드 풀, 다운로드 스케줄러, 메모리 예산, 인코더 선택, 변환 캐시를 작업 사이에 유지하므로
+빌드마다 파이썬 시작과 초기화 비용이 들지 않음. GUI와 CLI에서 동시에 보낸 작업은 받은 순서대로 하나씩 빌드
+
+    python build_daemon.py serve [--port 8766] [--config daemon.json] [--background]
+    python build_daemon.py submit <모드 출력 폴더> [--mod-data mod_data.json] [--resume] [--detach]
+    python build_daemon.py status [작업 ID]
+    python build_daemon.py cancel <작업 ID>
+
+HTTP API (127.0.0.1에서만 접속 가능, 모든 요청에 Authorization: Bearer <토큰> 필요)
+데몬은 시작할 때 임의의 토큰을 만들어 사용자만 읽을 수 있는 ~/.hoi4_music_daemon/token_<포트> 파일에 저장하고,
+DaemonClient는 그 파일을 읽어 토큰을 보냄. 웹 페이지에서 보낸 요청을 막기 위해 Origin 헤더가 있거나
+POST 본문이 application/json이 아닌 요청은 거부
+    POST /jobs                     batch_build의 모드 정의 형식 {"output_dir", "stations" 또는 "mod_data", "zip", ...}
+                                   + "resume", "retry_job_ids" → {"id"}
+    GET  /jobs, GET /jobs/<id>     작업 목록 / 작업 상태 (작업 상태에는 빌드 후 스테이션 목록 포함)
+    GET  /jobs/<id>/events?from=N  진행 이벤트를 한 줄에 JSON 하나씩 스트리밍 (작업이 끝나면 응답 종료)
+    POST /jobs/<id>/cancel         대기 중이면 제거, 실행 중이면 남은 작업을 시작하지 않고 중단 (이어서 진행 가능)
+    POST /pause, POST /resume      데몬 전체 일시 정지/재개
+    GET  /health
+설정 파일은 batch_build와 같은 키(max_downloads, memory_budget_mb, max_encoders, background, cache_dir, bandwidth_limit_kb)를 사용
+"""
+import argparse
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+from batch_build import BatchBuilder
+
+DEFAULT_DAEMON_PORT = 8766
+DAEMON_ENV = "HOI4_MUSIC_DAEMON"
+MAX_FINISHED_JOBS = 50
+EVENT_WAIT_SECONDS = 1.0
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'queued', 'running', 'done', 'failed', 'cancelled'
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+_LOOPBACK_ADDRESSES = ('127.0.0.1', '::1', '::ffff:127.0.0.1')
+TOKEN_DIR = Path.home() / ".hoi4_music_daemon"
+
+
+def daemon_url():
+    return os.environ.get(DAEMON_ENV) or f"http://127.0.0.1:{DEFAULT_DAEMON_PORT}"
+
+
+def token_path(port):
+    return TOKEN_DIR / f"token_{port}"
+
+
+def write_token(port):
+    """새 토큰을 만들어 소유자만 읽고 쓸 수 있는 파일에 저장"""
+    token = secrets.token_urlsafe(32)
+    TOKEN_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+    path = token_path(port)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(token)
+    os.chmod(path, 0o600)  # 이미 있던 파일이면 생성 시 권한이 적용되지 않으므로 다시 지정
+    return token
+
+
+class BuildDaemon:
+    """받은 작업을 하나씩 빌드하는 작업 스레드와 HTTP 서버. 모든 작업이 하나의 BatchBuilder(공유 자원)를 사용"""
+    def __init__(self, config=None, host='127.0.0.1', port=DEFAULT_DAEMON_PORT, progress_callback=None, echo_logs=False):
+        """echo_logs: 빌드 로그를 작업 이벤트뿐 아니라 progress_callback(데몬 콘솔)에도 출력"""
+        self.config = dict(config or {})
+        self.host = host
+        self.port = port
+        self.progress_callback = progress_callback
+        self.echo_logs = echo_logs
+        self.batch = BatchBuilder({**self.config, 'mods': []}, progress_callback=self._dispatch)
+        self.jobs = {}
+        self._pending = deque()
+        self._condition = threading.Condition()
+        self._current = None
+        self._cancel_job_id = None  # 실행 중 취소 요청을 받은 작업 ID
+        self._next_id = 1
+        self._stopping = False
+        self._encode_executor = None
+        self._worker = None
+        self._httpd = None
+        self.token = None
+
+    def _log(self, message):
+        if self.progress_callback:
+            self.progress_callback(message)
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self._httpd.server_port if self._httpd else self.port}"
+
+    def _add_event(self, job, event_type, **fields):
+        """self._condition을 잡은 상태에서 호출"""
+        job['events'].append({'seq': len(job['events']), 'time': time.time(), 'type': event_type, **fields})
+        self._condition.notify_all()
+
+    def _dispatch(self, message):
+        """빌드 로그를 실행 중인 작업의 이벤트로 기록 (작업은 한 번에 하나만 실행되므로 현재 작업으로 보냄)"""
+        if self.echo_logs:
+            self._log(message)
+        with self._condition:
+            if self._current is not None:
+                self._add_event(self._current, 'log', message=message)
+
+    @staticmethod
+    def _job_view(job, detail=False):
+        view = {key: job[key] for key in ('id', 'state', 'submitted_at', 'started_at', 'finished_at', 'error')}
+        view['output_dir'] = job['mod']['output_dir']
+        view['events'] = len(job['events'])
+        view['report'] = {key: value for key, value in (job['report'] or {}).items() if key != 'stations'} or None
+        if detail:
+            view['stations'] = (job['report'] or {}).get('stations')
+        return view
+
+    def submit(self, mod):
+        if not isinstance(mod, dict):
+            raise ValueError("작업 정의는 JSON 객체여야 합니다.")
+        if not mod.get('output_dir'):
+            raise ValueError("output_dir가 필요합니다.")
+        if 'stations' not in mod and not mod.get('mod_data') and not (Path(mod['output_dir']) / "mod_data.json").exists():
+            raise ValueError("stations 또는 mod_data가 필요합니다.")
+        with self._condition:
+            job = {'id': self._next_id, 'state': QUEUED, 'mod': mod, 'submitted_at': time.time(), 'started_at': None,
+                   'finished_at': None, 'error': None, 'report': None, 'events': []}
+            self._next_id += 1
+            self.jobs[job['id']] = job
+            self._pending.append(job)
+            self._add_event(job, 'state', state=QUEUED, position=len(self._pending))
+            self._log(f"📥 작업 {job['id']} 접수: {mod['output_dir']} (대기 {len(self._pending)}개)")
+        return job['id']
+
+    def cancel(self, job_id):
+        with self._condition:
+            job = self.jobs.get(job_id)
+            if job is None or job['state'] in FINISHED_STATES:
+                return False
+            if job['state'] == QUEUED:
+                self._pending.remove(job)
+                job['state'], job['finished_at'] = CANCELLED, time.time()
+                self._add_event(job, 'state', state=CANCELLED)
+            elif job['state'] == RUNNING and job is self._current:
+                self._cancel_job_id = job_id
+                self.batch.pause_controller.cancel()
+            else:
+                return False
+        self._log(f"⏹️ 작업 {job_id} 취소 요청")
+        return True
+
+    def pause(self):
+        self.batch.pause_controller.pause()
+
+    def resume(self):
+        self.batch.pause_controller.resume()
+
+    def list_jobs(self):
+        with self._condition:
+            return [self._job_view(job) for job in self.jobs.values()]
+
+    def get_job(self, job_id):
+        with self._condition:
+            job = self.jobs.get(job_id)
+            return self._job_view(job, detail=True) if job else None
+
+    def iter_events(self, job_id, start=0):
+        """작업의 이벤트를 start번째부터 차례로 반환. 작업이 끝나고 남은 이벤트를 모두 보내면 종료"""
+        with self._condition:
+            job = self.jobs.get(job_id)
+        if job is None:
+            return  # 그 사이에 오래된 완료 작업으로 정리됨
+        index = start
+        while True:
+            with self._condition:
+                while index >= len(job['events']) and job['state'] not in FINISHED_STATES and not self._stopping:
+                    self._condition.wait(timeout=EVENT_WAIT_SECONDS)
+                events = job['events'][index:]
+                finished = job['state'] in FINISHED_STATES or self._stopping
+            yield from events
+            index += len(events)
+            if finished and index >= len(job['events']):
+                return
+
+    def _trim_finished(self):
+        """오래된 완료 작업 기록을 정리 (self._condition을 잡은 상태에서 호출)"""
+        finished = [job_id for job_id, job in self.jobs.items() if job['state'] in FINISHED_STATES]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                job = self._pending.popleft()
+                job['state'], job['started_at'] = RUNNING, time.time()
+                self._current = job
+                # 이전 작업에 대한 취소 요청이 남아 있을 수 있으므로 현재 작업을 바꾸는 것과 함께 초기화
+                self._cancel_job_id = None
+                self.batch.pause_controller.reset()
+                self._add_event(job, 'state', state=RUNNING)
+            self._log(f"▶ 작업 {job['id']} 빌드 시작: {job['mod']['output_dir']}")
+
+            report, error = None, None
+            try:
+                report = self.batch.build_mod(job['mod'], self._encode_executor)
+                state, error = (DONE, None) if report['success'] else (FAILED, report.get('error'))
+            except Exception as e:
+                state, error = FAILED, str(e)
+
+            with self._condition:
+                # 빌드가 끝난 뒤 도착한 취소 요청은 무시하고, 이 작업에 대한 요청으로 실제로 중단된 경우만 취소로 기록
+                if report and report.get('cancelled') and self._cancel_job_id == job['id']:
+                    state = CANCELLED
+                job.update(state=state, report=report, error=error, finished_at=time.time())
+                self._current = None
+                self._add_event(job, 'state', state=state, report=self._job_view(job)['report'])
+                self._trim_finished()
+            self._log(f"{'✅' if state == DONE else '⚠️'} 작업 {job['id']} {state} ({job['finished_at'] - job['started_at']:.1f}초)")
+
+    def _make_handler(self):
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, data, status=200):
+                body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _read_json(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                return json.loads(self.rfile.read(length).decode('utf-8')) if length else {}
+
+            def _route(self):
+                """접속 주소, 토큰, 브라우저 요청 여부를 확인하고 (경로, 쿼리) 반환. 거부하면 None"""
+                authorization = self.headers.get('Authorization', '')
+                if self.client_address[0] not in _LOOPBACK_ADDRESSES or self.headers.get('Origin') is not None \
+                        or not hmac.compare_digest(authorization.encode('utf-8'), f"Bearer {daemon.token}".encode('utf-8')):
+                    self._send_json({'error': 'forbidden'}, status=403)
+                    return None
+                if self.command == 'POST' and self.headers.get_content_type() != 'application/json':
+                    self._send_json({'error': 'Content-Type은 application/json이어야 합니다.'}, status=415)
+                    return None
+                url = urlparse(self.path)
+                return [part for part in url.path.split('/') if part], parse_qs(url.query)
+
+            def _job_id(self, text):
+                try:
+                    return int(text)
+                except ValueError:
+                    return None
+
+            def do_GET(self):
+                route = self._route()
+                if route is None:
+                    return
+                parts, query = route
+                if parts == ['health']:
+                    with daemon._condition:
+                        current = daemon._current['id'] if daemon._current else None
+                    self._send_json({'status': 'ok', 'current': current, 'queued': len(daemon._pending),
+                                     'paused': daemon.batch.pause_controller.paused})
+                elif parts == ['jobs']:
+                    self._send_json({'jobs': daemon.list_jobs()})
+                elif len(parts) == 2 and parts[0] == 'jobs' and daemon.get_job(self._job_id(parts[1])):
+                    self._send_json(daemon.get_job(self._job_id(parts[1])))
+                elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'events' and self._job_id(parts[1]) in daemon.jobs:
+                    start = self._job_id(query.get('from', ['0'])[0])
+                    if start is None or start < 0:
+                        self._send_json({'error': 'from은 0 이상의 정수여야 합니다.'}, status=400)
+                    else:
+                        self._stream_events(self._job_id(parts[1]), start)
+                else:
+                    self._send_json({'error': 'not found'}, status=404)
+
+            def do_POST(self):
+                route = self._route()
+                if route is None:
+                    return
+                parts, _ = route
+                try:
+                    if parts == ['jobs']:
+                        self._send_json({'id': daemon.submit(self._read_json())}, status=202)
+                    elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'cancel':
+                        self._send_json({'cancelled': daemon.cancel(self._job_id(parts[1]))})
+                    elif parts in (['pause'], ['resume']):
+                        if parts == ['pause']:
+                            daemon.pause()
+                        else:
+                            daemon.resume()
+                        self._send_json({'paused': daemon.batch.pause_controller.paused})
+                    else:
+                        self._send_json({'error': 'not found'}, status=404)
+                except ValueError as e:
+                    self._send_json({'error': str(e)}, status=400)
+
+            def _stream_events(self, job_id, start):
+                """Content-Length 없이 이벤트를 한 줄씩 보내고 작업이 끝나면 연결을 닫음"""
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                try:
+                    for event in daemon.iter_events(job_id, start):
+                        self.wfile.write(json.dumps(event, ensure_ascii=False).encode('utf-8') + b'\n')
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # 클라이언트가 먼저 연결을 끊음 (작업은 계속 진행)
+
+        return Handler
+
+    def start(self):
+        self._encode_executor = self.batch.encode_pool()
+        self._worker = threading.Thread(target=self._work, daemon=True)
+        self._worker.start()
+        self._httpd = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self.token = write_token(self._httpd.server_port)
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        """실행 중인 작업을 취소하고(이어서 진행 가능) 서버를 종료"""
+        with self._condition:
+            self._stopping = True
+            if self._current is not None:
+                self._cancel_job_id = self._current['id']
+                self.batch.pause_controller.cancel()
+            self._condition.notify_all()
+        if self._worker:
+            self._worker.join()
+        if self._httpd:
+            token_path(self._httpd.server_port).unlink(missing_ok=True)
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+        if self._encode_executor:
+            self._encode_executor.shutdown()
+
+
+class DaemonClient:
+    """빌드 데몬 HTTP API 클라이언트 (GUI와 CLI에서 사용)"""
+    def __init__(self, base_url=None, timeout=5):
+        self.base_url = (base_url or daemon_url()).rstrip('/')
+        self.timeout = timeout
+
+    def _headers(self):
+        """데몬이 저장한 토큰 파일을 읽어 요청 헤더를 만듦 (데몬이 다시 시작되면 토큰이 바뀌므로 매번 읽음)"""
+        port = urlparse(self.base_url).port or DEFAULT_DAEMON_PORT
+        try:
+            token = token_path(port).read_text(encoding='utf-8').strip()
+        except OSError:
+            raise ConnectionRefusedError(f"빌드 데몬 토큰 파일이 없습니다: {token_path(port)}")
+        return {'Authorization': f"Bearer {token}", 'Content-Type': 'application/json'}
+
+    def _request(self, method, path, data=None):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8') if data is not None else None
+        request = urllib.request.Request(f"{self.base_url}{path}", data=body, method=method, headers=self._headers())
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read().decode('utf-8')).get('error')
+            except ValueError:
+                message = None
+            raise RuntimeError(f"빌드 데몬 요청 실패 ({e.code}): {message or e.reason}") from e
+
+    def available(self):
+        try:
+            return self._request('GET', '/health').get('status') == 'ok'
+        except (OSError, ValueError, RuntimeError):
+            return False
+
+    def submit(self, mod):
+        return self._request('POST', '/jobs', mod)['id']
+
+    def jobs(self):
+        return self._request('GET', '/jobs')['jobs']
+
+    def job(self, job_id):
+        return self._request('GET', f'/jobs/{job_id}')
+
+    def cancel(self, job_id):
+        return self._request('POST', f'/jobs/{job_id}/cancel')['cancelled']
+
+    def pause(self):
+        return self._request('POST', '/pause')
+
+    def resume(self):
+        return self._request('POST', '/resume')
+
+    def events(self, job_id, start=0):
+        """작업이 끝날 때까지 진행 이벤트를 차례로 반환 (연결이 끊기면 받은 위치부터 다시 연결)"""
+        index = start
+        while True:
+            try:
+                request = urllib.request.Request(f"{self.base_url}/jobs/{job_id}/events?from={index}", headers=self._headers())
+                with urllib.request.urlopen(request) as response:
+                    for line in response:
+                        event = json.loads(line.decode('utf-8'))
+                        index = event['seq'] + 1
+                        yield event
+                return
+            except (ConnectionResetError, urllib.error.URLError):
+                job = self.job(job_id)
+                if job['state'] in FINISHED_STATES and index >= job['events']:
+                    return
+                time.sleep(EVENT_WAIT_SECONDS)
+
+
+def _print_event(event):
+    if event['type'] == 'log':
+        print(event['message'])
+    elif event['type'] == 'state':
+        print(f"[데몬] 작업 상태: {event['state']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HOI4 음악 모드 빌드 데몬")
+    parser.add_argument('--url', help=f"데몬 주소 (기본: 환경 변수 {DAEMON_ENV} 또는 http://127.0.0.1:{DEFAULT_DAEMON_PORT})")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve = commands.add_parser('serve', help="데몬 실행")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=DEFAULT_DAEMON_PORT)
+    serve.add_argument('--config', help="공유 자원 설정 JSON (batch_build 설정 형식, mods는 무시)")
+    serve.add_argument('--background', action='store_true', help="낮은 우선순위, 적은 작업자로 빌드")
+    serve.add_argument('--verbose', action='store_true', help="모든 빌드 로그를 데몬 콘솔에도 출력")
+
+    submit = commands.add_parser('submit', help="빌드 작업 보내기")
+    submit.add_argument('output_dir', help="모드 출력 폴더")
+    submit.add_argument('--mod-data', help="곡 목록이 담긴 mod_data.json (기본: 출력 폴더의 mod_data.json)")
+    submit.add_argument('--zip', action='store_true', help="완료 후 모드 폴더 압축")
+    submit.add_argument('--target-size-mb', type=float, help="목표 총 용량(MB)")
+    submit.add_argument('--dedupe', choices=('flag', 'merge'), default='flag', help="중복 곡 처리 방식")
+    submit.add_argument('--resume', action='store_true', help="중단된 빌드가 있으면 이어서 진행")
+    submit.add_argument('--detach', action='store_true', help="진행 상황을 기다리지 않고 작업 ID만 출력")
+
+    status = commands.add_parser('status', help="작업 목록 또는 작업 상태")
+    status.add_argument('job_id', nargs='?', type=int)
+    cancel = commands.add_parser('cancel', help="작업 취소")
+    cancel.add_argument('job_id', type=int)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        config = {}
+        if args.config:
+            with open(args.config, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        if args.background:
+            config['background'] = True
+        daemon = BuildDaemon(config, host=args.host, port=args.port, progress_callback=print, echo_logs=args.verbose)
+        print(f"🛰️ 빌드 데몬 실행 중: {daemon.start()} (Ctrl+C로 종료)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("\n데몬을 종료합니다. 실행 중인 작업은 다음 실행에서 이어서 진행할 수 있습니다.")
+            daemon.stop()
+        return
+
+    client = DaemonClient(args.url)
+    if args.command == 'status':
+        print(json.dumps(client.job(args.job_id) if args.job_id else client.jobs(), ensure_ascii=False, indent=2))
+        return
+    if args.command == 'cancel':
+        print("취소 요청을 보냈습니다." if client.cancel(args.job_id) else "이미 끝났거나 없는 작업입니다.")
+        return
+
+    mod = {'output_dir': str(Path(args.output_dir).resolve()), 'zip': args.zip, 'target_size_mb': args.target_size_mb,
+           'dedupe': args.dedupe, 'resume': args.resume}
+    if args.mod_data:
+        mod['mod_data'] = str(Path(args.mod_data).resolve())
+    job_id = client.submit(mod)
+    print(f"📨 작업 {job_id} 접수됨")
+    if args.detach:
+        return
+    try:
+        for event in client.events(job_id):
+            _print_event(event)
+    except KeyboardInterrupt:
+        print(f"\n진행 상황 보기를 중단합니다. 작업은 계속 진행됩니다. (취소: python build_daemon.py cancel {job_id})")
+        return
+    raise SystemExit(0 if client.job(job_id)['state'] == DONE else 1)
+
+
+if __name__ == "__main__":
+    main()
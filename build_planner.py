@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+모드 생성 전에 아무것도 실행하지 않고 곡별 처리 방식(이미 변환됨, 캐시 재사용, 변환, 다운로드, 원본 없음)을 분류하고
+예상 재생 시간, 출력 용량, 소요 시간을 계산. 소요 시간은 이전 빌드에서 기록한 처리량(build_history.json) 기준
+
+    python build_planner.py <모드 출력 폴더> [--mod-data mod_data.json] [--target-size-mb 300] [--build]
+"""
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from ogg_verifier import OggVerifier
+from library_scanner import probe_audio_file
+from encoding_profiles import resolve_encoding, song_duration, predict_size, plan_target_size, encoding_matches
+from media_processor import song_file_name
+from transcode_cache import song_cache_key
+from station_analyzer import is_shard_folder
+from playlist_sync import REMOVED_FLAG
+from waveform import CACHE_DIR_NAME
+
+EXISTING, DUPLICATE, CACHED, ENCODE, DOWNLOAD, MISSING = 'existing', 'duplicate', 'cached', 'encode', 'download', 'missing'
+PLAN_LABELS = {
+    EXISTING: "이미 변환됨",
+    DUPLICATE: "중복(병합)",
+    CACHED: "캐시 재사용",
+    ENCODE: "변환 필요",
+    DOWNLOAD: "다운로드 필요",
+    MISSING: "원본 없음",
+}
+# 기록이 없을 때 쓰는 처리량 (벽시계 1초당 처리하는 곡 길이, 초)
+DEFAULT_THROUGHPUT = {'download': 15.0, 'convert': 60.0}
+CACHED_SONG_SECONDS = 0.05
+HISTORY_DECAY = 0.8
+
+
+class BuildHistory:
+    """작업 종류별로 처리한 곡 길이와 걸린 시간을 누적 (오래된 기록일수록 가중치가 줄어듦)"""
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.data = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    @classmethod
+    def for_output_dir(cls, output_dir):
+        return cls(Path(output_dir).resolve().parent / CACHE_DIR_NAME / "build_history.json")
+
+    def record(self, kind, audio_seconds, wall_seconds):
+        if audio_seconds <= 0 or wall_seconds <= 0:
+            return
+        with self._lock:
+            entry = self.data.setdefault(kind, {'audio_seconds': 0.0, 'wall_seconds': 0.0, 'runs': 0})
+            entry['audio_seconds'] = entry['audio_seconds'] * HISTORY_DECAY + audio_seconds
+            entry['wall_seconds'] = entry['wall_seconds'] * HISTORY_DECAY + wall_seconds
+            entry['runs'] += 1
+
+    def throughput(self, kind):
+        """(벽시계 1초당 처리하는 곡 길이, 기록 사용 여부)"""
+        entry = self.data.get(kind)
+        if entry and entry['wall_seconds'] > 0:
+            return entry['audio_seconds'] / entry['wall_seconds'], True
+        return DEFAULT_THROUGHPUT[kind], False
+
+    def save(self):
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_name(f"{self.path.name}.tmp")
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, indent=2)
+            os.replace(temp_path, self.path)
+
+
+class BuildPlanner:
+    """ModBuilder와 같은 기준으로 곡을 분류하지만 파일을 만들거나 지우지 않음"""
+    def __init__(self, output_dir, stations, progress_callback=None, target_size_mb=None, dedupe_mode='flag',
+                 transcode_cache=None, history=None, max_workers=16):
+        self.output_dir = Path(output_dir)
+        self.stations = stations
+        self.progress_callback = progress_callback
+        self.target_size_mb = target_size_mb
+        self.dedupe_mode = dedupe_mode
+        self.transcode_cache = transcode_cache
+        self.history = history or BuildHistory.for_output_dir(output_dir)
+        self.max_workers = max_workers
+
+    def _log(self, message):
+        if self.progress_callback:
+            self.progress_callback(message)
+
+    def _probe_source(self, song):
+        """로컬 원본의 존재 여부와 (곡 정보에 없으면) 헤더에서 읽은 길이"""
+        path = Path(song['url'])
+        if not path.is_file():
+            return False, None
+        if song.get('duration') or song.get('source_duration'):
+            return True, None
+        return True, probe_audio_file(path)['duration']
+
+    def plan(self):
+        entries = []
+        for station_name, station_data in self.stations.items():
+            encoding = resolve_encoding(station_data)
+            for song in station_data.get("songs", []):
+                ogg_path = self.output_dir / "music" / station_name / f"{song_file_name(song)}.ogg"
+                # 하위 스테이션으로 나뉘어 빌드된 곡은 하위 스테이션 폴더에 있음
+                if song.get('file_path') and is_shard_folder(Path(song['file_path']).parent.name, station_name, self.stations):
+                    ogg_path = self.output_dir / "music" / song['file_path']
+                entries.append({'station': station_name, 'song': song, 'encoding': encoding, 'ogg_path': ogg_path})
+
+        local_entries = [entry for entry in entries if entry['song'].get('source') == 'local']
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            probes = list(executor.map(lambda entry: self._probe_source(entry['song']), local_entries))
+        for entry, (exists, duration) in zip(local_entries, probes):
+            entry['source_exists'] = exists
+            entry['probed_duration'] = duration
+        verify_results = OggVerifier(max_workers=self.max_workers).verify_files(
+            entry['ogg_path'] for entry in entries if entry['ogg_path'].exists())
+
+        existing_bytes = 0
+        to_build, replannable = [], []
+        for entry in entries:
+            song = entry['song']
+            duration = song_duration({**song, 'source_duration': entry.get('probed_duration') or song.get('source_duration')})
+            entry['duration'] = duration
+            duplicate_of = song.get('duplicate_of')
+            if self.dedupe_mode == 'merge' and duplicate_of and (self.output_dir / "music" / duplicate_of).exists():
+                entry['status'], entry['size'] = DUPLICATE, 0
+            elif song.get(REMOVED_FLAG):
+                # ModBuilder와 같이 재생목록에서 빠진 곡은 변환된 파일만 사용
+                if verify_results.get(entry['ogg_path'], (False, ""))[0]:
+                    entry['status'], entry['size'] = EXISTING, entry['ogg_path'].stat().st_size
+                    existing_bytes += entry['size']
+                else:
+                    entry['status'], entry['size'] = MISSING, 0
+            elif verify_results.get(entry['ogg_path'], (False, ""))[0] and self.target_size_mb and song.get('encoding'):
+                # ModBuilder와 같이 인코딩이 기록된 곡은 목표 용량 계획에 다시 포함
+                entry['status'], entry['size'] = EXISTING, entry['ogg_path'].stat().st_size
+                replannable.append(entry)
+            elif verify_results.get(entry['ogg_path'], (False, ""))[0] and encoding_matches(song.get('encoding'), entry['encoding']):
+                entry['status'], entry['size'] = EXISTING, entry['ogg_path'].stat().st_size
+                existing_bytes += entry['size']
+            elif song.get('source') == 'local' and not entry['source_exists']:
+                entry['status'], entry['size'] = MISSING, 0
+            else:
+                to_build.append(entry)
+
+        if self.target_size_mb:
+            candidates = to_build + replannable
+            items = [(i, entry['duration'], entry['encoding']) for i, entry in enumerate(candidates)]
+            planned, _ = plan_target_size(items, self.target_size_mb * 1024 * 1024 - existing_bytes)
+            for i, entry in enumerate(candidates):
+                is_existing = i >= len(candidates) - len(replannable)
+                if is_existing and encoding_matches(entry['song'].get('encoding'), planned[i]):
+                    existing_bytes += entry['size']
+                    continue
+                entry['encoding'] = planned[i]
+                if is_existing:
+                    to_build.append(entry)
+        for entry in to_build:
+            if self.transcode_cache and self.transcode_cache.contains(song_cache_key(entry['song'], entry['encoding'])):
+                entry['status'] = CACHED
+            else:
+                entry['status'] = ENCODE if entry['song'].get('source') == 'local' else DOWNLOAD
+            entry['size'] = predict_size(entry['duration'], entry['encoding'])
+
+        return self._summarize(entries, existing_bytes)
+
+    def _summarize(self, entries, existing_bytes):
+        counts = {status: 0 for status in PLAN_LABELS}
+        for entry in entries:
+            counts[entry['status']] += 1
+
+        estimated_seconds, from_history = 0.0, True
+        for status, kind in ((DOWNLOAD, 'download'), (ENCODE, 'convert')):
+            audio_seconds = sum(entry['duration'] for entry in entries if entry['status'] == status)
+            if not audio_seconds:
+                continue
+            throughput, recorded = self.history.throughput(kind)
+            from_history = from_history and recorded
+            estimated_seconds += audio_seconds / throughput
+        estimated_seconds += counts[CACHED] * CACHED_SONG_SECONDS
+
+        return {
+            'songs': [{'station': entry['station'], 'title': entry['song'].get('korean_name') or entry['song'].get('english_name') or entry['song']['url'],
+                       'url': entry['song']['url'], 'status': entry['status'], 'duration': entry['duration'], 'size': entry['size']}
+                      for entry in entries],
+            'counts': counts,
+            'stations': len(self.stations),
+            'audio_seconds': sum(entry['duration'] for entry in entries if entry['status'] != MISSING),
+            'existing_bytes': existing_bytes,
+            'new_bytes': sum(entry['size'] for entry in entries if entry['status'] in (CACHED, ENCODE, DOWNLOAD)),
+            'estimated_seconds': estimated_seconds,
+            'from_history': from_history,
+        }
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours}시간 {minutes}분 {seconds}초" if hours else f"{minutes}분 {seconds}초"
+
+
+def format_plan(plan, max_missing=10):
+    """빌드 계획 요약 문자열 (GUI 확인 창과 CLI 출력에 공통으로 사용)"""
+    lines = [f"스테이션 {plan['stations']}개, 곡 {len(plan['songs'])}개 (총 재생 시간 {format_duration(plan['audio_seconds'])})"]
+    lines.extend(f"  - {PLAN_LABELS[status]}: {count}곡" for status, count in plan['counts'].items() if count)
+    total_mb = (plan['existing_bytes'] + plan['new_bytes']) / 1024 / 1024
+    lines.append(f"예상 용량: {total_mb:.1f}MB (새로 생성 {plan['new_bytes'] / 1024 / 1024:.1f}MB)")
+    basis = "이전 빌드 처리량 기준" if plan['from_history'] else "기록 없음, 기본 처리량 기준"
+    lines.append(f"예상 소요 시간: 약 {format_duration(plan['estimated_seconds'])} ({basis})")
+    missing = [song for song in plan['songs'] if song['status'] == MISSING]
+    if missing:
+        lines.append(f"⚠️ 원본을 찾을 수 없는 곡 (생성 시 실패):")
+        lines.extend(f"  - [{song['station']}] {song['url']}" for song in missing[:max_missing])
+        if len(missing) > max_missing:
+            lines.append(f"  ... 외 {len(missing) - max_missing}곡")
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="모드 생성 계획(곡 분류, 예상 용량/시간)을 출력")
+    parser.add_argument('output_dir', help="모드 출력 폴더")
+    parser.add_argument('--mod-data', help="곡 목록이 담긴 mod_data.json (기본: 출력 폴더의 mod_data.json)")
+    parser.add_argument('--target-size-mb', type=float, help="목표 총 용량(MB)")
+    parser.add_argument('--dedupe', choices=('flag', 'merge'), default='flag', help="중복 곡 처리 방식")
+    parser.add_argument('--build', action='store_true', help="계획을 확인한 뒤 모드 생성까지 진행")
+    args = parser.parse_args()
+
+    mod_data_path = Path(args.mod_data or Path(args.output_dir) / "mod_data.json")
+    with open(mod_data_path, 'r', encoding='utf-8') as f:
+        stations = json.load(f).get('stations', {})
+
+    plan = BuildPlanner(args.output_dir, stations, progress_callback=print, target_size_mb=args.target_size_mb,
+                        dedupe_mode=args.dedupe).plan()
+    print(format_plan(plan))
+    if not args.build:
+        return
+    if input("\n이 계획대로 모드를 생성하시겠습니까? [y/N] ").strip().lower() != 'y':
+        print("취소했습니다.")
+        return
+
+    from mod_builder import ModBuilder
+    builder = ModBuilder(args.output_dir, stations, progress_callback=print, target_size_mb=args.target_size_mb,
+                         dedupe_mode=args.dedupe)
+    builder.prepare()
+    raise SystemExit(0 if builder.run() else 1)
+
+
+if __name__ == "__main__":
+    main()
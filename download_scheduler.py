@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def is_throttle_error(error):
+    """HTTP 429 응답인지 상태 코드로만 확인 (메시지에 포함된 ID/URL의 숫자는 무시)"""
+    return getattr(error, 'code', None) == 429 or getattr(error, 'status', None) == 429
+
+
+class BandwidthLimiter:
+    """모든 다운로드 스레드가 공유하는 토큰 버킷 방식의 대역폭 제한기 (바이트/초)"""
+    def __init__(self, bytes_per_second=None):
+        self.bytes_per_second = bytes_per_second
+        self._tokens = float(bytes_per_second or 0)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, size):
+        if not self.bytes_per_second:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.bytes_per_second, self._tokens + (now - self._updated_at) * self.bytes_per_second)
+            self._updated_at = now
+            self._tokens -= size
+            wait = -self._tokens / self.bytes_per_second if self._tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class TransferStream:
+    """
+    작업 하나의 전송 상태. 받은 청크 크기로 호출하고, 전송이 끝나면(변환 등 로컬 작업 전에) finish()를 호출
+    첫 청크부터 finish()까지만 전송 중인 스트림으로 세어 스트림별 처리량을 계산하고,
+    finish()에서 다운로드 자리를 반납하여 로컬 작업 중에도 다음 다운로드가 시작되도록 함
+    """
+    def __init__(self, scheduler, run_stats):
+        self.scheduler = scheduler
+        self.run_stats = run_stats
+        self.transferring = False
+        self.finished = False
+
+    def __call__(self, size):
+        self.scheduler._on_chunk(self, size)
+
+    def finish(self):
+        self.scheduler._end_stream(self)
+
+
+class DownloadScheduler:
+    """
+    다운로드 작업을 처리량에 따라 동시 실행 수를 자동으로 조절하며 실행
+    처리량이 늘면 동시 실행 수를 올리고, 429 응답이나 스트림 속도 급락 시 전체적으로 물러남
+    동시 실행 수는 전송 중인 작업에만 적용되며, 전송을 마친 작업의 로컬 작업용으로 max_workers개의 스레드를 더 둠
+    """
+    def __init__(self, progress_callback=None, min_workers=1, max_workers=6, initial_workers=2,
+                 bandwidth_limit=None, adjust_interval=5.0, max_retries=3):
+        self.progress_callback = progress_callback
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers)
+        self.concurrency = min(max(initial_workers, self.min_workers), self.max_workers)
+        self.limiter = BandwidthLimiter(bandwidth_limit)
+        self.adjust_interval = adjust_interval
+        self.max_retries = max_retries
+
+        self._condition = threading.Condition()
+        self._active = 0  # 다운로드 자리를 차지한 작업 수 (시작부터 전송 종료까지)
+        self._running = 0  # 스레드에서 실행 중인 작업 수 (전송 후 로컬 작업 포함)
+        self._streaming = 0
+        self._window_bytes = 0
+        self._window_started = time.monotonic()
+        self._window_stream_seconds = 0.0  # 측정 구간 동안 (전송 중인 스트림 수 × 시간)의 합
+        self._streams_counted_at = self._window_started
+        self._previous = None  # (동시 실행 수, 처리량)
+        self._best_stream_rate = 0.0
+        self._backoff_until = 0.0
+        self._backoff_seconds = 2.0
+        self.total_bytes = 0
+        self.history = []
+
+    def _log(self, message):
+        if self.progress_callback:
+            self.progress_callback(message)
+
+    def _count_streams_locked(self, now):
+        self._window_stream_seconds += self._streaming * max(0.0, now - self._streams_counted_at)
+        self._streams_counted_at = now
+
+    def _on_chunk(self, stream, size):
+        self.limiter.consume(size)
+        with self._condition:
+            if not stream.transferring and not stream.finished:
+                now = time.monotonic()
+                if self._streaming == 0 and now >= self._window_started:
+                    # 모든 작업이 로컬 작업 중이던 구간은 처리량 측정에서 제외
+                    self._window_bytes = 0
+                    self._window_started = now
+                    self._window_stream_seconds = 0.0
+                self._count_streams_locked(now)
+                stream.transferring = True
+                self._streaming += 1
+            self._window_bytes += size
+            self.total_bytes += size
+            stream.run_stats['bytes'] += size
+        self._maybe_adjust()
+
+    def _end_stream(self, stream):
+        with self._condition:
+            if stream.finished:
+                return
+            stream.finished = True
+            if stream.transferring:
+                self._count_streams_locked(time.monotonic())
+                stream.transferring = False
+                self._streaming -= 1
+            self._active -= 1
+            self._condition.notify_all()
+
+    def _maybe_adjust(self):
+        with self._condition:
+            now = time.monotonic()
+            elapsed = now - self._window_started
+            if elapsed < self.adjust_interval or self._streaming == 0:
+                return
+            self._count_streams_locked(now)
+            if self._window_stream_seconds < self.adjust_interval * 0.5:
+                return  # 전송 시간이 너무 짧으면 스트림별 속도를 믿을 수 없으므로 측정 구간을 늘림
+            throughput = self._window_bytes / elapsed
+            # 변환 등 로컬 작업 중인 작업은 빼고, 실제로 전송 중이던 스트림 수(시간 가중)로 나눔
+            stream_rate = self._window_bytes / self._window_stream_seconds if self._window_stream_seconds else 0.0
+            self._window_bytes = 0
+            self._window_started = now
+            self._window_stream_seconds = 0.0
+            self.history.append((round(now, 1), self.concurrency, round(throughput)))
+
+            self._best_stream_rate = max(self._best_stream_rate, stream_rate)
+            if self._best_stream_rate and stream_rate < self._best_stream_rate * 0.2:
+                # 스트림별 속도가 최고치의 20% 미만으로 떨어지면 스로틀링으로 간주
+                self._throttle_locked("스트림 속도 급락")
+                return
+
+            capped = self.limiter.bytes_per_second and throughput >= self.limiter.bytes_per_second * 0.9
+            previous_concurrency, previous_throughput = self._previous or (0, 0.0)
+            self._previous = (self.concurrency, throughput)
+            if self.concurrency > previous_concurrency and previous_throughput and throughput < previous_throughput * 1.1:
+                # 동시 실행 수를 늘렸는데 처리량이 10% 이상 늘지 않으면 되돌림
+                self.concurrency = max(self.min_workers, self.concurrency - 1)
+            elif not capped and self.concurrency < self.max_workers and self._active >= self.concurrency:
+                self.concurrency += 1
+                self._backoff_seconds = 2.0
+            self._condition.notify_all()
+
+    def _throttle_locked(self, reason):
+        self.concurrency = max(self.min_workers, self.concurrency // 2)
+        self._backoff_until = time.monotonic() + self._backoff_seconds
+        # 대기 시간이 처리량 측정에 섞이지 않도록 측정 구간을 대기 종료 시점부터 다시 시작
+        self._window_bytes = 0
+        self._window_started = self._backoff_until
+        self._window_stream_seconds = 0.0
+        self._streams_counted_at = self._backoff_until
+        self._log(f"  🐢 속도 제한 감지({reason}): 동시 다운로드 {self.concurrency}개, {self._backoff_seconds:.0f}초 대기")
+        self._backoff_seconds = min(60.0, self._backoff_seconds * 2)
+        self._previous = None
+
+    def run(self, tasks, on_result=None, thread_initializer=None):
+        """
+        tasks: [(key, fn)] 형태. fn(on_chunk)는 다운로드 중 받은 바이트 수로 on_chunk를 호출하고 결과를 반환
+               전송 뒤에 변환 등 로컬 작업을 한다면 그 전에 on_chunk.finish()를 호출 (TransferStream 참고)
+        on_result: 작업 결과가 확정될 때마다(재시도 후 최종 결과) 작업 스레드에서 (key, 성공 여부, 결과 또는 예외)로 호출
+        thread_initializer: 이번 실행에서 만드는 작업 스레드마다 처음에 호출 (백그라운드 우선순위 등)
+        {key: (성공 여부, 결과 또는 예외)}를 반환
+        """
+        pending = [(key, fn, 0) for key, fn in reversed(tasks)]
+        results = {}
+        started_at = time.monotonic()
+        # 배치/데몬 빌드가 스케줄러를 공유하므로 이번 실행에서 받은 양은 따로 셈
+        run_stats = {'bytes': 0}
+
+        def worker(key, fn, attempt):
+            stream = TransferStream(self, run_stats)
+            try:
+                results[key] = (True, fn(stream))
+            except Exception as e:
+                with self._condition:
+                    if is_throttle_error(e) and attempt < self.max_retries:
+                        self._throttle_locked("HTTP 429")
+                        pending.append((key, fn, attempt + 1))
+                    else:
+                        results[key] = (False, e)
+            finally:
+                stream.finish()
+            try:
+                if on_result and key in results:
+                    on_result(key, *results[key])
+            finally:
+                with self._condition:
+                    self._running -= 1
+                    self._condition.notify_all()
+
+        thread_count = self.max_workers * 2
+        with ThreadPoolExecutor(max_workers=thread_count, initializer=thread_initializer) as executor:
+            with self._condition:
+                while pending or self._running:
+                    wait = self._backoff_until - time.monotonic()
+                    if pending and self._active < self.concurrency and self._running < thread_count and wait <= 0:
+                        key, fn, attempt = pending.pop()
+                        self._active += 1
+                        self._running += 1
+                        executor.submit(worker, key, fn, attempt)
+                    else:
+                        self._condition.wait(timeout=max(0.1, wait) if pending else None)
+
+        elapsed = max(time.monotonic() - started_at, 1e-6)
+        self._log(f"📶 다운로드 {len(tasks)}건 완료: {run_stats['bytes'] / 1024 / 1024:.1f}MB, "
+                  f"평균 {run_stats['bytes'] / elapsed / 1024:.0f}KB/s, 최종 동시 실행 수 {self.concurrency}")
+        return results
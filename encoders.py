@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+디코딩된 오디오(AudioSegment)를 OGG Vorbis로 인코딩하는 백엔드 모음
+- pydub: 기존 방식 (임시 WAV를 거쳐 ffmpeg 실행)
+- ffmpeg: PCM을 표준 입력으로 바로 넘겨 ffmpeg libvorbis로 인코딩
+- oggenc: vorbis-tools의 oggenc에 PCM을 표준 입력으로 전달
+- soundfile: libsndfile로 프로세스 안에서 인코딩 (soundfile 패키지가 있을 때)
+
+품질은 모든 백엔드에서 libvorbis 품질 값(-q, -1~10)을 기준으로 같은 의미가 되도록 변환
+처음 사용할 때 짧은 테스트 음원으로 사용 가능한 백엔드를 모두 인코딩해 보고 가장 빠른 것을 선택하며,
+결과는 캐시 폴더에 저장하여 다음 실행에서 재사용 (환경 변수 HOI4_MUSIC_ENCODER로 강제 지정 가능)
+"""
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+import numpy as np
+from pydub import AudioSegment
+from pydub.audio_segment import fix_wav_headers
+from encoding_profiles import export_parameters, MIN_QUALITY, MAX_QUALITY
+from resource_scheduler import background_creationflags
+from waveform import CACHE_DIR_NAME
+
+try:
+    import soundfile
+except (ImportError, OSError):
+    soundfile = None
+
+ENCODER_ENV = "HOI4_MUSIC_ENCODER"
+BENCHMARK_FILE_NAME = "encoder_benchmark.json"
+BENCHMARK_SECONDS = 5
+BENCHMARK_VERSION = 1
+# pydub(audioop)은 8비트 샘플도 부호 있는 값으로 다룸
+_FFMPEG_RAW_FORMATS = {1: 's8', 2: 's16le', 3: 's24le', 4: 's32le'}
+
+
+def decode_audio(input_file):
+    """
+    AudioSegment.from_file과 같음. 백그라운드 작업 스레드의 Windows에서는 pydub이 ffmpeg에 우선순위를 넘길 수 없으므로
+    ffmpeg를 낮은 우선순위로 직접 실행해 WAV로 디코딩
+    """
+    creationflags = background_creationflags()
+    if not creationflags:
+        return AudioSegment.from_file(input_file)
+    command = [AudioSegment.converter, '-loglevel', 'error', '-i', str(input_file), '-vn', '-acodec', 'pcm_s16le', '-f', 'wav', '-']
+    result = subprocess.run(command, capture_output=True, check=False, creationflags=creationflags)
+    if result.returncode != 0:
+        raise RuntimeError(f"디코딩 실패: {result.stderr.decode('utf-8', 'replace').strip()[-500:]}")
+    data = bytearray(result.stdout)
+    fix_wav_headers(data)  # 파이프 출력은 WAV 헤더에 길이가 없음
+    return AudioSegment.from_wav(io.BytesIO(bytes(data)))
+
+
+def vorbis_quality(encoding):
+    return min(MAX_QUALITY, max(MIN_QUALITY, int(encoding.get('quality', 5))))
+
+
+class EncoderBackend:
+    """encode(audio, output_file, encoding)으로 AudioSegment를 OGG 파일로 저장. output_file 확장자는 .ogg가 아닐 수 있음"""
+    name = None
+
+    @classmethod
+    def available(cls):
+        return False
+
+    def encode(self, audio, output_file, encoding):
+        raise NotImplementedError
+
+    def _run(self, command, audio):
+        # Windows의 자식 프로세스는 스레드 우선순위를 물려받지 않으므로 백그라운드 모드면 낮은 우선순위로 시작
+        result = subprocess.run(command, input=audio.raw_data, capture_output=True, check=False,
+                                creationflags=background_creationflags())
+        if result.returncode != 0:
+            raise RuntimeError(f"{self.name} 인코딩 실패: {result.stderr.decode('utf-8', 'replace').strip()[-500:]}")
+
+
+class PydubEncoder(EncoderBackend):
+    name = 'pydub'
+
+    @classmethod
+    def available(cls):
+        return shutil.which(AudioSegment.converter) is not None
+
+    def encode(self, audio, output_file, encoding):
+        if background_creationflags():
+            # pydub은 ffmpeg에 우선순위를 넘길 수 없으므로 같은 ffmpeg 인코딩을 파이프로 실행
+            FFmpegPipeEncoder().encode(audio, output_file, encoding)
+            return
+        audio.export(output_file, format="ogg", codec="libvorbis", parameters=export_parameters(encoding)).close()
+
+
+class FFmpegPipeEncoder(EncoderBackend):
+    name = 'ffmpeg'
+
+    @classmethod
+    def available(cls):
+        return shutil.which(AudioSegment.converter) is not None
+
+    def encode(self, audio, output_file, encoding):
+        command = [AudioSegment.converter, '-y', '-loglevel', 'error',
+                   '-f', _FFMPEG_RAW_FORMATS[audio.sample_width], '-ar', str(audio.frame_rate), '-ac', str(audio.channels),
+                   '-i', 'pipe:0', '-c:a', 'libvorbis', *export_parameters({**encoding, 'quality': vorbis_quality(encoding)}),
+                   '-f', 'ogg', str(output_file)]
+        self._run(command, audio)
+
+
+class OggencEncoder(EncoderBackend):
+    name = 'oggenc'
+
+    @classmethod
+    def available(cls):
+        return shutil.which('oggenc') is not None
+
+    def encode(self, audio, output_file, encoding):
+        if audio.sample_width != 2:
+            audio = audio.set_sample_width(2)
+        command = ['oggenc', '--quiet', '--raw', '--raw-bits=16', f'--raw-chan={audio.channels}',
+                   f'--raw-rate={audio.frame_rate}', '--raw-endianness=0', '-q', str(vorbis_quality(encoding)),
+                   '-o', str(output_file)]
+        if encoding.get('channels') == 1 and audio.channels > 1:
+            command.append('--downmix')
+        if encoding.get('sample_rate') and encoding['sample_rate'] != audio.frame_rate:
+            command.append(f"--resample={encoding['sample_rate']}")
+        self._run(command + ['-'], audio)
+
+
+class SoundfileEncoder(EncoderBackend):
+    name = 'soundfile'
+
+    @classmethod
+    def available(cls):
+        return soundfile is not None and 'VORBIS' in soundfile.available_subtypes('OGG')
+
+    def encode(self, audio, output_file, encoding):
+        if encoding.get('channels') and encoding['channels'] != audio.channels:
+            audio = audio.set_channels(encoding['channels'])
+        if encoding.get('sample_rate') and encoding['sample_rate'] != audio.frame_rate:
+            audio = audio.set_frame_rate(encoding['sample_rate'])
+        if audio.sample_width not in (2, 4):
+            audio = audio.set_sample_width(2)
+        samples = np.frombuffer(audio.raw_data, dtype='<i2' if audio.sample_width == 2 else '<i4').reshape(-1, audio.channels)
+        # libsndfile의 압축 수준은 1 - (vorbis 품질 / 10). 0 미만 품질은 표현할 수 없어 0으로 인코딩
+        compression_level = min(1.0, max(0.0, 1.0 - vorbis_quality(encoding) / 10))
+        soundfile.write(str(output_file), samples, audio.frame_rate, format='OGG', subtype='VORBIS',
+                        compression_level=compression_level)
+
+
+ENCODER_BACKENDS = {backend.name: backend for backend in (FFmpegPipeEncoder, OggencEncoder, SoundfileEncoder, PydubEncoder)}
+
+
+def available_backends():
+    return [name for name, backend in ENCODER_BACKENDS.items() if backend.available()]
+
+
+def _benchmark_audio(seconds=BENCHMARK_SECONDS, frame_rate=44100):
+    """음악과 비슷하게 여러 주파수와 약한 잡음이 섞인 스테레오 테스트 음원"""
+    t = np.arange(seconds * frame_rate) / frame_rate
+    rng = np.random.default_rng(0)
+    left = 0.3 * np.sin(2 * np.pi * 220 * t) + 0.2 * np.sin(2 * np.pi * 1375 * t) + 0.05 * rng.standard_normal(t.size)
+    right = 0.3 * np.sin(2 * np.pi * 330 * t) + 0.2 * np.sin(2 * np.pi * 2750 * t) + 0.05 * rng.standard_normal(t.size)
+    samples = (np.stack([left, right], axis=1) * 32767 * 0.8).astype('<i2')
+    return AudioSegment(data=samples.tobytes(), sample_width=2, frame_rate=frame_rate, channels=2)
+
+
+class EncoderSelector:
+    """사용 가능한 백엔드를 벤치마크해 가장 빠른 것을 고르고 결과를 JSON으로 캐시"""
+    def __init__(self, cache_path, progress_callback=None):
+        self.cache_path = Path(cache_path)
+        self.progress_callback = progress_callback
+
+    def _log(self, message):
+        if self.progress_callback:
+            self.progress_callback(message)
+
+    def _load_cached(self, host, names):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cached.get('version') == BENCHMARK_VERSION and cached.get('host') == host and cached.get('backends') == names \
+                and cached.get('choice') in names:
+            return cached
+        return None
+
+    def benchmark(self, names, repeat=2):
+        """{백엔드 이름: 가장 빠른 인코딩 시간(초)}. 실패한 백엔드는 제외"""
+        audio = _benchmark_audio()
+        timings = {}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for name in names:
+                output_file = Path(temp_dir) / f"{name}.ogg.tmp"
+                try:
+                    best = None
+                    for _ in range(repeat):
+                        started_at = time.perf_counter()
+                        ENCODER_BACKENDS[name]().encode(audio, output_file, {'quality': 5})
+                        elapsed = time.perf_counter() - started_at
+                        best = elapsed if best is None else min(best, elapsed)
+                    with open(output_file, 'rb') as f:
+                        if f.read(4) != b'OggS':
+                            raise RuntimeError("OGG 파일이 아닙니다.")
+                    timings[name] = best
+                except Exception as e:
+                    self._log(f"  ⚠️ 인코더 '{name}' 사용 불가: {e}")
+        return timings
+
+    def select(self):
+        forced = os.environ.get(ENCODER_ENV)
+        names = available_backends()
+        if forced:
+            if forced not in names:
+                raise RuntimeError(f"{ENCODER_ENV}={forced} 인코더를 사용할 수 없습니다. 사용 가능: {', '.join(names) or '없음'}")
+            return forced
+        if not names:
+            raise RuntimeError("사용 가능한 OGG 인코더가 없습니다. ffmpeg를 설치해주세요.")
+
+        host = platform.node()
+        cached = self._load_cached(host, names)
+        if cached:
+            return cached['choice']
+
+        self._log(f"⏱️ OGG 인코더 벤치마크 중... ({', '.join(names)})")
+        timings = self.benchmark(names)
+        if not timings:
+            raise RuntimeError("모든 OGG 인코더가 테스트 인코딩에 실패했습니다.")
+        choice = min(timings, key=timings.get)
+        self._log("  " + ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in sorted(timings.items(), key=lambda x: x[1]))
+                  + f" → '{choice}' 사용")
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.cache_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': BENCHMARK_VERSION, 'host': host, 'backends': names, 'choice': choice, 'timings': timings}, f, indent=2)
+        except OSError:
+            pass
+        return choice
+
+
+_selected_encoders = {}
+_select_lock = threading.Lock()
+
+
+def encoder_for_output_dir(output_dir, progress_callback=None):
+    """출력 폴더의 캐시 폴더 기준으로 선택된 인코더 (프로세스 안에서는 한 번만 벤치마크)"""
+    cache_path = Path(output_dir).resolve().parent / CACHE_DIR_NAME / BENCHMARK_FILE_NAME
+    with _select_lock:
+        if cache_path not in _selected_encoders:
+            name = EncoderSelector(cache_path, progress_callback).select()
+            _selected_encoders[cache_path] = ENCODER_BACKENDS[name]()
+        return _selected_encoders[cache_path]
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+import heapq
+
+# channels/sample_rate가 None이면 원본 값을 유지
+ENCODING_PROFILES = {
+    'default': {'quality': 5, 'channels': None, 'sample_rate': None},
+    'balanced': {'quality': 3, 'channels': None, 'sample_rate': 44100},
+    'compact': {'quality': 2, 'channels': 1, 'sample_rate': 44100},
+    'tiny': {'quality': 0, 'channels': 1, 'sample_rate': 32000},
+}
+DEFAULT_PROFILE = 'default'
+MIN_QUALITY, MAX_QUALITY = -1, 10
+DEFAULT_SONG_DURATION = 210
+
+# libvorbis 품질(-q:a)별 대략적인 평균 비트레이트 (kbps, 44.1kHz 스테레오 기준)
+VORBIS_NOMINAL_KBPS = {-1: 45, 0: 64, 1: 80, 2: 96, 3: 112, 4: 128, 5: 160, 6: 192, 7: 224, 8: 256, 9: 320, 10: 500}
+MONO_BITRATE_FACTOR = 0.6
+
+
+def resolve_encoding(station_data):
+    """스테이션의 인코딩 설정(프로필 + 개별 값 덮어쓰기)을 quality/channels/sample_rate 딕셔너리로 변환"""
+    settings = dict(station_data.get('encoding') or {})
+    profile_name = settings.pop('profile', DEFAULT_PROFILE)
+    encoding = dict(ENCODING_PROFILES.get(profile_name, ENCODING_PROFILES[DEFAULT_PROFILE]))
+    encoding.update({key: value for key, value in settings.items() if key in encoding and value is not None})
+    encoding['quality'] = min(MAX_QUALITY, max(MIN_QUALITY, int(encoding['quality'])))
+    return encoding
+
+
+def export_parameters(encoding):
+    """ffmpeg 내보내기 인자 생성"""
+    parameters = ["-q:a", str(encoding.get('quality', 5))]
+    if encoding.get('channels'):
+        parameters += ["-ac", str(encoding['channels'])]
+    if encoding.get('sample_rate'):
+        parameters += ["-ar", str(encoding['sample_rate'])]
+    return parameters
+
+
+def song_duration(song_info):
+    """곡 정보에서 인코딩될 길이(초)를 추정 (프로브 값 → 이전 빌드 값 → 기본값)"""
+    for key in ('duration', 'source_duration', 'original_duration'):
+        if song_info.get(key):
+            duration = float(song_info[key])
+            if key != 'duration':
+                duration -= song_info.get('trim_start', 0)
+            return max(1.0, duration)
+    return DEFAULT_SONG_DURATION
+
+
+def predict_size(duration, encoding):
+    """품질/채널/샘플레이트로 OGG 파일 크기(바이트) 예측"""
+    kbps = VORBIS_NOMINAL_KBPS[min(MAX_QUALITY, max(MIN_QUALITY, int(encoding.get('quality', 5))))]
+    if encoding.get('channels') == 1:
+        kbps *= MONO_BITRATE_FACTOR
+    sample_rate = encoding.get('sample_rate')
+    if sample_rate and sample_rate < 44100:
+        kbps *= max(0.5, sample_rate / 44100)
+    return int(duration * kbps * 1000 / 8)
+
+
+def plan_target_size(items, target_bytes):
+    """
+    items: [(key, duration, encoding)] 목록에서 총 예상 크기가 target_bytes 이하가 되도록 곡별 품질을 낮춤
+    비트레이트가 가장 높은(품질이 높고 긴) 곡부터 한 단계씩 낮추며, {key: encoding}과 예상 총 크기를 반환
+    """
+    planned = {key: dict(encoding) for key, _, encoding in items}
+    durations = {key: duration for key, duration, _ in items}
+    total = sum(predict_size(durations[key], planned[key]) for key in planned)
+
+    heap = [(-planned[key]['quality'], -durations[key], i, key) for i, key in enumerate(planned)]
+    heapq.heapify(heap)
+    while total > target_bytes and heap:
+        _, _, i, key = heapq.heappop(heap)
+        encoding = planned[key]
+        if encoding['quality'] <= MIN_QUALITY:
+            continue
+        before = predict_size(durations[key], encoding)
+        encoding['quality'] -= 1
+        total += predict_size(durations[key], encoding) - before
+        heapq.heappush(heap, (-encoding['quality'], -durations[key], i, key))
+    return planned, total
+
+
+def encoding_matches(used, planned):
+    """곡에 기록된 인코딩(used)이 계획한 인코딩과 같은지 확인. 기록이 없으면(이전 버전에서 변환한 곡) 같은 것으로 봄"""
+    return not used or all(used.get(key) == value for key, value in planned.items())
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+유튜브 대신 합성 오디오와 재생목록 메타데이터를 제공하는 로컬 테스트 서버
+지연 시간, 스트림별 대역폭 제한, 전송 중 연결 끊김, 429 응답을 설정하여
+다운로드 경로(동시성, 재시도, 처리량)를 오프라인에서 재현 가능하게 측정할 수 있음
+
+    python fake_media_server.py --port 8765 --latency 0.2 --bandwidth 512 --throttle-rate 0.1
+    python fake_media_server.py --benchmark --videos 30 --workers 8
+"""
+import argparse
+import io
+import json
+import math
+import random
+import struct
+import tempfile
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from media_sources import HTTPMediaSource
+from download_scheduler import DownloadScheduler
+
+
+def generate_tone_wav(duration, frequency, sample_rate=22050):
+    """지정한 길이와 주파수의 모노 사인파 WAV 바이트 생성"""
+    frame_count = int(duration * sample_rate)
+    period = max(1, int(sample_rate / frequency))
+    cycle = b''.join(struct.pack('<h', int(12000 * math.sin(2 * math.pi * i / period))) for i in range(period))
+    pcm = (cycle * (frame_count // period + 1))[:frame_count * 2]
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+
+class FakeMediaServer:
+    def __init__(self, host='127.0.0.1', port=0, video_count=20, duration=30, latency=0.0,
+                 bandwidth=None, failure_rate=0.0, throttle_rate=0.0, max_concurrent_streams=None, seed=None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.failure_rate = failure_rate
+        self.throttle_rate = throttle_rate
+        self.max_concurrent_streams = max_concurrent_streams
+        self.random = random.Random(seed)
+        self.videos = {
+            f"vid{i:04d}": {'title': f"Test Song {i:04d}", 'length': duration, 'subtype': 'wav', 'frequency': 220 + i * 10}
+            for i in range(video_count)
+        }
+        self.playlists = {'PLTEST': list(self.videos)}
+        self.stats = {'requests': 0, 'streams': 0, 'throttled': 0, 'failed': 0, 'bytes_sent': 0}
+        self._audio_cache = {}
+        self._lock = threading.Lock()
+        self._active_streams = 0
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self._httpd.server_address[1]}"
+
+    def video_url(self, video_id):
+        return f"{self.base_url}/watch?v={video_id}"
+
+    def playlist_url(self, playlist_id='PLTEST'):
+        return f"{self.base_url}/playlist?list={playlist_id}"
+
+    def audio_bytes(self, video_id):
+        with self._lock:
+            if video_id not in self._audio_cache:
+                video = self.videos[video_id]
+                self._audio_cache[video_id] = generate_tone_wav(video['length'], video['frequency'])
+            return self._audio_cache[video_id]
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, data, status=200):
+                body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_throttled(self):
+                with server._lock:
+                    server.stats['throttled'] += 1
+                self.send_response(429, 'Too Many Requests')
+                self.send_header('Retry-After', '1')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def do_GET(self):
+                with server._lock:
+                    server.stats['requests'] += 1
+                    throttled = server.random.random() < server.throttle_rate
+                if server.latency:
+                    time.sleep(server.latency)
+
+                parts = [p for p in urlparse(self.path).path.split('/') if p]
+                if len(parts) == 3 and parts[:2] == ['api', 'video'] and parts[2] in server.videos:
+                    video = server.videos[parts[2]]
+                    self._send_json({'title': video['title'], 'length': video['length'], 'subtype': video['subtype']})
+                elif len(parts) == 3 and parts[:2] == ['api', 'playlist'] and parts[2] in server.playlists:
+                    videos = [{'url': server.video_url(v), 'title': server.videos[v]['title']} for v in server.playlists[parts[2]]]
+                    self._send_json({'videos': videos})
+                elif len(parts) == 2 and parts[0] == 'stream' and parts[1] in server.videos:
+                    if throttled:
+                        self._send_throttled()
+                    else:
+                        self._send_stream(parts[1])
+                else:
+                    self._send_json({'error': 'not found'}, status=404)
+
+            def _send_stream(self, video_id):
+                data = server.audio_bytes(video_id)
+                with server._lock:
+                    too_busy = server.max_concurrent_streams and server._active_streams >= server.max_concurrent_streams
+                    if not too_busy:
+                        server._active_streams += 1
+                        server.stats['streams'] += 1
+                        fail_at = int(len(data) * server.random.uniform(0.1, 0.9)) if server.random.random() < server.failure_rate else None
+                if too_busy:
+                    self._send_throttled()
+                    return
+                try:
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'audio/wav')
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    chunk_size = 16 * 1024
+                    sent = 0
+                    started_at = time.monotonic()
+                    while sent < len(data):
+                        if fail_at is not None and sent >= fail_at:
+                            with server._lock:
+                                server.stats['failed'] += 1
+                            self.close_connection = True
+                            return
+                        chunk = data[sent:sent + chunk_size]
+                        self.wfile.write(chunk)
+                        sent += len(chunk)
+                        with server._lock:
+                            server.stats['bytes_sent'] += len(chunk)
+                        if server.bandwidth:
+                            ahead = sent / server.bandwidth - (time.monotonic() - started_at)
+                            if ahead > 0:
+                                time.sleep(ahead)
+                finally:
+                    with server._lock:
+                        server._active_streams -= 1
+
+        return Handler
+
+    def start(self):
+        self._httpd = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def run_download_benchmark(server, output_dir, max_workers=6, bandwidth_limit=None, progress_callback=print):
+    """가짜 서버의 재생목록 전체를 DownloadScheduler로 내려받고 처리량을 측정 (변환은 하지 않음)"""
+    source = HTTPMediaSource(server.base_url)
+    videos = source.list_playlist(server.playlist_url())
+
+    def make_task(video, index):
+        def task(on_chunk):
+            media = source.open(video['url'], on_progress=lambda size, remaining, total: on_chunk(size))
+            return media.download(output_dir, f"bench_{index:04d}")
+        return task
+
+    scheduler = DownloadScheduler(progress_callback=progress_callback, max_workers=max_workers,
+                                  bandwidth_limit=bandwidth_limit, adjust_interval=1.0)
+    started_at = time.monotonic()
+    results = scheduler.run([(i, make_task(video, i)) for i, video in enumerate(videos)])
+    elapsed = time.monotonic() - started_at
+    succeeded = sum(1 for ok, _ in results.values() if ok)
+    return {
+        'videos': len(videos), 'succeeded': succeeded, 'seconds': round(elapsed, 2),
+        'bytes': scheduler.total_bytes, 'throughput_kbps': round(scheduler.total_bytes / elapsed / 1024, 1),
+        'concurrency_history': scheduler.history, 'server_stats': dict(server.stats),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 다운로드 테스트용 가짜 미디어 서버")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--videos', type=int, default=20, help="합성 영상 수")
+    parser.add_argument('--duration', type=int, default=30, help="영상 길이(초)")
+    parser.add_argument('--latency', type=float, default=0.0, help="요청당 지연(초)")
+    parser.add_argument('--bandwidth', type=float, default=0, help="스트림별 대역폭 제한(KB/s)")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="전송 중 연결 끊김 확률")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="429 응답 확률")
+    parser.add_argument('--max-streams', type=int, default=0, help="동시 스트림 수 초과 시 429 응답")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--benchmark', action='store_true', help="서버를 띄우고 다운로드 벤치마크를 실행")
+    parser.add_argument('--workers', type=int, default=6, help="벤치마크 최대 동시 다운로드 수")
+    args = parser.parse_args()
+
+    server = FakeMediaServer(
+        host=args.host, port=0 if args.benchmark else args.port, video_count=args.videos, duration=args.duration,
+        latency=args.latency, bandwidth=args.bandwidth * 1024 or None, failure_rate=args.failure_rate,
+        throttle_rate=args.throttle_rate, max_concurrent_streams=args.max_streams or None, seed=args.seed
+    )
+    with server:
+        if args.benchmark:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                print(json.dumps(run_download_benchmark(server, temp_dir, max_workers=args.workers), ensure_ascii=False, indent=2))
+            return
+        print(f"🛰️ 가짜 미디어 서버 실행 중: {server.base_url}")
+        print(f"  재생목록 URL: {server.playlist_url()}")
+        print(f"  앱에서 사용하려면 환경 변수 HOI4_MUSIC_MEDIA_SOURCE={server.base_url} 를 설정하세요.")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
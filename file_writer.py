@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
+import os
 from pathlib import Path
 
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
 class FileWriter:
     def __init__(self, output_dir, station_name, progress_callback=None):
         self.output_dir = Path(output_dir)
@@ -20,60 +24,44 @@ class FileWriter:
             return False
         
         self._log(f"\n📄 HOI4 모드 파일 생성 중... (총 {len(self.songs)}곡)")
-        
-        self.generate_localisation_file()
-        self.generate_soundtrack_file()
-        self.generate_music_asset_file()
-        self.generate_gfx_file()
-        self.generate_gui_file()
-        
+        self.write_streaming(self.songs)
         return True
 
-    def generate_localisation_file(self):
-        file_path = self.output_dir / "localisation" / f"{self.station_name}_l_english.yml"
+    def remove_files(self):
+        """스테이션이 없어졌을 때(하위 스테이션으로 분할 등) 남아 있는 모드 파일을 삭제"""
+        for path in self._paths().values():
+            path.unlink(missing_ok=True)
+
+    def _paths(self):
+        return {
+            'localisation': self.output_dir / "localisation" / f"{self.station_name}_l_english.yml",
+            'soundtrack': self.output_dir / "music" / f"{self.station_name}_soundtrack.txt",
+            'asset': self.output_dir / "music" / f"{self.station_name}_music.asset",
+            'gfx': self.output_dir / "interface" / f"{self.station_name}_music.gfx",
+            'gui': self.output_dir / "interface" / f"{self.station_name}_music.gui",
+        }
+
+    def _localisation_header(self):
         station_title = self.station_name.replace('_', ' ').title()
-        content = ["l_english:", f' {self.station_name}_TITLE:0 "{station_title}"']
-        for song in self.songs:
-            content.append(f' {song["name"]}:0 "{song["display_name"]}"')
-        
-        with open(file_path, 'w', encoding='utf-8-sig') as f:
-            f.write('\n'.join(content) + '\n')
-        self._log(f"📝 생성 완료: {file_path}")
-
-    def generate_soundtrack_file(self):
-        file_path = self.output_dir / "music" / f"{self.station_name}_soundtrack.txt"
-        content = [f'music_station = "{self.station_name}"', ""]
-        for song in self.songs:
-            content.extend([
-                'music = {',
-                f'\tsong = "{song["name"]}"',
-                f'\tchance = {{ \tmodifier = {{ factor = {song.get("weight", 1)} }} }}',
-                '}', ''
-            ])
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(content))
-        self._log(f"📝 생성 완료: {file_path}")
-
-    def generate_music_asset_file(self):
-        file_path = self.output_dir / "music" / f"{self.station_name}_music.asset"
-        content = []
-        for i, song in enumerate(self.songs):
-            if i > 0: content.append('')
-            content.append(f'# {song["display_name"]}')
-            content.extend([
-                'music = {',
-                f'\tname = "{song["name"]}"',
-                f'\tfile = "{self.station_name}/{Path(song["file_path"]).name}"',
-                f'\tvolume = {song.get("volume", 0.8)}',
-                '}'
-            ])
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(content) + '\n')
-        self._log(f"📝 생성 완료: {file_path}")
-
-    def generate_gfx_file(self):
-        file_path = self.output_dir / "interface" / f"{self.station_name}_music.gfx"
-        content = [
+        return f'l_english:\n {self.station_name}_TITLE:0 "{station_title}"\n'
+
+    def _localisation_row(self, song):
+        return f' {song["name"]}:0 "{song["display_name"]}"\n'
+
+    def _soundtrack_header(self):
+        return f'music_station = "{self.station_name}"\n'
+
+    def _soundtrack_row(self, song):
+        return (f'\nmusic = {{\n\tsong = "{song["name"]}"\n'
+                f'\tchance = {{ \tmodifier = {{ factor = {song.get("weight", 1)} }} }}\n}}\n')
+
+    def _asset_row(self, song, first):
+        separator = '' if first else '\n'
+        return (f'{separator}# {song["display_name"]}\nmusic = {{\n\tname = "{song["name"]}"\n'
+                f'\tfile = "{song["file_path"]}"\n\tvolume = {song.get("volume", 0.8)}\n}}\n')
+
+    def _gfx_content(self):
+        return '\n'.join([
             'spriteTypes = {', '',
             '\tspriteType = {',
             f'\t\tname = "GFX_{self.station_name}_album_art"',
@@ -81,18 +69,47 @@ class FileWriter:
             '\t\tnoOfFrames = 2',
             '\t}', '',
             '}'
-        ]
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(content) + '\n')
-        self._log(f"📝 생성 완료: {file_path}")
+        ]) + '\n'
 
-    def generate_gui_file(self):
-        file_path = self.output_dir / "interface" / f"{self.station_name}_music.gui"
+    def _gui_content(self):
         station_title = self.station_name.replace('_', ' ').title() + " Music"
-        full_gui_content = self._get_full_gui_content(station_title)
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(full_gui_content)
-        self._log(f"📝 생성 완료: {file_path}")
+        return self._get_full_gui_content(station_title)
+
+    def write_streaming(self, songs):
+        """
+        곡 목록을 한 번만 돌면서 현지화/사운드트랙/에셋 파일에 행을 바로 써 넣고, 다섯 파일 모두 임시 파일에 쓴 뒤 교체
+        곡 수와 무관하게 메모리 사용량이 일정하며, 쓰는 도중 실패해도 기존 파일은 그대로 남음
+        """
+        paths = self._paths()
+        temp_paths = {kind: path.with_name(f"{path.name}.tmp") for kind, path in paths.items()}
+        for path in paths.values():
+            path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            with open(temp_paths['localisation'], 'w', encoding='utf-8-sig', buffering=WRITE_BUFFER_SIZE) as localisation, \
+                 open(temp_paths['soundtrack'], 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as soundtrack, \
+                 open(temp_paths['asset'], 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as asset:
+                localisation.write(self._localisation_header())
+                soundtrack.write(self._soundtrack_header())
+                first = True
+                for song in songs:
+                    localisation.write(self._localisation_row(song))
+                    soundtrack.write(self._soundtrack_row(song))
+                    asset.write(self._asset_row(song, first))
+                    first = False
+                if first:
+                    asset.write('\n')
+            with open(temp_paths['gfx'], 'w', encoding='utf-8') as f:
+                f.write(self._gfx_content())
+            with open(temp_paths['gui'], 'w', encoding='utf-8') as f:
+                f.write(self._gui_content())
+        except BaseException:
+            for temp_path in temp_paths.values():
+                temp_path.unlink(missing_ok=True)
+            raise
+
+        for kind, path in paths.items():
+            os.replace(temp_paths[kind], path)
+            self._log(f"📝 생성 완료: {path}")
 
     def _get_full_gui_content(self, station_title):
         return f'''guiTypes = {{
@@ -134,3 +151,21 @@ class FileWriter:
 		}}
 	}}
 }}'''
+
+
+class MultiStationFileWriter:
+    """
+    여러 스테이션의 모드 파일(현지화, 사운드트랙, 에셋, gfx, gui)을 생성
+    스테이션마다 곡 목록을 한 번만 순회하며 버퍼링된 파일에 바로 쓰고, max_workers는 ModBuilder가 스테이션별 쓰기를 병렬로 실행할 때 사용
+    """
+    def __init__(self, output_dir, progress_callback=None, max_workers=None):
+        self.output_dir = Path(output_dir)
+        self.progress_callback = progress_callback
+        self.max_workers = max_workers or min(8, os.cpu_count() or 1)
+
+    def _log(self, message):
+        if self.progress_callback:
+            self.progress_callback(message)
+
+    def write_station(self, station_name, songs):
+        FileWriter(self.output_dir, station_name, self.progress_callback).write_streaming(songs)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+import base64
+import threading
+from array import array
+from collections import defaultdict
+import numpy as np
+
+FINGERPRINT_SAMPLE_RATE = 5512
+FINGERPRINT_SECONDS = 60
+FRAME_SIZE = 2048
+HOP_SIZE = 512
+BAND_COUNT = 33
+MIN_FREQUENCY, MAX_FREQUENCY = 300, 2000
+
+# 색인은 4프레임마다 한 번씩만 저장하고 조회는 모든 프레임으로 하므로 자르기 위치와 무관하게 겹치는 프레임이 생김
+INDEX_STRIDE = 4
+MIN_VOTES = 3
+MATCH_BIT_ERROR_RATE = 0.35
+MIN_OVERLAP_FRAMES = 64
+
+
+class DuplicateSongError(Exception):
+    def __init__(self, duplicate_of, bit_error_rate):
+        super().__init__(f"'{duplicate_of}'와(과) 같은 곡입니다. (비트 오류율 {bit_error_rate:.2f})")
+        self.duplicate_of = duplicate_of
+        self.bit_error_rate = bit_error_rate
+        self.original_duration = None
+
+
+def _band_edges():
+    frequencies = np.geomspace(MIN_FREQUENCY, MAX_FREQUENCY, BAND_COUNT + 1)
+    return np.round(frequencies * FRAME_SIZE / FINGERPRINT_SAMPLE_RATE).astype(int)
+
+
+_BAND_EDGES = _band_edges()
+_WINDOW = np.hanning(FRAME_SIZE).astype(np.float32)
+_BIT_WEIGHTS = (1 << np.arange(BAND_COUNT - 1, dtype=np.uint64)).astype(np.uint64)
+
+
+def compute_fingerprint(samples):
+    """
+    5512Hz 모노 샘플에서 32비트 서브 지문 배열(uint32) 계산
+    프레임별 로그 대역 에너지(대역별 중앙값 제거)의 인접 대역 차분 부호를 비트로 사용
+    """
+    samples = np.asarray(samples, dtype=np.float32)[:FINGERPRINT_SECONDS * FINGERPRINT_SAMPLE_RATE]
+    if len(samples) < FRAME_SIZE + HOP_SIZE:
+        return np.zeros(0, dtype=np.uint32)
+
+    frame_count = 1 + (len(samples) - FRAME_SIZE) // HOP_SIZE
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FRAME_SIZE)[::HOP_SIZE][:frame_count]
+    power = np.abs(np.fft.rfft(frames * _WINDOW, axis=1)) ** 2
+    energy = np.log(np.add.reduceat(power, _BAND_EDGES[:-1], axis=1)[:, :BAND_COUNT] + 1e-9)
+    energy -= np.median(energy, axis=0)
+
+    bits = (energy[:, :-1] - energy[:, 1:]) > 0
+    return (bits.astype(np.uint64) @ _BIT_WEIGHTS).astype(np.uint32)
+
+
+def fingerprint_audio_segment(audio):
+    """pydub AudioSegment를 5512Hz 모노로 줄여 지문 계산 (이미 디코딩된 데이터를 재사용)"""
+    head = audio[:FINGERPRINT_SECONDS * 1000].set_channels(1).set_sample_width(2).set_frame_rate(FINGERPRINT_SAMPLE_RATE)
+    return compute_fingerprint(np.frombuffer(head.raw_data, dtype=np.int16))
+
+
+def encode_fingerprint(fingerprint):
+    return base64.b64encode(np.asarray(fingerprint, dtype='<u4').tobytes()).decode('ascii')
+
+
+def decode_fingerprint(text):
+    return np.frombuffer(base64.b64decode(text), dtype='<u4').astype(np.uint32)
+
+
+def _popcount32(values):
+    values = values.astype(np.uint32)
+    return np.unpackbits(values.view(np.uint8)).reshape(len(values), 32).sum(axis=1) if len(values) else values
+
+
+def bit_error_rate(a, b, offset):
+    """b를 offset만큼 밀어 a와 겹치는 구간의 비트 오류율. 겹침이 부족하면 1.0"""
+    start_a, start_b = max(0, offset), max(0, -offset)
+    length = min(len(a) - start_a, len(b) - start_b)
+    if length < MIN_OVERLAP_FRAMES:
+        return 1.0
+    diff = np.bitwise_xor(a[start_a:start_a + length], b[start_b:start_b + length])
+    return float(_popcount32(diff).sum()) / (length * 32)
+
+
+class FingerprintIndex:
+    """
+    16비트 반쪽 서브 지문 값 → (곡 번호, 위치) 역색인 (곡 수만 개에서도 메모리가 작도록 array로 저장)
+    조회 시 일치하는 값들의 위치 차이로 정렬 오프셋을 투표하고, 상위 후보만 비트 오류율로 검증
+    """
+    def __init__(self, threshold=MATCH_BIT_ERROR_RATE, max_candidates=5):
+        self.threshold = threshold
+        self.max_candidates = max_candidates
+        self._keys = []
+        self._key_numbers = {}
+        self._fingerprints = []
+        self._index = defaultdict(lambda: array('Q'))
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._key_numbers
+
+    @staticmethod
+    def _half_keys(fingerprint):
+        return np.concatenate([fingerprint & 0xFFFF, (fingerprint >> 16) | 0x10000]).astype(np.int64)
+
+    def add(self, key, fingerprint):
+        with self._lock:
+            if key in self._key_numbers or len(fingerprint) == 0:
+                return
+            number = len(self._keys)
+            self._keys.append(key)
+            self._key_numbers[key] = number
+            self._fingerprints.append(fingerprint)
+            sampled = fingerprint[::INDEX_STRIDE]
+            positions = np.arange(0, len(fingerprint), INDEX_STRIDE, dtype=np.uint64)
+            entries = (np.uint64(number) << np.uint64(16)) | positions
+            for half_key, entry in zip(self._half_keys(sampled).tolist(), np.concatenate([entries, entries]).tolist()):
+                self._index[half_key].append(entry)
+
+    def discard(self, key):
+        """곡을 색인에서 제외 (색인 항목은 남지만 지문을 비워 더 이상 일치하지 않음)"""
+        with self._lock:
+            number = self._key_numbers.pop(key, None)
+            if number is not None:
+                self._fingerprints[number] = np.zeros(0, dtype=np.uint32)
+
+    def find(self, fingerprint, exclude=None):
+        """가장 비슷한 곡을 찾아 (곡 키, 비트 오류율) 반환. 없으면 None"""
+        if len(fingerprint) == 0:
+            return None
+        with self._lock:
+            query_positions = np.concatenate([np.arange(len(fingerprint))] * 2)
+            entries, positions = [], []
+            for half_key, position in zip(self._half_keys(fingerprint).tolist(), query_positions.tolist()):
+                bucket = self._index.get(half_key)
+                if bucket:
+                    entries.append(np.frombuffer(bucket, dtype=np.uint64))
+                    positions.append(np.full(len(bucket), position, dtype=np.int64))
+            if not entries:
+                return None
+
+            entries = np.concatenate(entries)
+            numbers = (entries >> np.uint64(16)).astype(np.int64)
+            offsets = (entries & np.uint64(0xFFFF)).astype(np.int64) - np.concatenate(positions)
+            votes, counts = np.unique(numbers * 131072 + offsets + 65536, return_counts=True)
+            order = np.argsort(-counts)[:self.max_candidates * 2]
+
+            best = None
+            exclude_number = self._key_numbers.get(exclude)
+            for vote, count in zip(votes[order].tolist(), counts[order].tolist()):
+                number, offset = vote // 131072, vote % 131072 - 65536
+                if count < MIN_VOTES or number == exclude_number:
+                    continue
+                error_rate = min(bit_error_rate(self._fingerprints[number], fingerprint, offset + delta) for delta in (-1, 0, 1))
+                if error_rate < self.threshold and (best is None or error_rate < best[1]):
+                    best = (self._keys[number], error_rate)
+            return best
+
+    def find_or_add(self, key, fingerprint):
+        """중복이 없으면 색인에 추가하고 None, 있으면 (중복 곡 키, 비트 오류율) 반환 (원자적으로 수행)"""
+        with self._lock:
+            match = self.find(fingerprint, exclude=key)
+            if match is None:
+                self.add(key, fingerprint)
+            return match
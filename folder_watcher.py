@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+감시 폴더에 오디오 파일이 추가/변경/삭제되면 해당 곡만 다시 변환하고 그 스테이션의 모드 파일만 갱신
+Linux에서는 inotify, 그 외 환경에서는 주기적인 폴더 스캔으로 변경을 감지
+
+    python folder_watcher.py <감시 폴더> <모드 출력 폴더> --station <스테이션 이름>
+"""
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from library_scanner import LibraryScanner, AUDIO_EXTENSIONS
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyBackend:
+    """inotify로 폴더(하위 폴더 포함)의 변경 경로를 수집. poll()은 변경된 경로 집합을 반환하며, 이벤트 유실 시 None"""
+    def __init__(self, folder):
+        libc_name = ctypes.util.find_library('c')
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 실패")
+        self._watches = {}
+        self._add_tree(Path(folder))
+
+    def _add_watch(self, directory):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(directory)), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch 실패: {directory}")
+        self._watches[wd] = directory
+
+    def _add_tree(self, directory):
+        """디렉토리와 하위 디렉토리에 감시를 걸고, 그 안에 이미 있는 오디오 파일 목록을 반환"""
+        self._add_watch(directory)
+        found = set()
+        for root, dirs, files in os.walk(directory):
+            for name in dirs:
+                self._add_watch(Path(root) / name)
+            found.update(Path(root) / name for name in files if Path(name).suffix.lower() in AUDIO_EXTENSIONS)
+        return found
+
+    def poll(self, timeout):
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed, offset = set(), 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_length = _EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + name_length].rstrip(b'\0')
+            offset += _EVENT_HEADER.size + name_length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            directory = self._watches.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / os.fsdecode(name)
+            if mask & IN_ISDIR:
+                # 새로 생기거나 옮겨진 폴더는 감시를 추가하고 안의 파일을 모두 변경으로 처리
+                if mask & (IN_CREATE | IN_MOVED_TO) and path.is_dir():
+                    changed.update(self._add_tree(path))
+                elif mask & (IN_DELETE | IN_MOVED_FROM):
+                    return None
+            elif path.suffix.lower() in AUDIO_EXTENSIONS and mask & (IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE):
+                changed.add(path)
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingBackend:
+    """일정 간격으로 폴더를 스캔하여 크기/수정 시각이 바뀐 파일과 사라진 파일을 찾음"""
+    def __init__(self, folder, interval=2.0):
+        self.folder = Path(folder)
+        self.interval = interval
+        self._snapshot = self._scan()
+        self._next_scan = time.monotonic() + interval
+
+    def _scan(self):
+        snapshot = {}
+        for path in LibraryScanner.iter_audio_files(self.folder):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def poll(self, timeout):
+        wait = self._next_scan - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return set()
+        time.sleep(max(0, wait))
+        self._next_scan = time.monotonic() + self.interval
+        snapshot = self._scan()
+        changed = {path for path, state in snapshot.items() if self._snapshot.get(path) != state}
+        changed.update(path for path in self._snapshot if path not in snapshot)
+        self._snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+def create_backend(folder, poll_interval=2.0):
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyBackend(folder)
+        except (OSError, AttributeError):
+            pass
+    return PollingBackend(folder, poll_interval)
+
+
+class FolderWatcher:
+    """
+    감시 폴더의 변경을 모아 debounce초 동안 새 이벤트가 없으면 한 번에 ModBuilder.update_station으로 반영
+    파일 복사처럼 이벤트가 몰리는 경우에도 곡마다 다시 빌드하지 않음
+    load_stations를 주면 반영할 때마다 그 결과(스테이션 사본)를 builder.stations로 사용하여 다른 스레드와 딕셔너리를 공유하지 않음
+    on_update(스테이션 이름, 갱신된 스테이션, 변환한 경로, 삭제된 경로)로 결과를 넘김 (GUI는 Tk 스레드에서 반영)
+    """
+    def __init__(self, folder, station_name, builder, progress_callback=None, debounce=2.0, poll_interval=2.0,
+                 on_update=None, load_stations=None):
+        self.folder = Path(folder)
+        self.station_name = station_name
+        self.builder = builder
+        self.progress_callback = progress_callback
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.on_update = on_update
+        self.load_stations = load_stations
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _log(self, message):
+        if self.progress_callback:
+            self.progress_callback(message)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _apply(self, changes=None):
+        """바뀐 (변환할 경로, 삭제된 경로)를 반영. changes가 None이면 폴더 전체를 스테이션 곡 목록과 비교"""
+        try:
+            if self.load_stations:
+                self.builder.stations = self.load_stations()
+            changed_paths, deleted_paths = changes if changes is not None else \
+                self.builder.scan_folder_changes(self.station_name, self.folder)
+            if not changed_paths and not deleted_paths:
+                return
+            self.builder.update_station(self.station_name, changed_paths, deleted_paths)
+        except Exception as e:
+            self._log(f"❌ 감시 폴더 변경 반영 실패: {e}")
+            return
+        if self.on_update:
+            self.on_update(self.station_name, self.builder.stations.get(self.station_name), changed_paths, deleted_paths)
+
+    def _classify(self, paths):
+        changed = sorted(p for p in paths if p.is_file())
+        deleted = sorted(p for p in paths if not p.exists())
+        return changed, deleted
+
+    def run(self):
+        backend = create_backend(self.folder, self.poll_interval)
+        backend_name = "inotify" if isinstance(backend, InotifyBackend) else f"{self.poll_interval}초 간격 스캔"
+        self._log(f"👀 폴더 감시 시작 ({backend_name}): {self.folder} → 스테이션 '{self.station_name}'")
+        try:
+            # 감시를 건 뒤에 초기 동기화를 해야 그 사이에 추가된 파일을 놓치지 않음
+            self._apply()
+
+            pending, last_event = set(), 0.0
+            while not self._stop_event.is_set():
+                changes = backend.poll(0.5)
+                if changes is None:
+                    self._log("⚠️ 변경 이벤트가 너무 많아 폴더 전체를 다시 비교합니다.")
+                    pending.clear()
+                    self._apply()
+                    continue
+                if changes:
+                    pending.update(changes)
+                    last_event = time.monotonic()
+                if pending and time.monotonic() - last_event >= self.debounce:
+                    batch, pending = pending, set()
+                    self._apply(self._classify(batch))
+        finally:
+            backend.close()
+            self._log(f"🛑 폴더 감시 종료: {self.folder}")
+
+
+def main():
+    from mod_builder import ModBuilder
+    from mod_generator import HOI4MusicModGenerator
+
+    parser = argparse.ArgumentParser(description="감시 폴더의 변경을 모드에 계속 반영")
+    parser.add_argument('folder', help="감시할 음악 폴더")
+    parser.add_argument('output_dir', help="모드 출력 폴더 (mod_data.json이 있으면 불러옴)")
+    parser.add_argument('--station', default="my_station", help="곡을 넣을 스테이션 이름")
+    parser.add_argument('--debounce', type=float, default=2.0, help="마지막 변경 후 반영까지 기다릴 시간(초)")
+    parser.add_argument('--poll-interval', type=float, default=2.0, help="inotify를 쓸 수 없을 때 폴더 스캔 간격(초)")
+    args = parser.parse_args()
+
+    stations = {}
+    mod_data_path = Path(args.output_dir) / "mod_data.json"
+    if mod_data_path.exists():
+        with open(mod_data_path, 'r', encoding='utf-8') as f:
+            stations = json.load(f).get('stations', {})
+
+    builder = ModBuilder(args.output_dir, stations, progress_callback=print)
+    station_name = HOI4MusicModGenerator.sanitize_station_name(args.station)
+    watcher = FolderWatcher(args.folder, station_name, builder, progress_callback=print,
+                            debounce=args.debounce, poll_interval=args.poll_interval)
+    watcher.start()
+    try:
+        while watcher.running:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        watcher.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,20 +3,36 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext, simpledialog
 import threading
 import queue
+import copy
 from pathlib import Path
 import json
-import re
-import shutil
 from typing import Dict
-from pytubefix import Playlist, YouTube
 
 from mod_generator import HOI4MusicModGenerator
+from mod_builder import ModBuilder
+from job_queue import JobQueue
+from resource_scheduler import DEFAULT_MEMORY_BUDGET_MB, PauseController
+from media_sources import create_media_source
+from encoding_profiles import ENCODING_PROFILES, DEFAULT_PROFILE
+from project_loader import ProjectLoader, classify_source, normalize_url
+from build_planner import BuildPlanner, format_plan
+from station_analyzer import StationAnalyzer
+from playlist_sync import PlaylistSync, link_playlist, REMOVED_FLAG
+from build_daemon import DaemonClient, DONE as DAEMON_JOB_DONE
+from library_scanner import LibraryScanner
+from folder_watcher import FolderWatcher
+from waveform import WaveformCache, resample_peaks, play_audio_file
+from media_processor import unique_song_names
+
+SONG_TREE_CHUNK = 500
+# 사용자가 입력하는 곡 정보 (빌드 결과를 반영할 때 덮어쓰지 않음)
+SONG_INPUT_FIELDS = ('url', 'korean_name', 'english_name', 'trim_start', 'volume', 'weight', 'source', 'artist')
 
 class HOI4MusicGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("HOI4 음악 모드 생성기")
-        self.root.geometry("850x800")
+        self.root.geometry("850x900")
         
         self.stations: Dict[str, Dict] = {}
         self.current_station_name = tk.StringVar(value="my_station")
@@ -24,7 +40,23 @@ class HOI4MusicGUI:
         self.album_art_path = tk.StringVar()
         self.message_queue = queue.Queue()
         self.zip_mod = tk.BooleanVar(value=False)
+        self.merge_duplicates = tk.BooleanVar(value=False)
+        self.background_mode = tk.BooleanVar(value=False)
+        self.pause_controller = PauseController()
+        self.daemon_job = None  # 빌드 데몬에 보낸 작업 (클라이언트, 작업 ID)
+        self.max_downloads = tk.StringVar(value="4")
+        self.bandwidth_limit_kb = tk.StringVar(value="0")
+        self.memory_budget_mb = tk.StringVar(value=str(DEFAULT_MEMORY_BUDGET_MB))
+        self.target_size_mb = tk.StringVar(value="0")
+        self.shard_max_songs = tk.StringVar(value="0")
+        self.encoding_profile = tk.StringVar(value=DEFAULT_PROFILE)
         self.editing_song_id = None
+        self.current_waveform = None
+        self._waveform_cache = None
+        self.folder_watcher = None
+        self._song_tree_generation = 0
+        self._song_tree_rows = 0
+        self._song_tree_filling = False
         
         self.create_widgets()
         self.check_queue()
@@ -42,6 +74,19 @@ class HOI4MusicGUI:
         ttk.Entry(settings_frame, textvariable=self.output_dir, width=50).grid(row=0, column=1, padx=(10, 0), pady=(5, 0), sticky=tk.W)
         ttk.Button(settings_frame, text="기존 모드 불러오기", command=self.load_existing_mod).grid(row=0, column=2, padx=(5, 0))
 
+        download_settings_frame = ttk.Frame(settings_frame)
+        download_settings_frame.grid(row=1, column=0, columnspan=3, sticky=tk.W, pady=(5, 0))
+        ttk.Label(download_settings_frame, text="최대 동시 다운로드:").grid(row=0, column=0, sticky=tk.W)
+        ttk.Entry(download_settings_frame, textvariable=self.max_downloads, width=5).grid(row=0, column=1, padx=(10, 0))
+        ttk.Label(download_settings_frame, text="대역폭 제한(KB/s, 0=무제한):").grid(row=0, column=2, sticky=tk.W, padx=(20, 0))
+        ttk.Entry(download_settings_frame, textvariable=self.bandwidth_limit_kb, width=8).grid(row=0, column=3, padx=(10, 0))
+        ttk.Label(download_settings_frame, text="메모리 예산(MB):").grid(row=0, column=4, sticky=tk.W, padx=(20, 0))
+        ttk.Entry(download_settings_frame, textvariable=self.memory_budget_mb, width=8).grid(row=0, column=5, padx=(10, 0))
+        ttk.Label(download_settings_frame, text="목표 용량(MB, 0=사용 안 함):").grid(row=1, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
+        ttk.Entry(download_settings_frame, textvariable=self.target_size_mb, width=8).grid(row=1, column=2, sticky=tk.W, padx=(20, 0), pady=(5, 0))
+        ttk.Label(download_settings_frame, text="스테이션당 최대 곡 수(0=분할 안 함):").grid(row=1, column=3, columnspan=2, sticky=tk.W, padx=(20, 0), pady=(5, 0))
+        ttk.Entry(download_settings_frame, textvariable=self.shard_max_songs, width=8).grid(row=1, column=5, padx=(10, 0), pady=(5, 0))
+
         station_frame = ttk.LabelFrame(main_frame, text="스테이션 관리", padding="10")
         station_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
 
@@ -52,6 +97,11 @@ class HOI4MusicGUI:
 
         ttk.Button(station_frame, text="새 스테이션 추가", command=self.add_new_station).grid(row=0, column=2, padx=(5, 0))
         ttk.Button(station_frame, text="현재 스테이션 삭제", command=self.delete_current_station).grid(row=0, column=3, padx=(5, 0))
+        ttk.Button(station_frame, text="재생목록 동기화", command=self.sync_playlist).grid(row=1, column=2, padx=(5, 0), pady=(5, 0))
+        ttk.Label(station_frame, text="인코딩 프로필:").grid(row=1, column=0, sticky=tk.W, pady=(5, 0))
+        self.encoding_combo = ttk.Combobox(station_frame, textvariable=self.encoding_profile, values=list(ENCODING_PROFILES), state='readonly', width=12)
+        self.encoding_combo.grid(row=1, column=1, padx=(10, 0), pady=(5, 0), sticky=tk.W)
+        self.encoding_combo.bind("<<ComboboxSelected>>", self.on_encoding_profile_change)
         station_frame.columnconfigure(1, weight=1)
 
         album_frame = ttk.LabelFrame(main_frame, text="앨범 아트 (현재 스테이션)", padding="10")
@@ -74,6 +124,12 @@ class HOI4MusicGUI:
         self.generate_btn = ttk.Button(generate_frame, text="모드 생성 시작", command=self.generate_mod)
         self.generate_btn.grid(row=0, column=0, padx=(0, 10))
         ttk.Checkbutton(generate_frame, text="모드 생성 후 압축하기", variable=self.zip_mod).grid(row=0, column=1, padx=(0, 10))
+        ttk.Checkbutton(generate_frame, text="중복 곡은 변환하지 않고 병합", variable=self.merge_duplicates).grid(row=1, column=1, padx=(0, 10), sticky=tk.W)
+        ttk.Button(generate_frame, text="실패 작업 재시도", command=self.retry_failed_jobs).grid(row=0, column=3, padx=(10, 0))
+        ttk.Button(generate_frame, text="스테이션 분석", command=self.analyze_stations).grid(row=1, column=3, padx=(10, 0), pady=(5, 0))
+        self.pause_btn = ttk.Button(generate_frame, text="일시 정지", command=self.toggle_pause, state='disabled')
+        self.pause_btn.grid(row=1, column=0, padx=(0, 10), pady=(5, 0))
+        ttk.Checkbutton(generate_frame, text="백그라운드 모드 (게임 실행 중 빌드)", variable=self.background_mode).grid(row=2, column=1, padx=(0, 10), sticky=tk.W)
         self.progress_bar = ttk.Progressbar(generate_frame, mode='indeterminate')
         
         log_frame = ttk.LabelFrame(main_frame, text="로그", padding="10")
@@ -114,6 +170,20 @@ class HOI4MusicGUI:
         ttk.Button(file_io_frame, text="목록 불러오기", command=self.load_song_list).grid(row=0, column=0)
         ttk.Button(file_io_frame, text="목록 내보내기", command=self.export_song_list).grid(row=0, column=1, padx=(10,0))
         ttk.Button(file_io_frame, text="선택 해제", command=self.clear_selection).grid(row=0, column=2, padx=(10,0))
+        ttk.Button(file_io_frame, text="폴더 가져오기", command=self.import_folder).grid(row=0, column=3, padx=(10,0))
+        self.watch_btn = ttk.Button(file_io_frame, text="폴더 감시 시작", command=self.toggle_folder_watch)
+        self.watch_btn.grid(row=0, column=4, padx=(10,0))
+
+        self.waveform_canvas = tk.Canvas(add_song_frame, height=70, background='#1e1e1e', highlightthickness=0)
+        self.waveform_canvas.grid(row=6, column=0, columnspan=4, pady=(10, 0), sticky=(tk.W, tk.E))
+        self.waveform_canvas.bind("<Button-1>", self.on_waveform_click)
+        self.waveform_canvas.bind("<Configure>", lambda event: self.draw_waveform())
+        self.trim_start_entry.bind("<KeyRelease>", lambda event: self.draw_waveform())
+        waveform_buttons_frame = ttk.Frame(add_song_frame)
+        waveform_buttons_frame.grid(row=7, column=0, columnspan=4, pady=(5, 0), sticky=tk.W)
+        ttk.Button(waveform_buttons_frame, text="파형 보기", command=self.show_waveform).grid(row=0, column=0)
+        ttk.Button(waveform_buttons_frame, text="▶ 미리 듣기", command=self.preview_song).grid(row=0, column=1, padx=(10,0))
+        ttk.Label(waveform_buttons_frame, text="파형을 클릭하면 그 위치가 시작 자르기 값이 됩니다.").grid(row=0, column=2, padx=(10,0))
         
         columns = ('korean', 'english', 'url', 'trim', 'volume', 'weight')
         self.song_tree = ttk.Treeview(song_list_frame, columns=columns, show='headings', height=6)
@@ -179,6 +249,7 @@ class HOI4MusicGUI:
         self.weight_entry.delete(0, tk.END); self.weight_entry.insert(0, str(song_data.get('weight', 1)))
 
         self.add_update_btn.config(text="곡 정보 업데이트")
+        self.show_cached_waveform(song_data.get('url', ''))
 
     def clear_selection(self):
         if self.song_tree.selection():
@@ -191,6 +262,96 @@ class HOI4MusicGUI:
         self.volume_entry.delete(0, tk.END); self.volume_entry.insert(0, "0.8")
         self.weight_entry.delete(0, tk.END); self.weight_entry.insert(0, "1")
         self.add_update_btn.config(text="곡 추가")
+        self.current_waveform = None
+        self.draw_waveform()
+
+    def get_waveform_cache(self):
+        """현재 출력 폴더 기준 파형 캐시 (출력 폴더 값을 읽으므로 Tk 스레드에서만 호출)"""
+        cache = WaveformCache(self.output_dir.get().strip() or Path.cwd(), progress_callback=self.thread_log)
+        if self._waveform_cache is None or self._waveform_cache.cache_dir != cache.cache_dir:
+            self._waveform_cache = cache
+        return self._waveform_cache
+
+    def show_cached_waveform(self, song_source):
+        """캐시된 파형이 있으면 표시 (캐시 파일 확인/읽기는 작업 스레드에서 하고, 없으면 디코딩하지 않고 비워 둠)"""
+        self.current_waveform = None
+        self.draw_waveform()
+        if song_source:
+            thread = threading.Thread(target=self.load_cached_waveform_thread, args=(self.get_waveform_cache(), song_source))
+            thread.daemon = True
+            thread.start()
+
+    def load_cached_waveform_thread(self, cache, song_source):
+        try:
+            waveform = cache.get_cached(song_source)
+            if waveform:
+                self.message_queue.put(("waveform", (song_source, waveform)))
+        except (OSError, ValueError) as e:
+            self.thread_log(f"⚠️ 파형 캐시를 읽을 수 없습니다: {e}")
+
+    def show_waveform(self):
+        song_source = self.url_entry.get().strip()
+        if not song_source:
+            messagebox.showwarning("입력 오류", "파형을 볼 URL 또는 파일 경로를 입력해주세요.")
+            return
+        thread = threading.Thread(target=self.load_waveform_thread, args=(self.get_waveform_cache(), song_source))
+        thread.daemon = True
+        thread.start()
+
+    def load_waveform_thread(self, cache, song_source, play_from=None):
+        try:
+            waveform = cache.load(song_source)
+            self.message_queue.put(("waveform", (song_source, waveform)))
+            if play_from is not None:
+                play_audio_file(cache.make_clip(song_source, play_from))
+        except Exception as e:
+            self.thread_log(f"❌ 파형/미리 듣기 처리 중 오류 발생: {e}")
+
+    def preview_song(self):
+        song_source = self.url_entry.get().strip()
+        if not song_source:
+            messagebox.showwarning("입력 오류", "미리 들을 URL 또는 파일 경로를 입력해주세요.")
+            return
+        try:
+            trim_start = float(self.trim_start_entry.get() or 0)
+        except ValueError:
+            trim_start = 0
+        thread = threading.Thread(target=self.load_waveform_thread, args=(self.get_waveform_cache(), song_source, trim_start))
+        thread.daemon = True
+        thread.start()
+
+    def draw_waveform(self):
+        canvas = self.waveform_canvas
+        canvas.delete("all")
+        width, height = canvas.winfo_width(), canvas.winfo_height()
+        if not self.current_waveform:
+            canvas.create_text(width // 2, height // 2, text="'파형 보기'를 누르면 곡을 분석하여 표시합니다.", fill='#888888')
+            return
+
+        waveform = self.current_waveform[1]
+        mins, maxs = resample_peaks(waveform['mins'], waveform['maxs'], width)
+        middle = height / 2
+        for x, (low, high) in enumerate(zip(mins.tolist(), maxs.tolist())):
+            canvas.create_line(x, middle - high * middle, x, middle - low * middle + 1, fill='#4fa3e0')
+
+        try:
+            trim_start = float(self.trim_start_entry.get() or 0)
+        except ValueError:
+            return
+        if waveform['duration'] > 0:
+            trim_x = min(width, trim_start / waveform['duration'] * width)
+            canvas.create_rectangle(0, 0, trim_x, height, fill='#000000', stipple='gray50', outline='')
+            canvas.create_line(trim_x, 0, trim_x, height, fill='#e05050', width=2)
+        total = int(waveform['duration'])
+        canvas.create_text(width - 5, 5, anchor=tk.NE, text=f"{total // 60}:{total % 60:02d}", fill='#cccccc')
+
+    def on_waveform_click(self, event):
+        if not self.current_waveform:
+            return
+        duration = self.current_waveform[1]['duration']
+        trim_start = int(max(0, min(duration, event.x / max(1, self.waveform_canvas.winfo_width()) * duration)))
+        self.trim_start_entry.delete(0, tk.END); self.trim_start_entry.insert(0, str(trim_start))
+        self.draw_waveform()
 
     def delete_current_station(self):
         current_name = self.current_station_name.get()
@@ -214,53 +375,78 @@ class HOI4MusicGUI:
         if current_name in self.stations:
             album_art = self.stations[current_name].get("album_art", "")
             self.album_art_path.set(album_art)
+            encoding = self.stations[current_name].get("encoding") or {}
+            self.encoding_profile.set(encoding.get("profile", DEFAULT_PROFILE))
 
         self.update_song_tree()
         self.log(f"현재 스테이션이 '{current_name}'(으)로 변경되었습니다.")
     
+    def on_encoding_profile_change(self, event=None):
+        current_name = self.current_station_name.get()
+        if current_name not in self.stations:
+            return
+        profile = self.encoding_profile.get()
+        self.stations[current_name]["encoding"] = {"profile": profile}
+        settings = ENCODING_PROFILES[profile]
+        channels = "모노" if settings['channels'] == 1 else "원본 채널"
+        sample_rate = f"{settings['sample_rate']}Hz" if settings['sample_rate'] else "원본 샘플레이트"
+        self.log(f"스테이션 '{current_name}' 인코딩 프로필: {profile} (품질 {settings['quality']}, {channels}, {sample_rate})")
+
     def load_existing_mod(self):
         mod_path_str = filedialog.askdirectory(title="기존 HOI4 모드 폴더를 선택하세요")
         if not mod_path_str:
             return
-        
-        mod_path = Path(mod_path_str)
-        song_data_path = mod_path / "mod_data.json"
-        
-        if not song_data_path.exists():
-            messagebox.showwarning("불러오기 실패", f"선택한 폴더에 'mod_data.json' 파일이 없습니다.\n이 프로그램으로 생성한 모드가 맞는지 확인해주세요.")
-            return
 
-        try:
-            with open(song_data_path, 'r', encoding='utf-8') as f:
-                mod_data = json.load(f)
-
-            loaded_stations = mod_data.get('stations', {})
-            
-            for station_name, station_data in loaded_stations.items():
-                if not isinstance(station_data.get("songs"), list):
-                    self.log(f"⚠️ 스테이션 '{station_name}'의 곡 목록 형식이 잘못되어 리스트로 변환합니다.")
-                    station_data["songs"] = []
-
-            self.stations = loaded_stations
-            if not self.stations:
-                 raise Exception("모드 데이터에 스테이션 정보가 없습니다.")
-
-            first_station = list(self.stations.keys())[0]
-            self.current_station_name.set(first_station)
-            
-            self.output_dir.set(str(mod_path.resolve()))
-            
-            self.on_station_change() 
-            self.update_station_list()
+        self.log(f"📂 기존 모드 정보를 불러오는 중: {mod_path_str}")
+        thread = threading.Thread(target=self.load_existing_mod_thread, args=(Path(mod_path_str),))
+        thread.daemon = True
+        thread.start()
 
-            self.log(f"✅ 기존 모드 정보를 성공적으로 불러왔습니다.")
-            self.log(f"   - 총 {len(self.stations)}개의 스테이션.")
-            
-            messagebox.showinfo("성공", "기존 모드 정보를 성공적으로 불러왔습니다.\n이제 곡을 추가하거나 삭제한 후 '모드 생성 시작'을 눌러주세요.")
+    def load_existing_mod_thread(self, mod_path):
+        loader = ProjectLoader(progress_callback=self.thread_log)
+        try:
+            stations = loader.load_mod_data(mod_path)
+        except FileNotFoundError as e:
+            self.message_queue.put(("warning", str(e)))
+            return
+        except Exception as e:
+            self.thread_log(f"❌ 모드 불러오기 실패: {e}")
+            self.message_queue.put(("error", f"모드 정보를 불러오는 중 오류가 발생했습니다: {e}"))
+            return
+        self.message_queue.put(("project_loaded", (mod_path, stations)))
 
+        try:
+            summary = loader.check_references(stations, mod_path)
         except Exception as e:
-            messagebox.showerror("오류", f"모드 정보를 불러오는 중 오류가 발생했습니다: {e}")
-            self.log(f"❌ 모드 불러오기 실패: {e}")
+            self.thread_log(f"⚠️ 참조 파일 확인 중 오류 발생: {e}")
+            summary = None
+
+        info_message = "기존 모드 정보를 성공적으로 불러왔습니다.\n이제 곡을 추가하거나 삭제한 후 '모드 생성 시작'을 눌러주세요."
+        if summary:
+            if summary['broken_oggs']:
+                info_message += f"\n\n⚠️ 손상된 OGG 파일 {len(summary['broken_oggs'])}개가 발견되었습니다. 모드 생성 시 다시 변환됩니다."
+            info_message += self.format_missing_summary(summary)
+        self.message_queue.put(("success", info_message))
+
+    def format_missing_summary(self, summary):
+        message = ""
+        if summary['missing_sources']:
+            message += f"\n\n⚠️ 찾을 수 없는 로컬 원본 파일 {len(summary['missing_sources'])}개 (로그 참고)"
+        if summary['missing_art']:
+            message += f"\n⚠️ 찾을 수 없는 앨범 아트 {len(summary['missing_art'])}개 (로그 참고)"
+        return message
+
+    def apply_loaded_project(self, mod_path, stations):
+        self.stations = stations
+        first_station = list(self.stations.keys())[0]
+        self.current_station_name.set(first_station)
+        self.output_dir.set(str(mod_path.resolve()))
+
+        self.on_station_change()
+        self.update_station_list()
+
+        self.log(f"✅ 기존 모드 정보를 성공적으로 불러왔습니다.")
+        self.log(f"   - 총 {len(self.stations)}개의 스테이션.")
 
     def browse_album_art(self):
         current_station = self.current_station_name.get()
@@ -283,19 +469,20 @@ class HOI4MusicGUI:
             messagebox.showwarning("경고", "스테이션을 먼저 추가하거나 선택해주세요.")
             return
 
-        url_or_path = self.url_entry.get().strip()
+        url_or_path = normalize_url(self.url_entry.get())
         if not url_or_path:
             messagebox.showwarning("입력 오류", "YouTube URL 또는 로컬 파일 경로를 입력해야 합니다.")
             return
 
-        if not self.editing_song_id and "list=" in url_or_path and not Path(url_or_path).is_file():
-            if messagebox.askyesno("재생목록 확인", "YouTube 재생목록이 감지되었습니다. 목록의 모든 곡을 추가하시겠습니까?"):
-                thread = threading.Thread(target=self.add_playlist_songs_thread, args=(url_or_path, current_station))
-                thread.daemon = True
-                thread.start()
+        source = classify_source(url_or_path)
+        if not self.editing_song_id and "list=" in url_or_path and source != 'local':
+            if messagebox.askyesno("재생목록 확인", "YouTube 재생목록이 감지되었습니다. 목록의 모든 곡을 추가하시겠습니까?\n"
+                                   "(현재 스테이션이 재생목록과 연결되어, 이후 '재생목록 동기화'로 바뀐 곡만 반영합니다.)"):
+                link_playlist(self.stations[current_station], url_or_path)
+                self.start_playlist_sync(current_station)
             return
 
-        is_local_file = Path(url_or_path).is_file()
+        is_local_file = source == 'local'
 
         korean_name = self.korean_name_entry.get().strip()
         english_name = self.english_name_entry.get().strip()
@@ -326,7 +513,7 @@ class HOI4MusicGUI:
             'trim_start': trim_start,
             'volume': volume,
             'weight': weight,
-            'source': 'local' if is_local_file else 'youtube'
+            'source': source
         }
 
         songs_list = self.stations[current_station]["songs"]
@@ -341,27 +528,83 @@ class HOI4MusicGUI:
             except (ValueError, IndexError):
                  self.log(f"❌ 곡 업데이트 중 오류 발생. 목록을 다시 확인해주세요.")
         else:
+            if unique_song_names([song_info], songs_list):
+                self.log(f"  - 같은 파일 이름의 곡이 있어 영어명을 '{song_info['english_name']}'(으)로 바꿨습니다.")
             songs_list.append(song_info)
             self.log(f"곡이 현재 스테이션에 추가되었습니다: {url_or_path}")
 
         self.update_song_tree()
         self.clear_selection()
+        if is_local_file:
+            thread = threading.Thread(target=self.check_local_file_thread, args=(url_or_path,))
+            thread.daemon = True
+            thread.start()
+
+    def check_local_file_thread(self, file_path):
+        summary = ProjectLoader().check_references({'_': {'songs': [{'url': file_path, 'source': 'local'}]}})
+        if summary['missing_sources']:
+            self.thread_log(f"⚠️ 로컬 파일을 찾을 수 없습니다: {file_path}")
 
-    def update_song_tree(self):
-        for i in self.song_tree.get_children(): self.song_tree.delete(i)
+    def import_folder(self):
         current_station = self.current_station_name.get()
-        
-        songs = self.stations.get(current_station, {}).get("songs", [])
-        
-        for song in songs:
+        if not current_station:
+            messagebox.showwarning("경고", "스테이션을 먼저 추가하거나 선택해주세요.")
+            return
+
+        folder_path = filedialog.askdirectory(title="가져올 음악 폴더를 선택하세요")
+        if not folder_path:
+            return
+
+        thread = threading.Thread(target=self.import_folder_thread, args=(folder_path, current_station))
+        thread.daemon = True
+        thread.start()
+
+    def import_folder_thread(self, folder_path, station_name):
+        try:
+            scanner = LibraryScanner(progress_callback=self.thread_log)
+            scanner.scan_folder(folder_path, lambda songs: self.message_queue.put(("add_multiple_songs", (station_name, songs))))
+        except Exception as e:
+            self.thread_log(f"❌ 폴더 가져오기 중 오류 발생: {e}")
+
+    def update_song_tree(self, chunked=True):
+        self.song_tree.delete(*self.song_tree.get_children())
+        # 곡이 많으면 나눠서 채워 창이 멈추지 않도록 함. 다시 호출되면 이전 채우기는 중단
+        self._song_tree_generation += 1
+        self._song_tree_rows = 0
+        self._song_tree_filling = False
+        if chunked:
+            self.fill_song_tree()
+        else:
+            self.insert_song_rows(self._song_tree_generation, limit=None)
+
+    def fill_song_tree(self):
+        """트리에 아직 없는 곡 행을 추가. 채우는 중이면 진행 중인 채우기가 새 곡까지 이어서 추가"""
+        if self._song_tree_filling:
+            return
+        self._song_tree_filling = True
+        self.insert_song_rows(self._song_tree_generation)
+
+    def insert_song_rows(self, generation, limit=SONG_TREE_CHUNK):
+        if generation != self._song_tree_generation:
+            return
+        songs = self.stations.get(self.current_station_name.get(), {}).get("songs", [])
+        end = len(songs) if limit is None else self._song_tree_rows + limit
+        for song in songs[self._song_tree_rows:end]:
+            # 재생목록에서 빠진 곡은 이름 앞에 표시
+            removed_mark = "⚠️ " if song.get(REMOVED_FLAG) else ""
             self.song_tree.insert('', 'end', values=(
-                song.get('korean_name', ''),
+                removed_mark + song.get('korean_name', ''),
                 song.get('english_name', ''),
                 song.get('url', ''),
                 song.get('trim_start', 0),
                 song.get('volume', 0.8),
                 song.get('weight', 1)
             ))
+        self._song_tree_rows = min(end, len(songs))
+        if self._song_tree_rows < len(songs):
+            self.root.after(1, self.insert_song_rows, generation)
+        else:
+            self._song_tree_filling = False
     
     def remove_song(self):
         selected_items = self.song_tree.selection()
@@ -394,7 +637,7 @@ class HOI4MusicGUI:
             else:
                 new_selection_indices.append(index)
 
-        self.update_song_tree()
+        self.update_song_tree(chunked=False)
 
         for i in new_selection_indices:
             self.song_tree.selection_add(self.song_tree.get_children()[i])
@@ -416,7 +659,7 @@ class HOI4MusicGUI:
             else:
                 new_selection_indices.append(index)
 
-        self.update_song_tree()
+        self.update_song_tree(chunked=False)
         
         for i in new_selection_indices:
             self.song_tree.selection_add(self.song_tree.get_children()[i])
@@ -437,52 +680,36 @@ class HOI4MusicGUI:
     def load_song_list(self):
         file_path = filedialog.askopenfilename(filetypes=[("JSON/TXT", "*.json *.txt")])
         if not file_path: return
+
+        current_station = self.current_station_name.get()
+        if not self.stations.get(current_station): self.stations[current_station] = {"songs": [], "album_art": ""}
+        current_songs = self.stations[current_station]["songs"]
+        append = bool(current_songs) and messagebox.askyesno("불러오기", "현재 목록에 추가하시겠습니까?")
+
+        thread = threading.Thread(target=self.load_song_list_thread, args=(file_path, current_station, append))
+        thread.daemon = True
+        thread.start()
+
+    def load_song_list_thread(self, file_path, station_name, append):
+        loader = ProjectLoader(progress_callback=self.thread_log)
         try:
-            if file_path.endswith('.json'):
-                with open(file_path, 'r', encoding='utf-8') as f: loaded_songs = json.load(f)
-            else:
-                with open(file_path, 'r', encoding='utf-8') as f: loaded_songs = self.parse_txt_song_list(f.readlines())
-            
-            current_station = self.current_station_name.get()
-            if not self.stations.get(current_station): self.stations[current_station] = {"songs": [], "album_art": ""}
-            
-            current_songs = self.stations[current_station]["songs"]
-            if current_songs and messagebox.askyesno("불러오기", "현재 목록에 추가하시겠습니까?"):
-                self.stations[current_station]["songs"].extend(loaded_songs)
-            else:
-                self.stations[current_station]["songs"] = loaded_songs
-            
-            self.update_song_tree()
-            self.log(f"파일에서 {len(loaded_songs)}개 곡을 불러왔습니다.")
+            loaded_songs = loader.load_song_list(file_path)
         except Exception as e:
-            messagebox.showerror("오류", f"파일 읽기 실패: {e}")
-
-    def parse_txt_song_list(self, lines):
-        parsed_songs = []
-        for line in lines:
-            line = line.strip()
-            if not line or line.startswith('#'): continue
-            parts = [p.strip() for p in line.split('|')]
-            song = {'trim_start': 0, 'volume': 0.8, 'weight': 1}
-            if len(parts) >= 1: song['url'] = parts[-1]
-            if len(parts) >= 2:
-                if re.search(r'[가-힣]', parts[0]): song['korean_name'] = parts[0]
-                else: song['english_name'] = parts[0]
-            if len(parts) >= 3:
-                song['korean_name'] = parts[0]; song['english_name'] = parts[1]
-            if len(parts) >= 4:
-                try: song['trim_start'] = int(parts[3])
-                except: pass
-            if len(parts) >= 5:
-                try: song['volume'] = float(parts[4])
-                except: pass
-            if len(parts) >= 6:
-                try: song['weight'] = int(parts[5])
-                except: pass
-            if 'url' in song: parsed_songs.append(song)
-        return parsed_songs
-
-    def generate_mod(self):
+            self.message_queue.put(("error", f"파일 읽기 실패: {e}"))
+            return
+
+        if not append:
+            self.message_queue.put(("replace_songs", (station_name, [])))
+        for start in range(0, len(loaded_songs), SONG_TREE_CHUNK):
+            self.message_queue.put(("add_multiple_songs", (station_name, loaded_songs[start:start + SONG_TREE_CHUNK])))
+        self.thread_log(f"파일에서 {len(loaded_songs)}개 곡을 불러왔습니다.")
+
+        summary = loader.check_references({station_name: {'songs': loaded_songs}})
+        missing_message = self.format_missing_summary(summary)
+        if missing_message:
+            self.message_queue.put(("warning", f"곡 목록을 불러왔습니다.{missing_message}"))
+
+    def generate_mod(self, retry_job_ids=None):
         if not self.stations:
             messagebox.showwarning("경고", "스테이션을 먼저 추가해주세요.")
             return
@@ -491,128 +718,219 @@ class HOI4MusicGUI:
             messagebox.showwarning("경고", "출력 디렉토리를 입력해주세요.")
             return
         
+        builder = self.create_builder(output_dir)
+        if builder is None:
+            return
+        resume = retry_job_ids is not None
+        if not resume and builder.has_resumable_state():
+            resume = messagebox.askyesno("이어서 생성", "이전에 완료되지 않은 모드 생성 작업이 있습니다.\n중단된 지점부터 이어서 진행하시겠습니까?\n(아니오를 누르면 처음부터 다시 생성합니다.)")
+
+        self.generate_btn.config(state='disabled')
+        if retry_job_ids is None:
+            # 계획을 먼저 보여주고 확인을 받은 뒤에만 실제 생성을 시작
+            self.log("🧮 빌드 계획 계산 중...")
+            thread = threading.Thread(target=self.plan_build_thread, args=(builder, resume))
+            thread.daemon = True
+            thread.start()
+            return
+        self.start_generate(builder, resume, retry_job_ids)
+
+    def start_generate(self, builder, resume, retry_job_ids=None):
         self.generate_btn.config(state='disabled')
+        self.pause_controller.resume()
+        self.pause_btn.config(state='normal', text="일시 정지")
         self.progress_bar.start()
         
-        thread = threading.Thread(target=self.generate_mod_thread, args=(output_dir,))
+        thread = threading.Thread(target=self.generate_mod_thread, args=(builder, resume, retry_job_ids))
         thread.daemon = True
         thread.start()
-    
-    def generate_mod_thread(self, output_dir):
+
+    def plan_build_thread(self, builder, resume):
         try:
-            all_songs_generated = True
-            
-            for station_name, station_data in self.stations.items():
-                songs_list = station_data.get("songs", [])
-                
-                if not songs_list:
-                    self.thread_log(f"⚠️ 스테이션 '{station_name}'에 곡이 없어 건너뜁니다.")
-                    continue
-                
-                self.thread_log("\n" + "="*20 + f" '{station_name}' 스테이션 처리 시작 " + "="*20)
+            plan = BuildPlanner(builder.output_dir, builder.stations, progress_callback=self.thread_log,
+                                target_size_mb=builder.target_size_mb, dedupe_mode=builder.dedupe_mode,
+                                transcode_cache=builder.transcode_cache, history=builder.history).plan()
+            plan_text = format_plan(plan)
+        except Exception as e:
+            self.thread_log(f"⚠️ 빌드 계획 계산 실패: {e}")
+            plan_text = "빌드 계획을 계산하지 못했습니다."
+        self.message_queue.put(("build_plan", (builder, resume, plan_text)))
+
+    def confirm_build_plan(self, builder, resume, plan_text):
+        self.log("\n📋 빌드 계획\n" + plan_text)
+        if messagebox.askyesno("빌드 계획 확인", plan_text + "\n\n이 계획대로 모드를 생성하시겠습니까?"):
+            self.start_generate(builder, resume)
+        else:
+            self.generate_btn.config(state='normal')
+            self.log("모드 생성을 취소했습니다.")
 
-                generator = HOI4MusicModGenerator(
-                    station_name=station_name,
-                    output_dir=output_dir,
-                    progress_callback=self.thread_log
-                )
-                
-                album_art_path = station_data.get("album_art", "").strip()
-                if album_art_path and Path(album_art_path).exists():
-                    generator.process_album_art(album_art_path)
-                else:
-                    self.thread_log(f"  - 앨범 아트가 지정되지 않았거나 경로가 올바르지 않아 건너뜁니다.")
-                
-                existing_songs_info = []
-                songs_to_download = []
-                songs_to_convert = []
-                
-                output_music_dir = Path(output_dir) / "music" / station_name
-                output_music_dir.mkdir(parents=True, exist_ok=True)
-                
-                for song_info in songs_list:
-                    if song_info.get('name'):
-                        file_name_base = song_info['name']
-                    elif song_info.get('english_name'):
-                        file_name_base = re.sub(r'[^a-zA-Z0-9_]', '_', song_info['english_name'].lower().replace(' ', '_')).strip('_')
-                    elif song_info.get('korean_name'):
-                        file_name_base = generator.sanitize_filename(song_info['korean_name'])
-                    else:
-                        file_name_base = "unknown_song"
-
-                    ogg_path = output_music_dir / f"{file_name_base}.ogg"
-                    
-                    if ogg_path.exists():
-                        self.thread_log(f"✅ '{song_info.get('korean_name', file_name_base)}' 파일이 이미 존재합니다. 건너뜁니다.")
-                        if 'name' not in song_info:
-                            song_info['name'] = file_name_base
-                            song_info['file_path'] = f"{station_name}/{file_name_base}.ogg"
-                        existing_songs_info.append(song_info)
-                    elif song_info.get('source') == 'local':
-                        songs_to_convert.append(song_info)
-                    else:
-                        songs_to_download.append(song_info)
-
-                generator.songs = existing_songs_info
-
-                for i, song_info in enumerate(songs_to_convert, 1):
-                    self.thread_log(f"\n[{i}/{len(songs_to_convert)}] '{station_name}' 스테이션 로컬 파일 처리 중...")
-                    generated_song_info = generator.process_local_song(song_info)
-                    if generated_song_info:
-                        song_info.update(generated_song_info)
-                
-                for i, song_info in enumerate(songs_to_download, 1):
-                    self.thread_log(f"\n[{i}/{len(songs_to_download)}] '{station_name}' 스테이션 다운로드 처리 중...")
-                    generated_song_info = generator.download_and_convert_song(
-                        url=song_info['url'],
-                        korean_name=song_info.get('korean_name'),
-                        english_name=song_info.get('english_name'),
-                        trim_start=song_info.get('trim_start', 0),
-                        volume=song_info.get('volume', 0.8)
-                    )
-                    if generated_song_info:
-                        song_info.update(generated_song_info)
-
-                if generator.generate_all_files():
-                    self.stations[station_name]["songs"] = generator.songs
-                    self.thread_log(f"✅ 스테이션 '{station_name}' 모드 파일 생성 완료.")
-                else:
-                    all_songs_generated = False
-                    self.thread_log(f"❌ 스테이션 '{station_name}' 모드 파일 생성 실패.")
-            
-            if self.stations:
-                mod_name = Path(output_dir).name
-                descriptor_content = [
-                    'version="1.0"',
-                    'tags={',
-                    '\t"Sound"',
-                    '}',
-                    f'name="{mod_name.replace("_", " ").title()}"',
-                    'supported_version="1.14.*"'
-                ]
-                with open(Path(output_dir) / "descriptor.mod", 'w', encoding='utf-8') as f:
-                    f.write('\n'.join(descriptor_content) + '\n')
-                self.thread_log(f"\n📝 descriptor.mod 파일 생성 완료.")
-
-            if all_songs_generated:
-                mod_data = {'stations': self.stations}
-                mod_data_path = Path(output_dir) / "mod_data.json"
-                with open(mod_data_path, 'w', encoding='utf-8') as f:
-                    json.dump(mod_data, f, ensure_ascii=False, indent=2)
-                self.thread_log(f"\n✅ 전체 모드 데이터 저장: {mod_data_path}")
-                self.thread_log("\n" + "="*60)
-                self.thread_log("🎼 HOI4 음악 모드 생성/업데이트 완료!")
-                self.thread_log(f"  - 출력 디렉토리: {output_dir}")
-                self.thread_log("="*60)
-
-                temp_dir = Path(output_dir) / "temp"
-                if temp_dir.exists():
-                    shutil.rmtree(temp_dir)
-                
-                if self.zip_mod.get():
-                    self.zip_mod_folder(output_dir)
+    def create_builder(self, output_dir):
+        """설정 값으로 ModBuilder 생성. 입력이 잘못되면 경고 후 None"""
+        try:
+            max_downloads = max(1, int(self.max_downloads.get() or 4))
+            bandwidth_limit = int(float(self.bandwidth_limit_kb.get() or 0) * 1024) or None
+            memory_budget_mb = max(256, int(self.memory_budget_mb.get() or DEFAULT_MEMORY_BUDGET_MB))
+            target_size_mb = float(self.target_size_mb.get() or 0) or None
+            shard_max_songs = int(self.shard_max_songs.get() or 0) or None
+        except ValueError as e:
+            messagebox.showwarning("입력 오류", f"다운로드 설정 값이 잘못되었습니다: {e}")
+            return None
+
+        # 작업 스레드가 GUI의 스테이션 딕셔너리를 직접 바꾸지 않도록 사본을 넘기고, 결과는 apply_built_stations로 반영
+        return ModBuilder(output_dir, copy.deepcopy(self.stations), progress_callback=self.thread_log, zip_mod=self.zip_mod.get(),
+                          max_downloads=max_downloads, bandwidth_limit=bandwidth_limit, memory_budget_mb=memory_budget_mb,
+                          target_size_mb=target_size_mb, dedupe_mode='merge' if self.merge_duplicates.get() else 'flag',
+                          shard_max_songs=shard_max_songs, background=self.background_mode.get(),
+                          pause_controller=self.pause_controller)
+
+    def toggle_pause(self):
+        if self.pause_controller.paused:
+            self.pause_controller.resume()
+            self.pause_btn.config(text="일시 정지")
+            self.progress_bar.start()
+            self.log("▶ 모드 생성을 계속합니다.")
+        else:
+            self.pause_controller.pause()
+            self.pause_btn.config(text="계속")
+            self.progress_bar.stop()
+            self.log("⏸ 모드 생성을 일시 정지합니다. 진행 중인 곡은 끝까지 처리됩니다.")
+        if self.daemon_job:
+            thread = threading.Thread(target=self.forward_pause_to_daemon, args=(self.daemon_job[0], self.pause_controller.paused))
+            thread.daemon = True
+            thread.start()
+
+    def forward_pause_to_daemon(self, client, paused):
+        try:
+            if paused:
+                client.pause()
+            else:
+                client.resume()
+        except (OSError, RuntimeError) as e:
+            self.thread_log(f"⚠️ 빌드 데몬 일시 정지/재개 실패: {e}")
+
+    def analyze_stations(self):
+        output_dir = self.output_dir.get().strip()
+        if not self.stations or not output_dir:
+            return
+        try:
+            shard_max_songs = int(self.shard_max_songs.get() or 0) or None
+        except ValueError:
+            shard_max_songs = None
+        thread = threading.Thread(target=self.analyze_stations_thread, args=(output_dir, dict(self.stations), shard_max_songs))
+        thread.daemon = True
+        thread.start()
+
+    def analyze_stations_thread(self, output_dir, stations, shard_max_songs):
+        try:
+            analyzer = StationAnalyzer(output_dir, stations, progress_callback=self.thread_log)
+            analyzer.report(analyzer.analyze(), max_songs=shard_max_songs)
+        except Exception as e:
+            self.thread_log(f"❌ 스테이션 분석 실패: {e}")
+
+    def toggle_folder_watch(self):
+        if self.folder_watcher and self.folder_watcher.running:
+            watcher, self.folder_watcher = self.folder_watcher, None
+            # 변환 중이면 끝날 때까지 기다려야 하므로 별도 스레드에서 종료
+            threading.Thread(target=watcher.stop, daemon=True).start()
+            self.watch_btn.config(text="폴더 감시 시작")
+            return
+
+        current_station = self.current_station_name.get()
+        output_dir = self.output_dir.get().strip()
+        if not current_station or not output_dir:
+            messagebox.showwarning("경고", "스테이션과 출력 디렉토리를 먼저 지정해주세요.")
+            return
+        folder_path = filedialog.askdirectory(title="감시할 음악 폴더를 선택하세요")
+        if not folder_path:
+            return
+        builder = self.create_builder(output_dir)
+        if builder is None:
+            return
 
-                self.message_queue.put(("success", f"모드 생성이 완료되었습니다!\n출력 위치: {output_dir}"))
+        self.folder_watcher = FolderWatcher(
+            folder_path, current_station, builder, progress_callback=self.thread_log, load_stations=self.snapshot_stations,
+            on_update=lambda *update: self.message_queue.put(("watched_station_updated", update)))
+        self.folder_watcher.start()
+        self.watch_btn.config(text="폴더 감시 중지")
+
+    def snapshot_stations(self, timeout=30):
+        """작업 스레드에서 호출. Tk 스레드에서 만든 스테이션 사본을 받아 옴"""
+        reply = queue.Queue(maxsize=1)
+        self.message_queue.put(("snapshot_stations", reply))
+        return reply.get(timeout=timeout)
+
+    def apply_watched_station(self, station_name, station_data, changed_paths, deleted_paths):
+        """폴더 감시가 갱신한 곡을 Tk 스레드에서 현재 곡 목록에 반영 (감시 중에 바꾼 다른 곡은 유지)"""
+        station = self.stations.get(station_name)
+        if station is None:
+            self.stations[station_name] = station_data
+            self.update_station_list()
+            return
+        deleted = {Path(path).resolve() for path in deleted_paths}
+        changed = {Path(path).resolve() for path in changed_paths}
+
+        def local_path(song):
+            return Path(song['url']).resolve() if song.get('source') == 'local' and song.get('url') else None
+
+        songs = [song for song in station["songs"] if local_path(song) not in deleted]
+        by_path = {local_path(song): song for song in songs if local_path(song)}
+        for watched_song in station_data.get("songs", []):
+            path = local_path(watched_song)
+            if path not in changed:
+                continue
+            if path in by_path:
+                self.apply_song_result(by_path[path], watched_song)
+            else:
+                songs.append(watched_song)
+        station["songs"] = songs
+
+    def retry_failed_jobs(self):
+        output_dir = self.output_dir.get().strip()
+        if not output_dir:
+            messagebox.showwarning("경고", "출력 디렉토리를 입력해주세요.")
+            return
+
+        # 조회만 하므로 빌더를 만들지 않고 저장된 작업 상태 파일을 합치지도 않음
+        queue_state = JobQueue(Path(output_dir) / ModBuilder.STATE_FILE_NAME)
+        try:
+            queue_state.load(compact=False)
+        except (OSError, ValueError):
+            pass
+        failed_jobs = queue_state.failed_jobs()
+        if not failed_jobs:
+            messagebox.showinfo("재시도", "재시도할 실패 작업이 없습니다.")
+            return
+
+        dialog = tk.Toplevel(self.root)
+        dialog.title("실패 작업 재시도")
+        ttk.Label(dialog, text="다시 실행할 작업을 선택하세요:").pack(anchor=tk.W, padx=10, pady=(10, 5))
+        job_listbox = tk.Listbox(dialog, selectmode=tk.EXTENDED, width=90, height=12)
+        job_listbox.pack(fill=tk.BOTH, expand=True, padx=10)
+        for job in failed_jobs:
+            song = job['payload'].get('song', {})
+            label = song.get('korean_name') or song.get('url') or job['payload'].get('image_path', '')
+            job_listbox.insert(tk.END, f"[{job['station'] or '-'}] {job['kind']}: {label} - {job['error']}")
+        job_listbox.select_set(0, tk.END)
+
+        def start_retry():
+            selected_ids = [failed_jobs[i]['id'] for i in job_listbox.curselection()]
+            dialog.destroy()
+            if selected_ids:
+                self.generate_mod(retry_job_ids=selected_ids)
+
+        ttk.Button(dialog, text="선택 작업 재시도", command=start_retry).pack(pady=10)
+    
+    def generate_mod_thread(self, builder, resume, retry_job_ids=None):
+        try:
+            client = DaemonClient()
+            if client.available():
+                self.generate_on_daemon(client, builder, resume, retry_job_ids)
+                return
+            builder.prepare(resume=resume, retry_job_ids=retry_job_ids)
+            success = builder.run()
+            self.message_queue.put(("stations_built", builder.stations))
+            if success:
+                self.message_queue.put(("success", f"모드 생성이 완료되었습니다!\n출력 위치: {builder.output_dir}"))
             else:
                 self.message_queue.put(("error", "일부 스테이션 모드 파일 생성에 실패했습니다. 로그를 확인하세요."))
                 
@@ -623,52 +941,106 @@ class HOI4MusicGUI:
         finally:
             self.message_queue.put(("finish", ""))
 
-    def add_playlist_songs_thread(self, playlist_url, station_name):
-        self.thread_log(f"🔄 재생목록 처리 시작: {playlist_url}")
+    def generate_on_daemon(self, client, builder, resume, retry_job_ids=None):
+        """
+        빌드 데몬이 실행 중이면 작업을 보내고 진행 이벤트를 로그로 받음
+        동시 다운로드/대역폭/메모리/백그라운드 설정은 데몬 전체가 공유하므로 이 창의 값 대신 데몬 설정을 사용
+        """
+        mod = {'output_dir': str(builder.output_dir.resolve()), 'stations': builder.stations, 'zip': builder.zip_mod,
+               'target_size_mb': builder.target_size_mb, 'dedupe': builder.dedupe_mode,
+               'shard_max_songs': builder.shard_max_songs, 'resume': resume, 'retry_job_ids': retry_job_ids}
+        job_id = client.submit(mod)
+        self.daemon_job = (client, job_id)
+        self.thread_log(f"🛰️ 빌드 데몬({client.base_url})에 작업 {job_id}을(를) 보냈습니다.")
+        ignored = [f"동시 다운로드 {self.max_downloads.get()}개", f"메모리 예산 {self.memory_budget_mb.get()}MB"]
+        if builder.bandwidth_limit:
+            ignored.append(f"대역폭 제한 {self.bandwidth_limit_kb.get()}KB/s")
+        if builder.background:
+            ignored.append("백그라운드 모드")
+        self.thread_log(f"  ⚠️ 이 창의 설정({', '.join(ignored)})은 적용되지 않고 데몬 설정을 사용합니다.")
         try:
-            playlist = Playlist(playlist_url)
-            if not playlist.videos:
-                self.thread_log("❌ 재생목록에서 영상을 찾을 수 없거나, 비공개 재생목록일 수 있습니다.")
-                return
+            for event in client.events(job_id):
+                if event['type'] == 'log':
+                    self.thread_log(event['message'])
+                elif event['state'] == 'queued' and event.get('position', 1) > 1:
+                    self.thread_log(f"  ⏳ 데몬 대기열 {event['position']}번째 - 앞선 작업이 끝나면 시작합니다.")
+        finally:
+            self.daemon_job = None
 
-            self.thread_log(f"  총 {len(playlist.videos)}개의 영상을 발견했습니다. 추가를 시작합니다.")
-            
-            new_songs = []
-            for video in playlist.videos:
-                try:
-                    title = video.title
-                    song_info = {
-                        'url': video.watch_url,
-                        'korean_name': title,
-                        'english_name': title,
-                        'trim_start': 0,
-                        'volume': 0.8,
-                        'weight': 1,
-                        'source': 'youtube'
-                    }
-                    new_songs.append(song_info)
-                    self.thread_log(f"  + 준비됨: {title}")
-                except Exception as e:
-                    self.thread_log(f"  - 영상 정보 가져오기 실패: {e}")
-            
-            if new_songs:
-                self.message_queue.put(("add_multiple_songs", (station_name, new_songs)))
+        job = client.job(job_id)
+        if job.get('stations'):
+            self.message_queue.put(("stations_built", job['stations']))
+        if job['state'] == DAEMON_JOB_DONE:
+            self.message_queue.put(("success", f"모드 생성이 완료되었습니다!\n출력 위치: {builder.output_dir}"))
+        else:
+            self.message_queue.put(("error", "일부 스테이션 모드 파일 생성에 실패했습니다. 로그를 확인하세요."))
+
+    def apply_built_stations(self, built_stations):
+        """
+        빌드 결과(변환된 곡 정보)를 Tk 스레드에서 현재 스테이션 딕셔너리에 반영
+        빌드 중에 바꾼 곡 목록과 이름/볼륨 등 입력 값은 유지하고, 원본과 자르기가 같은 곡에만 변환 결과를 채움
+        """
+        if built_stations is self.stations:
+            return
+        for station_name, built_data in built_stations.items():
+            station = self.stations.get(station_name)
+            if station is None:
+                # 이어서 생성할 때 창에 없던 스테이션 (저장된 작업의 스테이션)
+                self.stations[station_name] = built_data
+                continue
+            built_songs = {}
+            for song in built_data.get("songs", []):
+                built_songs.setdefault((song.get('url'), song.get('trim_start', 0)), []).append(song)
+            for song in station.get("songs", []):
+                matches = built_songs.get((song.get('url'), song.get('trim_start', 0)))
+                if matches:
+                    self.apply_song_result(song, matches.pop(0))
+
+    @staticmethod
+    def apply_song_result(song, built_song):
+        """변환 결과(built_song)의 정보로 곡을 갱신하되 사용자가 입력하는 값은 유지"""
+        if 'duplicate_of' not in built_song:
+            song.pop('duplicate_of', None)
+        song.update({key: value for key, value in built_song.items() if key not in SONG_INPUT_FIELDS})
+
+    def sync_playlist(self):
+        current_station = self.current_station_name.get()
+        if not self.stations.get(current_station, {}).get('playlist'):
+            messagebox.showinfo("재생목록 동기화", "현재 스테이션은 재생목록과 연결되어 있지 않습니다.\n재생목록 URL을 곡으로 추가하면 연결됩니다.")
+            return
+        self.start_playlist_sync(current_station)
 
-        except Exception as e:
-            self.thread_log(f"❌ 재생목록 처리 중 오류 발생: {e}")
-    
-    def zip_mod_folder(self, output_dir):
-        self.thread_log("\n📦 모드 폴더 압축 시작...")
+    def start_playlist_sync(self, station_name):
+        station_data = dict(self.stations[station_name])
+        thread = threading.Thread(target=self.sync_playlist_thread, args=(station_name, station_data))
+        thread.daemon = True
+        thread.start()
+
+    def sync_playlist_thread(self, station_name, station_data):
+        self.thread_log(f"🔄 재생목록 동기화 시작: {station_data['playlist']['url']}")
         try:
-            output_path = Path(output_dir)
-            archive_name = output_path.name
-            archive_path = output_path.parent / archive_name
-            
-            shutil.make_archive(str(archive_path), 'zip', root_dir=output_path.parent, base_dir=archive_name)
-            
-            self.thread_log(f"  ✅ 압축 완료: {archive_path}.zip")
+            syncer = PlaylistSync(create_media_source(), progress_callback=self.thread_log)
+            entries = syncer.fetch(station_data)
+            if not entries:
+                self.thread_log("❌ 재생목록에서 영상을 찾을 수 없거나, 비공개 재생목록일 수 있습니다.")
+                return
+            self.message_queue.put(("playlist_synced", (station_name, station_data['playlist']['url'], syncer, entries)))
         except Exception as e:
-            self.thread_log(f"  ❌ 압축 실패: {e}")
+            self.thread_log(f"❌ 재생목록 처리 중 오류 발생: {e}")
+
+    def apply_playlist_sync(self, station_name, playlist_url, syncer, entries):
+        """받아 온 재생목록을 Tk 스레드에서 현재 곡 목록과 다시 비교하여 반영 (동기화 중에 바꾼 곡도 유지)"""
+        station = self.stations.get(station_name)
+        if not station or (station.get('playlist') or {}).get('url') != playlist_url:
+            self.log(f"⚠️ 동기화 중에 스테이션 '{station_name}'의 재생목록 연결이 바뀌어 결과를 반영하지 않습니다.")
+            return
+        result = syncer.merge(station, entries)
+        syncer.progress_callback = self.log
+        syncer.log_result(station_name, result)
+        station['songs'] = result['songs']
+        station['playlist'] = result['playlist']
+        if station_name == self.current_station_name.get():
+            self.update_song_tree()
     
     def thread_log(self, message):
         self.message_queue.put(("log", message))
@@ -686,14 +1058,45 @@ class HOI4MusicGUI:
                 elif msg_type == "add_multiple_songs":
                     station_name, song_list = message
                     if station_name in self.stations:
+                        renamed = unique_song_names(song_list, self.stations[station_name]["songs"])
                         self.stations[station_name]["songs"].extend(song_list)
+                        if renamed:
+                            self.log(f"  - 파일 이름이 겹치는 {len(renamed)}곡의 영어명을 구분되도록 바꿨습니다.")
+                        if station_name == self.current_station_name.get():
+                            self.fill_song_tree()
+                        self.log(f"✅ {len(song_list)}개의 곡을 추가했습니다.")
+                elif msg_type == "replace_songs":
+                    station_name, song_list = message
+                    if station_name in self.stations:
+                        self.stations[station_name]["songs"] = song_list
+                        if station_name == self.current_station_name.get():
+                            self.update_song_tree()
+                elif msg_type == "stations_built": self.apply_built_stations(message)
+                elif msg_type == "project_loaded": self.apply_loaded_project(*message)
+                elif msg_type == "build_plan": self.confirm_build_plan(*message)
+                elif msg_type == "playlist_synced": self.apply_playlist_sync(*message)
+                elif msg_type == "waveform":
+                    song_source, waveform = message
+                    if song_source == self.url_entry.get().strip():
+                        self.current_waveform = (song_source, waveform)
+                        self.draw_waveform()
+                elif msg_type == "snapshot_stations": message.put(copy.deepcopy(self.stations))
+                elif msg_type == "watched_station_updated":
+                    self.apply_watched_station(*message)
+                    if message[0] == self.current_station_name.get():
                         self.update_song_tree()
-                        self.log(f"✅ {len(song_list)}개의 곡을 재생목록에서 추가했습니다.")
                 elif msg_type == "success": messagebox.showinfo("완료", message)
+                elif msg_type == "warning": messagebox.showwarning("확인 필요", message)
                 elif msg_type == "error": messagebox.showerror("오류", message)
                 elif msg_type == "finish":
                     self.generate_btn.config(state='normal')
+                    self.pause_btn.config(state='disabled', text="일시 정지")
                     self.progress_bar.stop()
+                    # 이어서 생성한 경우 저장된 작업의 스테이션이 추가되었을 수 있음
+                    self.update_station_list()
+                    if self.current_station_name.get() not in self.stations and self.stations:
+                        self.current_station_name.set(next(iter(self.stations)))
+                        self.on_station_change()
                     self.update_song_tree()
         except queue.Empty:
             pass
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+
+# 숫자가 작을수록 먼저 실행 (로컬 변환을 느린 네트워크 작업보다 우선)
+JOB_PRIORITIES = {'art': 0, 'convert': 0, 'download': 10, 'write': 20, 'package': 30}
+# 저널에 기록하는 작업 필드 (상태 변경에 따라 바뀌는 값만)
+JOURNAL_FIELDS = ('id', 'state', 'error', 'result', 'attempts', 'finished_at')
+MIN_JOURNAL_RECORDS = 256
+
+
+class JobQueue:
+    """
+    작업 목록과 상태를 state_path에 저장. 작업이 끝날 때마다 전체를 다시 쓰지 않고 바뀐 작업만 저널(<state_path>.journal)에
+    한 줄씩 추가하며, 저널이 작업 수보다 길어지거나 다시 불러올 때 상태 파일로 합침
+    """
+    def __init__(self, state_path, progress_callback=None):
+        self.state_path = Path(state_path)
+        self.journal_path = self.state_path.with_name(self.state_path.name + '.journal')
+        self.progress_callback = progress_callback
+        self.jobs = []
+        self.metadata = {}
+        self._journal_records = 0
+        self._lock = threading.RLock()
+
+    def _log(self, message):
+        if self.progress_callback:
+            self.progress_callback(message)
+
+    def load(self, compact=True):
+        """
+        디스크에서 작업 상태를 불러옴. 실행 중이던 작업은 대기 상태로 되돌림 (실행 시작은 저장하지 않음)
+        compact가 False면 저널을 적용만 하고 상태 파일로 합치지 않음 (상태를 조회만 할 때 사용)
+        """
+        if not self.state_path.exists():
+            return False
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        with self._lock:
+            self.jobs = state.get('jobs', [])
+            self.metadata = state.get('metadata', {})
+            replayed = self._replay_journal()
+            for job in self.jobs:
+                if job['state'] == RUNNING:
+                    job['state'] = PENDING
+            if replayed and compact:
+                self.save()
+        return True
+
+    def _replay_journal(self):
+        """저널에 기록된 작업 상태를 순서대로 적용하고 적용한 기록 수를 반환 (종료 중에 잘린 마지막 줄은 무시)"""
+        if not self.journal_path.exists():
+            return 0
+        replayed = 0
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if 0 <= record.get('id', -1) < len(self.jobs):
+                    self.jobs[record['id']].update(record)
+                    replayed += 1
+        return replayed
+
+    def save(self):
+        """임시 파일에 쓴 뒤 교체하여 중간에 종료되어도 상태 파일이 깨지지 않도록 전체 상태를 저장하고 저널을 비움"""
+        with self._lock:
+            state = {'metadata': self.metadata, 'jobs': self.jobs}
+            temp_path = self.state_path.with_name(self.state_path.name + '.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(temp_path, self.state_path)
+            self.journal_path.unlink(missing_ok=True)
+            self._journal_records = 0
+
+    def _append_journal(self, job):
+        """작업 하나의 상태 변경만 저널에 추가. 저널이 작업 수보다 길어지면 상태 파일로 합침"""
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({key: job.get(key) for key in JOURNAL_FIELDS}, ensure_ascii=False) + '\n')
+        self._journal_records += 1
+        if self._journal_records > max(MIN_JOURNAL_RECORDS, len(self.jobs)):
+            self.save()
+
+    def clear(self):
+        with self._lock:
+            self.jobs = []
+            self.metadata = {}
+            self.state_path.unlink(missing_ok=True)
+            self.journal_path.unlink(missing_ok=True)
+            self._journal_records = 0
+
+    def add(self, kind, station=None, payload=None, deps=(), priority=None, state=PENDING, result=None):
+        with self._lock:
+            job = {
+                'id': len(self.jobs),
+                'kind': kind,
+                'station': station,
+                'priority': JOB_PRIORITIES.get(kind, 50) if priority is None else priority,
+                'state': state,
+                'deps': list(deps),
+                'attempts': 0,
+                'error': None,
+                'payload': payload or {},
+                'result': result,
+            }
+            self.jobs.append(job)
+            return job
+
+    def get(self, job_id):
+        return self.jobs[job_id]
+
+    def _is_ready(self, job):
+        return job['state'] == PENDING and all(self.jobs[d]['state'] in (DONE, FAILED) for d in job['deps'])
+
+    def ready_jobs(self, kinds=None):
+        """의존 작업이 모두 끝난 대기 작업을 우선순위 순으로 반환"""
+        with self._lock:
+            ready = [job for job in self.jobs if self._is_ready(job) and (kinds is None or job['kind'] in kinds)]
+            return sorted(ready, key=lambda job: (job['priority'], job['id']))
+
+    def next_ready(self, kinds=None):
+        ready = self.ready_jobs(kinds)
+        return ready[0] if ready else None
+
+    def mark_running(self, job):
+        with self._lock:
+            job['state'] = RUNNING
+            job['attempts'] += 1
+            job['started_at'] = time.time()
+
+    def mark_done(self, job, result=None):
+        with self._lock:
+            job['state'] = DONE
+            job['error'] = None
+            if result is not None:
+                job['result'] = result
+            job['finished_at'] = time.time()
+            self._append_journal(job)
+
+    def mark_failed(self, job, error):
+        with self._lock:
+            job['state'] = FAILED
+            job['error'] = str(error)
+            job['finished_at'] = time.time()
+            self._append_journal(job)
+
+    def mark_pending(self, job):
+        """시작했지만 취소된 작업을 다음 실행에서 다시 하도록 대기 상태로 되돌림"""
+        with self._lock:
+            job['state'] = PENDING
+            self._append_journal(job)
+
+    def retry_failed(self, job_ids=None, kinds=None, stations=None):
+        """
+        조건에 맞는 실패 작업과 그 결과에 의존하는 후속 작업을 다시 대기 상태로 되돌림
+        되돌린 실패 작업 수를 반환
+        """
+        with self._lock:
+            targets = [
+                job for job in self.jobs
+                if job['state'] == FAILED
+                and (job_ids is None or job['id'] in job_ids)
+                and (kinds is None or job['kind'] in kinds)
+                and (stations is None or job['station'] in stations)
+            ]
+            reset_ids = {job['id'] for job in targets}
+            changed = True
+            while changed:
+                changed = False
+                for job in self.jobs:
+                    if job['id'] not in reset_ids and any(d in reset_ids for d in job['deps']):
+                        reset_ids.add(job['id'])
+                        changed = True
+            for job_id in reset_ids:
+                self.jobs[job_id]['state'] = PENDING
+                self.jobs[job_id]['error'] = None
+            if reset_ids:
+                self.save()
+            return len(targets)
+
+    def failed_jobs(self):
+        with self._lock:
+            return [job for job in self.jobs if job['state'] == FAILED]
+
+    def is_finished(self):
+        with self._lock:
+            return all(job['state'] in (DONE, FAILED) for job in self.jobs)
+
+    def has_unfinished_work(self):
+        """대기/실행 중이거나 실패한 작업이 남아 있는지 여부"""
+        with self._lock:
+            return any(job['state'] != DONE for job in self.jobs)
+
+    def summary(self):
+        with self._lock:
+            counts = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self.jobs:
+                counts[job['state']] += 1
+            return counts
@@ -0,0 +1,399 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+AUDIO_EXTENSIONS = {'.mp3', '.flac', '.ogg', '.oga', '.opus', '.wav', '.m4a', '.mp4', '.aac'}
+_TAIL_READ_SIZE = 64 * 1024
+_HEAD_READ_SIZE = 256 * 1024
+
+_MP3_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 2.5: [11025, 12000, 8000]}
+
+
+def _empty_probe(path):
+    return {'path': str(path), 'title': None, 'artist': None, 'duration': None, 'sample_rate': None, 'channels': None}
+
+
+def _decode_id3_text(data):
+    if not data:
+        return None
+    encoding, payload = data[0], data[1:]
+    codec = {0: 'latin-1', 1: 'utf-16', 2: 'utf-16-be', 3: 'utf-8'}.get(encoding, 'latin-1')
+    text = payload.decode(codec, errors='replace')
+    return text.split('\x00')[0].strip() or None
+
+
+def _parse_vorbis_comments(data, offset=0):
+    """Vorbis comment 블록에서 TITLE/ARTIST 추출 (FLAC, Ogg 공통)"""
+    tags = {}
+    vendor_length, = struct.unpack_from('<I', data, offset)
+    offset += 4 + vendor_length
+    count, = struct.unpack_from('<I', data, offset)
+    offset += 4
+    for _ in range(count):
+        length, = struct.unpack_from('<I', data, offset)
+        offset += 4
+        key, _, value = data[offset:offset + length].decode('utf-8', errors='replace').partition('=')
+        offset += length
+        if key.upper() in ('TITLE', 'ARTIST') and key.upper() not in tags:
+            tags[key.upper()] = value.strip()
+    return tags
+
+
+def _probe_mp3(f, result):
+    header = f.read(10)
+    audio_start = 0
+    if header[:3] == b'ID3':
+        major = header[3]
+        tag_size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+        tag = f.read(tag_size)
+        audio_start = 10 + tag_size + (10 if header[5] & 0x10 else 0)
+        pos = 0
+        id_size, frame_header_size = (3, 6) if major == 2 else (4, 10)
+        while pos + frame_header_size <= len(tag):
+            frame_id = tag[pos:pos + id_size]
+            if not frame_id.strip(b'\x00'):
+                break
+            if major == 2:
+                size = int.from_bytes(tag[pos + 3:pos + 6], 'big')
+            elif major == 4:
+                raw = tag[pos + 4:pos + 8]
+                size = (raw[0] << 21) | (raw[1] << 14) | (raw[2] << 7) | raw[3]
+            else:
+                size, = struct.unpack_from('>I', tag, pos + 4)
+            body = tag[pos + frame_header_size:pos + frame_header_size + size]
+            if frame_id in (b'TIT2', b'TT2'):
+                result['title'] = result['title'] or _decode_id3_text(body)
+            elif frame_id in (b'TPE1', b'TP1'):
+                result['artist'] = result['artist'] or _decode_id3_text(body)
+            pos += frame_header_size + size
+
+    f.seek(audio_start)
+    data = f.read(_HEAD_READ_SIZE)
+    sync = data.find(b'\xff')
+    while sync != -1 and sync + 4 <= len(data) and data[sync + 1] & 0xE0 != 0xE0:
+        sync = data.find(b'\xff', sync + 1)
+    if sync == -1 or sync + 4 > len(data):
+        return
+    b1, b2, b3 = data[sync + 1], data[sync + 2], data[sync + 3]
+    version = {3: 1, 2: 2, 0: 2.5}.get((b1 >> 3) & 0x03)
+    layer = {3: 1, 2: 2, 1: 3}.get((b1 >> 1) & 0x03)
+    bitrate_index, rate_index = b2 >> 4, (b2 >> 2) & 0x03
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    bitrate = _MP3_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    channels = 1 if (b3 >> 6) == 3 else 2
+    samples_per_frame = 384 if layer == 1 else (1152 if layer == 2 or version == 1 else 576)
+    result['sample_rate'], result['channels'] = sample_rate, channels
+
+    # Xing/Info 헤더가 있으면 프레임 수로 정확한 길이를 계산 (VBR)
+    side_info = (32 if channels == 2 else 17) if version == 1 else (17 if channels == 2 else 9)
+    xing_pos = sync + 4 + side_info
+    if data[xing_pos:xing_pos + 4] in (b'Xing', b'Info'):
+        flags, = struct.unpack_from('>I', data, xing_pos + 4)
+        if flags & 0x01:
+            frames, = struct.unpack_from('>I', data, xing_pos + 8)
+            result['duration'] = frames * samples_per_frame / sample_rate
+            return
+
+    f.seek(0, os.SEEK_END)
+    audio_size = f.tell() - audio_start - sync
+    f.seek(-128, os.SEEK_END)
+    if f.read(3) == b'TAG':
+        audio_size -= 128
+    result['duration'] = audio_size * 8 / bitrate
+
+
+def _probe_flac(f, result):
+    if f.read(4) != b'fLaC':
+        return
+    while True:
+        block_header = f.read(4)
+        if len(block_header) < 4:
+            return
+        is_last, block_type = block_header[0] & 0x80, block_header[0] & 0x7F
+        length = int.from_bytes(block_header[1:], 'big')
+        if block_type == 0:
+            info = f.read(length)
+            packed = int.from_bytes(info[10:18], 'big')
+            sample_rate = packed >> 44
+            result['sample_rate'] = sample_rate
+            result['channels'] = ((packed >> 41) & 0x07) + 1
+            total_samples = packed & 0xFFFFFFFFF
+            if sample_rate and total_samples:
+                result['duration'] = total_samples / sample_rate
+        elif block_type == 4:
+            tags = _parse_vorbis_comments(f.read(length))
+            result['title'], result['artist'] = tags.get('TITLE'), tags.get('ARTIST')
+        else:
+            f.seek(length, os.SEEK_CUR)
+        if is_last:
+            return
+
+
+def _read_ogg_packets(data, max_packets):
+    packets, current, pos = [], b'', 0
+    while pos + 27 <= len(data) and len(packets) < max_packets:
+        if data[pos:pos + 4] != b'OggS':
+            break
+        segment_count = data[pos + 26]
+        lacing = data[pos + 27:pos + 27 + segment_count]
+        pos += 27 + segment_count
+        for size in lacing:
+            current += data[pos:pos + size]
+            pos += size
+            if size < 255:
+                packets.append(current)
+                current = b''
+    return packets
+
+
+def _probe_ogg(f, result):
+    packets = _read_ogg_packets(f.read(_HEAD_READ_SIZE), 2)
+    if not packets:
+        return
+    ident = packets[0]
+    comment_offset = None
+    pre_skip, granule_rate = 0, None
+    if ident[:7] == b'\x01vorbis':
+        result['channels'] = ident[11]
+        result['sample_rate'] = granule_rate = struct.unpack_from('<I', ident, 12)[0]
+        comment_offset = 7
+    elif ident[:8] == b'OpusHead':
+        result['channels'] = ident[9]
+        pre_skip = struct.unpack_from('<H', ident, 10)[0]
+        result['sample_rate'] = struct.unpack_from('<I', ident, 12)[0] or 48000
+        granule_rate = 48000
+        comment_offset = 8
+    if comment_offset and len(packets) > 1:
+        try:
+            tags = _parse_vorbis_comments(packets[1], comment_offset)
+            result['title'], result['artist'] = tags.get('TITLE'), tags.get('ARTIST')
+        except struct.error:
+            pass
+
+    # 마지막 페이지의 granule position으로 길이 계산
+    f.seek(0, os.SEEK_END)
+    size = f.tell()
+    f.seek(max(0, size - _TAIL_READ_SIZE))
+    tail = f.read()
+    last = tail.rfind(b'OggS')
+    if granule_rate and last >= 0 and last + 14 <= len(tail):
+        granule, = struct.unpack_from('<q', tail, last + 6)
+        if granule > 0:
+            result['duration'] = max(0, granule - pre_skip) / granule_rate
+
+
+def _probe_wav(f, result):
+    header = f.read(12)
+    if header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+        return
+    byte_rate = None
+    while True:
+        chunk_header = f.read(8)
+        if len(chunk_header) < 8:
+            return
+        chunk_id, chunk_size = chunk_header[:4], struct.unpack('<I', chunk_header[4:])[0]
+        if chunk_id == b'fmt ':
+            fmt = f.read(chunk_size)
+            result['channels'], result['sample_rate'], byte_rate = struct.unpack_from('<HII', fmt, 2)
+        elif chunk_id == b'data':
+            if byte_rate:
+                result['duration'] = chunk_size / byte_rate
+            f.seek(chunk_size, os.SEEK_CUR)
+        elif chunk_id == b'LIST':
+            info = f.read(chunk_size)
+            if info[:4] == b'INFO':
+                pos = 4
+                while pos + 8 <= len(info):
+                    sub_id, sub_size = info[pos:pos + 4], struct.unpack_from('<I', info, pos + 4)[0]
+                    value = info[pos + 8:pos + 8 + sub_size].split(b'\x00')[0].decode('utf-8', errors='replace').strip()
+                    if sub_id == b'INAM':
+                        result['title'] = value or None
+                    elif sub_id == b'IART':
+                        result['artist'] = value or None
+                    pos += 8 + sub_size + (sub_size & 1)
+        else:
+            f.seek(chunk_size, os.SEEK_CUR)
+        if chunk_size & 1:
+            f.seek(1, os.SEEK_CUR)
+
+
+def _iter_mp4_atoms(data, offset=0, end=None):
+    end = len(data) if end is None else end
+    while offset + 8 <= end:
+        size, atom_type = struct.unpack_from('>I4s', data, offset)
+        header_size = 8
+        if size == 1:
+            size, = struct.unpack_from('>Q', data, offset + 8)
+            header_size = 16
+        if size < header_size:
+            return
+        yield atom_type, offset + header_size, offset + size
+        offset += size
+
+
+def _probe_mp4(f, result):
+    f.seek(0, os.SEEK_END)
+    file_size = f.tell()
+    offset = 0
+    moov = None
+    while offset + 8 <= file_size:
+        f.seek(offset)
+        size, atom_type = struct.unpack('>I4s', f.read(8))
+        if size == 1:
+            size, = struct.unpack('>Q', f.read(8))
+        elif size == 0:
+            size = file_size - offset
+        if size < 8:
+            return
+        if atom_type == b'moov':
+            f.seek(offset)
+            moov = f.read(size)
+            break
+        offset += size
+    if not moov:
+        return
+
+    def find(data, start, end, path):
+        for atom_type, body_start, body_end in _iter_mp4_atoms(data, start, end):
+            if atom_type == path[0]:
+                if len(path) == 1:
+                    return body_start, body_end
+                # meta 아톰은 4바이트 version/flags 뒤에 하위 아톰이 시작됨
+                child_start = body_start + 4 if atom_type == b'meta' else body_start
+                return find(data, child_start, body_end, path[1:])
+        return None
+
+    mvhd = find(moov, 8, len(moov), [b'mvhd'])
+    if mvhd:
+        version = moov[mvhd[0]]
+        if version == 1:
+            timescale, duration = struct.unpack_from('>IQ', moov, mvhd[0] + 20)
+        else:
+            timescale, duration = struct.unpack_from('>II', moov, mvhd[0] + 12)
+        if timescale:
+            result['duration'] = duration / timescale
+
+    ilst = find(moov, 8, len(moov), [b'udta', b'meta', b'ilst'])
+    if ilst:
+        for atom_type, body_start, body_end in _iter_mp4_atoms(moov, *ilst):
+            key = {b'\xa9nam': 'title', b'\xa9ART': 'artist'}.get(atom_type)
+            data_atom = find(moov, body_start, body_end, [b'data']) if key else None
+            if data_atom:
+                result[key] = moov[data_atom[0] + 8:data_atom[1]].decode('utf-8', errors='replace').strip() or None
+
+
+_PROBERS = {
+    '.mp3': _probe_mp3, '.flac': _probe_flac, '.ogg': _probe_ogg, '.oga': _probe_ogg, '.opus': _probe_ogg,
+    '.wav': _probe_wav, '.m4a': _probe_mp4, '.mp4': _probe_mp4, '.aac': _probe_mp4,
+}
+
+
+def probe_audio_file(path):
+    """
+    오디오를 디코딩하지 않고 헤더만 읽어 제목/아티스트/길이 정보를 반환
+    파싱에 실패한 항목은 None으로 남김
+    """
+    path = Path(path)
+    result = _empty_probe(path)
+    prober = _PROBERS.get(path.suffix.lower())
+    if not prober:
+        return result
+    try:
+        with open(path, 'rb') as f:
+            prober(f, result)
+    except (OSError, struct.error, IndexError, ValueError, KeyError):
+        pass
+    return result
+
+
+class LibraryScanner:
+    def __init__(self, progress_callback=None, max_workers=None):
+        self.progress_callback = progress_callback
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+
+    def _log(self, message):
+        if self.progress_callback:
+            self.progress_callback(message)
+
+    @staticmethod
+    def iter_audio_files(folder):
+        """폴더를 재귀적으로 탐색하여 오디오 파일 경로를 이름순으로 반환"""
+        stack = [Path(folder)]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = sorted(os.scandir(directory), key=lambda e: e.name.lower())
+            except OSError:
+                continue
+            subdirectories = []
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(Path(entry.path))
+                elif Path(entry.name).suffix.lower() in AUDIO_EXTENSIONS:
+                    yield Path(entry.path)
+            stack.extend(reversed(subdirectories))
+
+    @staticmethod
+    def make_song_info(probe):
+        """프로브 결과로 스테이션에 추가할 곡 정보 생성"""
+        from media_processor import song_file_name  # media_processor가 이 모듈을 import하므로 여기서 가져옴
+
+        path = Path(probe['path'])
+        title = probe['title'] or path.stem
+        # 영어명은 파일 이름(영문/숫자 외 문자는 제거)으로 쓰이므로 정리한 이름에 영문자가 없으면("사랑 2" → "2") 파일명, CRC 순으로 대체
+        for english_name in (title, path.stem, f"track_{zlib.crc32(str(path).encode('utf-8')):08x}"):
+            if re.search(r'[a-zA-Z]', song_file_name({'english_name': english_name})):
+                break
+        song_info = {
+            'url': str(path),
+            'korean_name': title,
+            'english_name': english_name,
+            'trim_start': 0,
+            'volume': 0.8,
+            'weight': 1,
+            'source': 'local'
+        }
+        if probe['artist']:
+            song_info['artist'] = probe['artist']
+        if probe['duration']:
+            song_info['source_duration'] = round(probe['duration'], 2)
+        return song_info
+
+    def scan_folder(self, folder, on_batch, batch_size=200):
+        """
+        폴더 내 모든 오디오 파일을 병렬로 프로브하여 곡 정보를 batch_size 단위로 on_batch에 전달
+        전체 곡 수를 반환
+        """
+        self._log(f"📂 폴더 탐색 시작: {folder}")
+        paths = list(self.iter_audio_files(folder))
+        self._log(f"  총 {len(paths)}개의 오디오 파일을 발견했습니다.")
+        if not paths:
+            return 0
+
+        batch = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # map은 병렬로 실행하면서도 결과를 폴더 순서대로 돌려줌
+            for done_count, probe in enumerate(executor.map(probe_audio_file, paths), 1):
+                batch.append(self.make_song_info(probe))
+                if len(batch) >= batch_size:
+                    on_batch(batch)
+                    self._log(f"  + {done_count}/{len(paths)} 프로브 완료")
+                    batch = []
+        if batch:
+            on_batch(batch)
+        self._log(f"✅ 폴더 가져오기 완료: {len(paths)}곡")
+        return len(paths)
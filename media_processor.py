@@ -1,34 +1,92 @@
 # -*- coding: utf-8 -*-
+import os
 import re
 import subprocess
+import uuid
+import zlib
+from contextlib import nullcontext
 from pathlib import Path
-from pytubefix import YouTube
 from pydub import AudioSegment
 from PIL import Image
+from library_scanner import probe_audio_file
+from resource_scheduler import estimate_peak_memory
+from media_sources import create_media_source
+from encoders import encoder_for_output_dir, decode_audio
+from fingerprint import DuplicateSongError, fingerprint_audio_segment
+
+def song_file_name(song_info):
+    """곡 정보에서 OGG 파일 이름(확장자 제외) 결정: 기존 이름 → 영어명 → 한글명 순"""
+    if song_info.get('name'):
+        return song_info['name']
+    if song_info.get('english_name'):
+        return re.sub(r'[^a-zA-Z0-9_]', '_', song_info['english_name'].lower().replace(' ', '_')).strip('_')
+    if song_info.get('korean_name'):
+        return MediaProcessor.sanitize_filename(song_info['korean_name'])
+    return "unknown_song"
+
+
+def unique_song_names(songs, existing_songs=()):
+    """
+    같은 스테이션 안에서 OGG 파일 이름이 겹치는 곡의 영어명에 아티스트 또는 원본 경로의 짧은 해시를 붙여 구분 (곡 정보를 직접 수정)
+    이미 변환되어 이름(name)이 정해진 곡은 바꾸지 않음. 영어명을 바꾼 곡 목록을 반환
+    """
+    def key(song):
+        return re.sub(r'_{2,}', '_', song_file_name(song))
+
+    taken = {key(song) for song in existing_songs}
+    taken.update(key(song) for song in songs if song.get('name'))
+    renamed = []
+    for song in songs:
+        if song.get('name'):
+            continue
+        english_name = song.get('english_name') or ''
+        candidates = [english_name]
+        if english_name and song.get('artist'):
+            candidates.append(f"{english_name} {song['artist']}")
+        if english_name:
+            candidates.append(f"{english_name} {zlib.crc32(song.get('url', '').encode('utf-8')):08x}")
+            candidates.extend(f"{english_name} {index}" for index in range(2, len(songs) + len(taken) + 2))
+        for candidate in candidates:
+            if key({**song, 'english_name': candidate}) not in taken:
+                break
+        if candidate != english_name:
+            song['english_name'] = candidate
+            renamed.append(song)
+        taken.add(key(song))
+    return renamed
+
 
 class MediaProcessor:
-    def __init__(self, output_dir, station_name, progress_callback=None):
+    def __init__(self, output_dir, station_name, progress_callback=None, memory_budget=None, source=None, fingerprint_check=None):
+        """
+        fingerprint_check: 디코딩된 곡의 지문과 'station/name.ogg' 경로로 호출되는 콜백
+                           중복 곡을 병합해야 하면 DuplicateSongError를 발생시켜 인코딩을 건너뜀
+        """
         self.output_dir = Path(output_dir)
         self.station_name = station_name
         self.progress_callback = progress_callback
+        self.memory_budget = memory_budget
+        self.source = source or create_media_source()
+        self.fingerprint_check = fingerprint_check
+        self.encoder = None
 
     def _log(self, message):
         if self.progress_callback:
             self.progress_callback(message)
 
-    def sanitize_filename(self, filename):
+    @staticmethod
+    def sanitize_filename(filename):
         """파일명에서 특수문자 제거 및 언더스코어로 변환"""
         sanitized = re.sub(r'[^\w가-힣\s]', '_', filename)
         sanitized = re.sub(r'\s+', '_', sanitized)
         sanitized = re.sub(r'_{2,}', '_', sanitized)
         return sanitized.strip('_')
 
-    def download_progress_callback(self, stream, chunk, bytes_remaining):
+    def download_progress_callback(self, chunk_size, bytes_remaining, total_size):
         """다운로드 진행률 표시"""
-        if not self.progress_callback:
+        if not self.progress_callback or not total_size:
             return
             
-        total_size = stream.filesize
         bytes_downloaded = total_size - bytes_remaining
         percentage = (bytes_downloaded / total_size) * 100
         
@@ -38,74 +96,128 @@ class MediaProcessor:
         
         self._log(f'  진행률: |{bar}| {percentage:.1f}%')
 
-    def download_and_convert_song(self, url, korean_name=None, english_name=None, trim_start=0, volume=0.8):
+    def song_names(self, korean_name, english_name, original_title):
+        """입력된 이름과 원본 제목으로 (표시명, 영어 표시명, 파일명) 결정"""
+        if korean_name and english_name:
+            display_name, english_display, file_name = korean_name, english_name, english_name.lower().replace(' ', '_')
+        elif korean_name:
+            display_name, english_display, file_name = korean_name, original_title, self.sanitize_filename(korean_name)
+        elif english_name:
+            display_name, english_display, file_name = english_name, english_name, english_name.lower().replace(' ', '_')
+        else:
+            display_name, english_display, file_name = original_title, original_title, self.sanitize_filename(original_title)
+
+        file_name = re.sub(r'[^a-zA-Z0-9_]', '_', file_name)
+        file_name = re.sub(r'_{2,}', '_', file_name).strip('_')
+        return display_name, english_display, file_name
+
+    def download_and_convert_song(self, url, korean_name=None, english_name=None, trim_start=0, volume=0.8,
+                                  on_chunk=None, raise_errors=False, encoding=None, on_transfer_done=None):
         """
         유튜브 URL에서 음악을 다운로드하고 OGG로 변환
+        on_chunk: 받은 청크 크기(바이트)로 호출되는 콜백 (처리량 측정/대역폭 제한용)
+        on_transfer_done: 다운로드가 끝나고 변환을 시작하기 전에 호출되는 콜백
+        raise_errors: True면 실패 시 None 대신 예외를 다시 발생시킴
+        encoding: quality/channels/sample_rate 인코딩 설정 (없으면 기본 품질 5)
         """
+        def on_progress(chunk_size, bytes_remaining, total_size):
+            if on_chunk:
+                on_chunk(chunk_size)
+            self.download_progress_callback(chunk_size, bytes_remaining, total_size)
+
         try:
             self._log(f"\n🎵 다운로드 시작: {url}")
             
-            yt = YouTube(url, on_progress_callback=self.download_progress_callback)
-            original_title = yt.title
-            
-            if korean_name and english_name:
-                display_name, english_display, file_name = korean_name, english_name, english_name.lower().replace(' ', '_')
-            elif korean_name:
-                display_name, english_display, file_name = korean_name, original_title, self.sanitize_filename(korean_name)
-            elif english_name:
-                display_name, english_display, file_name = english_name, english_name, english_name.lower().replace(' ', '_')
-            else:
-                display_name, english_display, file_name = original_title, original_title, self.sanitize_filename(original_title)
+            media = self.source.open(url, on_progress=on_progress)
+            original_title = media.title
             
-            file_name = re.sub(r'[^a-zA-Z0-9_]', '_', file_name)
-            file_name = re.sub(r'_{2,}', '_', file_name).strip('_')
+            display_name, english_display, file_name = self.song_names(korean_name, english_name, original_title)
             
             self._log(f"  원본 제목: {original_title}")
             self._log(f"  표시명 (한글): {display_name}")
             self._log(f"  영어명: {english_display}")
             self._log(f"  파일명: {file_name}")
-            self._log(f"  길이: {yt.length}초 ({yt.length//60}:{yt.length%60:02d})")
+            self._log(f"  길이: {media.length}초 ({media.length//60}:{media.length%60:02d})")
             if trim_start > 0: self._log(f"  ✂️  시작 {trim_start}초 자르기")
             
-            audio_stream = yt.streams.filter(only_audio=True).order_by('abr').desc().first()
-            if not audio_stream: raise Exception("오디오 스트림을 찾을 수 없습니다.")
-            
             temp_dir = self.output_dir / "temp"
             temp_dir.mkdir(exist_ok=True)
-            temp_file = audio_stream.download(output_path=temp_dir, filename=f"{file_name}_temp.{audio_stream.subtype}")
+            # 여러 방송국의 같은 이름 곡을 동시에 받아도 임시 파일이 겹치지 않도록 방송국 이름과 uuid를 붙임
+            temp_file = media.download(temp_dir, f"{self.station_name}_{file_name}_{uuid.uuid4().hex[:8]}_temp")
+            if on_transfer_done:
+                on_transfer_done()
             
             ogg_path = self.output_dir / "music" / self.station_name / f"{file_name}.ogg"
-            self.convert_to_ogg(temp_file, ogg_path, trim_start=trim_start)
-            
-            Path(temp_file).unlink()
+            duplicate_of = None
+            try:
+                self.convert_to_ogg(temp_file, ogg_path, trim_start=trim_start, duration=media.length, **(encoding or {}))
+            except DuplicateSongError as e:
+                self._log(f"  🔁 중복 곡이므로 변환하지 않습니다: {e}")
+                duplicate_of = e.duplicate_of
+            finally:
+                Path(temp_file).unlink()
             
-            final_duration = max(0, yt.length - trim_start)
+            final_duration = max(0, media.length - trim_start)
             song_info = {
                 'name': file_name, 'display_name': display_name, 'english_display': english_display,
                 'original_title': original_title, 'file_path': f"{self.station_name}/{file_name}.ogg",
-                'duration': final_duration, 'original_duration': yt.length,
+                'duration': final_duration, 'original_duration': media.length,
                 'trim_start': trim_start, 'url': url, 'volume': volume
             }
-            
-            self._log(f"  ✅ 완료: {ogg_path}")
+            if encoding: song_info['encoding'] = encoding
+            if duplicate_of:
+                song_info['duplicate_of'] = duplicate_of
+            else:
+                self._log(f"  ✅ 완료: {ogg_path}")
             return song_info
             
         except Exception as e:
             self._log(f"  ❌ 실패: {str(e)}")
+            if raise_errors:
+                raise
             return None
 
-    def convert_to_ogg(self, input_file, output_file, quality=5, trim_start=0):
-        """오디오 파일을 OGG로 변환"""
-        self._log(f"  🔄 OGG 변환 중...")
-        audio = AudioSegment.from_file(input_file)
-        
-        if trim_start > 0:
-            trim_start_ms = trim_start * 1000
-            if trim_start_ms < len(audio):
-                audio = audio[trim_start_ms:]
-                self._log(f"    ✂️  시작 {trim_start}초 제거됨")
-        
-        audio.export(output_file, format="ogg", codec="libvorbis", parameters=["-q:a", str(quality)])
+    def estimate_conversion_memory(self, input_file, duration=None):
+        """헤더 정보(길이, 샘플레이트, 채널 수)로 변환 시 최대 메모리 사용량 추정"""
+        probe = probe_audio_file(input_file)
+        return estimate_peak_memory(probe['duration'] or duration, probe['sample_rate'], probe['channels'])
+
+    def convert_to_ogg(self, input_file, output_file, quality=5, trim_start=0, duration=None, channels=None, sample_rate=None):
+        """
+        오디오 파일을 OGG로 변환하고 원본 길이(초)를 반환
+        channels=1이면 모노로 다운믹스, sample_rate를 주면 리샘플링
+        메모리 예산이 설정되어 있으면 예산 안에서 실행될 때까지 대기
+        fingerprint_check가 있으면 자르기 후 인코딩 전에 지문을 계산하여 전달 (중복이면 DuplicateSongError)
+        """
+        if self.memory_budget:
+            reservation = self.memory_budget.reserve(self.estimate_conversion_memory(input_file, duration))
+        else:
+            reservation = nullcontext()
+
+        with reservation:
+            self._log(f"  🔄 OGG 변환 중...")
+            audio = decode_audio(input_file)
+            original_duration = len(audio) / 1000 # pydub 길이는 ms 단위
+            
+            if trim_start > 0:
+                trim_start_ms = trim_start * 1000
+                if trim_start_ms < len(audio):
+                    audio = audio[trim_start_ms:]
+                    self._log(f"    ✂️  시작 {trim_start}초 제거됨")
+
+            if self.fingerprint_check:
+                try:
+                    self.fingerprint_check(fingerprint_audio_segment(audio), f"{self.station_name}/{Path(output_file).name}")
+                except DuplicateSongError as e:
+                    e.original_duration = original_duration
+                    raise
+            
+            encoder = self.encoder or encoder_for_output_dir(self.output_dir, self.progress_callback)
+            # 임시 파일에 쓰고 교체하여, 캐시와 하드 링크된 기존 파일을 덮어쓰지 않음
+            temp_output = Path(output_file).with_name(f"{Path(output_file).name}.tmp")
+            encoder.encode(audio, temp_output, {'quality': quality, 'channels': channels, 'sample_rate': sample_rate})
+            os.replace(temp_output, output_file)
+        return original_duration
 
     def process_album_art(self, image_path):
         """앨범 아트 이미지를 처리하여 DDS 파일 생성"""
@@ -185,7 +297,7 @@ class MediaProcessor:
         self._log("    ❌ 모든 DDS 자동 변환 방법에 실패했습니다.")
         return False
 
-    def process_local_song(self, song_info):
+    def process_local_song(self, song_info, encoding=None):
         """
         로컬 오디오 파일을 OGG로 변환
         """
@@ -207,14 +319,16 @@ class MediaProcessor:
             self._log(f"  파일명: {file_name}")
             if trim_start > 0: self._log(f"  ✂️  시작 {trim_start}초 자르기")
 
-            # 오디오 파일 로드 및 길이 확인
-            audio = AudioSegment.from_file(local_path)
-            original_duration = len(audio) / 1000 # pydub 길이는 ms 단위
-            self._log(f"  원본 길이: {original_duration:.0f}초 ({int(original_duration)//60}:{int(original_duration)%60:02d})")
-
-            # OGG로 변환
+            # OGG로 변환 (디코딩은 한 번만 하고 변환 과정에서 원본 길이를 얻음)
             ogg_path = self.output_dir / "music" / self.station_name / f"{file_name}.ogg"
-            self.convert_to_ogg(local_path, ogg_path, trim_start=trim_start)
+            duplicate_of = None
+            try:
+                original_duration = self.convert_to_ogg(local_path, ogg_path, trim_start=trim_start,
+                                                        duration=song_info.get('source_duration'), **(encoding or {}))
+            except DuplicateSongError as e:
+                self._log(f"  🔁 중복 곡이므로 변환하지 않습니다: {e}")
+                original_duration, duplicate_of = e.original_duration, e.duplicate_of
+            self._log(f"  원본 길이: {original_duration:.0f}초 ({int(original_duration)//60}:{int(original_duration)%60:02d})")
 
             # 최종 곡 정보 생성
             final_duration = max(0, original_duration - trim_start)
@@ -231,8 +345,11 @@ class MediaProcessor:
                 'volume': volume,
                 'source': 'local'
             }
-
-            self._log(f"  ✅ 완료: {ogg_path}")
+            if encoding: processed_song_info['encoding'] = encoding
+            if duplicate_of:
+                processed_song_info['duplicate_of'] = duplicate_of
+            else:
+                self._log(f"  ✅ 완료: {ogg_path}")
             return processed_song_info
 
         except Exception as e:
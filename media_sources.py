@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import urllib.request
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+from pytubefix import YouTube, Playlist, extract
+
+MEDIA_SOURCE_ENV = "HOI4_MUSIC_MEDIA_SOURCE"
+
+
+def video_id_from_url(url):
+    """영상 URL(...?v=<id>, youtu.be/<id>)에서 영상 ID 추출. 알 수 없으면 None"""
+    parsed = urlparse(url)
+    values = parse_qs(parsed.query).get('v')
+    if values:
+        return values[0]
+    if parsed.netloc.endswith('youtu.be') and parsed.path.strip('/'):
+        return parsed.path.strip('/').split('/')[0]
+    return None
+
+
+def playlist_id_from_url(url):
+    values = parse_qs(urlparse(url).query).get('list')
+    return values[0] if values else None
+
+
+class YouTubeMedia:
+    def __init__(self, yt):
+        self.yt = yt
+        self.title = yt.title
+        self.length = yt.length
+
+    def download(self, output_dir, file_stem):
+        audio_stream = self.yt.streams.filter(only_audio=True).order_by('abr').desc().first()
+        if not audio_stream: raise Exception("오디오 스트림을 찾을 수 없습니다.")
+        return audio_stream.download(output_path=output_dir, filename=f"{file_stem}.{audio_stream.subtype}")
+
+
+class YouTubeSource:
+    """pytubefix로 유튜브에서 메타데이터와 오디오 스트림을 가져오는 기본 소스"""
+    def open(self, url, on_progress=None):
+        def progress_adapter(stream, chunk, bytes_remaining):
+            if on_progress:
+                on_progress(len(chunk), bytes_remaining, stream.filesize)
+
+        return YouTubeMedia(YouTube(url, on_progress_callback=progress_adapter))
+
+    def list_playlist(self, playlist_url, progress_callback=None):
+        """재생목록의 영상 목록을 [{'url', 'title'}] 형태로 반환 (정보를 가져오지 못한 영상은 로그를 남기고 건너뜀)"""
+        videos = []
+        for video in Playlist(playlist_url).videos:
+            try:
+                videos.append({'url': video.watch_url, 'title': video.title})
+            except Exception as e:
+                if progress_callback:
+                    progress_callback(f"  - 영상 정보 가져오기 실패: {e}")
+        return videos
+
+    def list_playlist_entries(self, playlist_url):
+        """
+        재생목록의 영상 ID와 URL만 순서대로 [{'video_id', 'url', 'title'}]로 반환
+        영상마다 페이지를 불러오지 않도록 제목은 None (필요한 영상만 video_title로 조회)
+        """
+        return [{'video_id': extract.video_id(url), 'url': url, 'title': None} for url in Playlist(playlist_url).video_urls]
+
+    def video_title(self, url):
+        return YouTube(url).title
+
+
+class HTTPMedia:
+    def __init__(self, source, video_id, metadata, on_progress):
+        self.source = source
+        self.video_id = video_id
+        self.title = metadata['title']
+        self.length = metadata['length']
+        self.subtype = metadata.get('subtype', 'wav')
+        self.on_progress = on_progress
+
+    def download(self, output_dir, file_stem):
+        output_path = Path(output_dir) / f"{file_stem}.{self.subtype}"
+        with urllib.request.urlopen(f"{self.source.base_url}/stream/{self.video_id}", timeout=self.source.timeout) as response:
+            total_size = int(response.headers.get('Content-Length', 0))
+            received = 0
+            with open(output_path, 'wb') as f:
+                while True:
+                    chunk = response.read(self.source.chunk_size)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    received += len(chunk)
+                    if self.on_progress:
+                        self.on_progress(len(chunk), max(0, total_size - received), total_size)
+        if total_size and received < total_size:
+            raise IOError(f"전송이 중간에 끊어졌습니다. ({received}/{total_size} 바이트)")
+        return str(output_path)
+
+
+class HTTPMediaSource:
+    """
+    유튜브 대신 HTTP 서버(fake_media_server 등)에서 메타데이터와 오디오를 가져오는 소스
+    영상 URL은 ...?v=<id>, 재생목록 URL은 ...?list=<id> 형식을 사용
+    """
+    def __init__(self, base_url, chunk_size=64 * 1024, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+
+    def _get_json(self, path):
+        with urllib.request.urlopen(f"{self.base_url}{path}", timeout=self.timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+    @staticmethod
+    def _query_param(url, name):
+        values = parse_qs(urlparse(url).query).get(name)
+        if not values:
+            raise ValueError(f"URL에 '{name}' 값이 없습니다: {url}")
+        return values[0]
+
+    def open(self, url, on_progress=None):
+        video_id = self._query_param(url, 'v')
+        return HTTPMedia(self, video_id, self._get_json(f"/api/video/{video_id}"), on_progress)
+
+    def list_playlist(self, playlist_url, progress_callback=None):
+        playlist_id = self._query_param(playlist_url, 'list')
+        return self._get_json(f"/api/playlist/{playlist_id}")['videos']
+
+    def list_playlist_entries(self, playlist_url):
+        return [{'video_id': video_id_from_url(video['url']), 'url': video['url'], 'title': video['title']}
+                for video in self.list_playlist(playlist_url)]
+
+    def video_title(self, url):
+        return self._get_json(f"/api/video/{self._query_param(url, 'v')}")['title']
+
+
+def create_media_source():
+    """환경 변수 HOI4_MUSIC_MEDIA_SOURCE에 서버 주소가 있으면 HTTP 소스, 없으면 유튜브 소스를 반환"""
+    base_url = os.environ.get(MEDIA_SOURCE_ENV)
+    return HTTPMediaSource(base_url) if base_url else YouTubeSource()
@@ -0,0 +1,873 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from mod_generator import HOI4MusicModGenerator
+from file_writer import FileWriter, MultiStationFileWriter
+from station_analyzer import shard_stations, merge_shards, is_shard_folder
+from media_processor import song_file_name, unique_song_names
+from build_planner import BuildHistory
+from encoders import encoder_for_output_dir
+from ogg_verifier import OggVerifier
+from job_queue import JobQueue, PENDING, DONE, FAILED
+from download_scheduler import DownloadScheduler
+from resource_scheduler import (MemoryBudget, DEFAULT_MEMORY_BUDGET_MB, PauseController, ThroughputMeter, BuildCancelled,
+                                background_worker_count, lower_current_thread_priority)
+from encoding_profiles import resolve_encoding, song_duration, predict_size, plan_target_size, encoding_matches
+from library_scanner import LibraryScanner, probe_audio_file
+from fingerprint import FingerprintIndex, DuplicateSongError, encode_fingerprint, decode_fingerprint
+from transcode_cache import song_cache_key, art_cache_key, link_or_copy
+from playlist_sync import REMOVED_FLAG
+
+SONG_JOB_KINDS = ('convert', 'download')
+# flag: 중복 의심 곡도 변환하고 duplicate_of만 기록 / merge: 중복 곡은 인코딩하지 않고, 다른 스테이션의 원본 파일을 재생하도록 모드 파일에 씀 (같은 스테이션 안의 중복은 제외)
+DEDUPE_MODES = ('flag', 'merge')
+# 변환 캐시에 곡 파일과 함께 저장하는 원본 정보 (이름/경로는 곡마다 다르므로 재사용할 때 다시 계산)
+CACHED_SONG_FIELDS = ('original_title', 'duration', 'original_duration', 'fingerprint')
+
+
+class ModBuilder:
+    """
+    모드 생성 과정을 디스크에 저장되는 작업 큐(다운로드, 변환, 앨범 아트, 파일 작성, 패키징)로 실행
+    앱이 종료되어도 build_queue.json을 통해 중단된 지점부터 이어서 진행할 수 있음
+    """
+    STATE_FILE_NAME = "build_queue.json"
+
+    def __init__(self, output_dir, stations, progress_callback=None, zip_mod=False,
+                 max_downloads=4, bandwidth_limit=None, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, max_encoders=None,
+                 source=None, target_size_mb=None, dedupe_mode='flag', transcode_cache=None, memory_budget=None,
+                 encode_executor=None, download_scheduler=None, history=None, shard_max_songs=None, shard_max_decoded_mb=None,
+                 background=False, pause_controller=None):
+        """
+        transcode_cache, memory_budget, encode_executor, download_scheduler를 주면 여러 ModBuilder가
+        변환 결과, 메모리 예산, 변환 스레드 풀, 다운로드 동시성 상태를 공유 (batch_build에서 사용)
+        background이면 작업자 수를 코어의 일부로 제한하고, 이 빌더가 만드는 작업 스레드의 CPU/디스크 우선순위를 낮춤 (게임 실행 중 빌드용)
+        호출한 쪽의 스레드와 전달받은 encode_executor의 스레드는 건드리지 않음 (공유 풀은 만든 쪽에서 우선순위를 정함)
+        """
+        self.output_dir = Path(output_dir)
+        self.stations = stations
+        self.progress_callback = progress_callback
+        self.zip_mod = zip_mod
+        self.max_downloads = max_downloads
+        self.bandwidth_limit = bandwidth_limit
+        self.max_encoders = max_encoders or os.cpu_count() or 1
+        self.background = background
+        if background:
+            self.max_encoders = background_worker_count(self.max_encoders)
+            self.max_downloads = background_worker_count(self.max_downloads)
+        self.pause_controller = pause_controller or PauseController()
+        self._throughput = None
+        self.memory_budget = memory_budget or MemoryBudget(memory_budget_mb * 1024 * 1024, progress_callback)
+        self.source = source
+        self.target_size_mb = target_size_mb
+        self.dedupe_mode = dedupe_mode
+        self.shard_max_songs = shard_max_songs
+        self.shard_max_decoded_mb = shard_max_decoded_mb
+        self.fingerprints = FingerprintIndex()
+        self._fingerprint_results = {}
+        self._fingerprints_loaded = False
+        self.transcode_cache = transcode_cache
+        self.encode_executor = encode_executor
+        self.download_scheduler = download_scheduler
+        self.cache_hits = 0
+        self.cancelled = False  # 취소로 중단되어 run()이 패키징 없이 끝났는지 여부
+        self.history = history or BuildHistory.for_output_dir(self.output_dir)
+        self._cached_job_ids = set()
+        self.queue = JobQueue(self.output_dir / self.STATE_FILE_NAME, progress_callback)
+        self.file_writer = MultiStationFileWriter(self.output_dir, progress_callback)
+        self._generators = {}
+        self._progress = {}
+        self._progress_lock = threading.Lock()
+        for base_name in merge_shards(self.stations):
+            self._log(f"🔗 나뉘어 저장된 스테이션 '{base_name}'을(를) 하나로 합쳤습니다.")
+
+    def _log(self, message):
+        if self.progress_callback:
+            self.progress_callback(message)
+
+    def has_resumable_state(self):
+        """이전 실행에서 끝나지 않았거나 실패한 작업이 남아 있는지 확인"""
+        probe = JobQueue(self.output_dir / self.STATE_FILE_NAME)
+        try:
+            return probe.load(compact=False) and probe.has_unfinished_work()
+        except (OSError, ValueError):
+            return False
+
+    def prepare(self, resume=False, retry_job_ids=None):
+        """
+        작업 큐 준비. resume이면 저장된 상태를 불러와 실패 작업(retry_job_ids 지정 시 해당 작업만)을 재시도
+        """
+        if resume and self.has_resumable_state() and self.queue.load():
+            self.stations = self.queue.metadata.get('stations', self.stations)
+            self.queue.metadata['stations'] = self.stations
+            # 작업 상태는 저널로만 저장되므로 이미 끝난 write 작업의 곡 결과를 스테이션에 다시 반영
+            for job in self.queue.jobs:
+                if job['kind'] == 'write' and job['state'] == DONE:
+                    self._store_station_songs(job)
+            self.zip_mod = self.queue.metadata.get('zip_mod', self.zip_mod)
+            retried = self.queue.retry_failed(job_ids=retry_job_ids)
+            summary = self.queue.summary()
+            self._log(f"🔁 이전 작업 이어서 진행: 완료 {summary[DONE]}개, 대기 {summary[PENDING]}개 (재시도 {retried}개)")
+        else:
+            self._create_jobs()
+        self._build_fingerprint_index()
+
+    def _build_fingerprint_index(self, songs=None):
+        """
+        이미 변환된 곡(이전 빌드 결과 포함)의 저장된 지문으로 중복 검사 색인을 구성
+        songs를 주지 않으면 작업 큐의 완료된 곡 작업 결과를 사용
+        """
+        if songs is None:
+            songs = [job['result'] for job in self.queue.jobs
+                     if job['kind'] in SONG_JOB_KINDS and job['state'] == DONE and job.get('result')]
+        self.fingerprints = FingerprintIndex()
+        self._fingerprints_loaded = True
+        for song in songs:
+            if song.get('fingerprint') and song.get('file_path') and not song.get('duplicate_of'):
+                self.fingerprints.add(song['file_path'], decode_fingerprint(song['fingerprint']))
+        if len(self.fingerprints):
+            self._log(f"🔎 지문 색인 구성 완료: {len(self.fingerprints)}곡")
+
+    def _check_fingerprint(self, fingerprint, file_path):
+        """MediaProcessor가 인코딩 직전에 호출. 중복이면 기록하고, 병합 모드에서는 DuplicateSongError로 인코딩을 중단"""
+        match = self.fingerprints.find_or_add(file_path, fingerprint)
+        info = {'fingerprint': encode_fingerprint(fingerprint)}
+        if match:
+            info['duplicate_of'] = match[0]
+            self._log(f"  🔁 중복 의심: '{match[0]}'와(과) 같은 곡으로 보입니다. (비트 오류율 {match[1]:.2f})")
+        self._fingerprint_results[file_path] = info
+        if match and self.dedupe_mode == 'merge':
+            raise DuplicateSongError(*match)
+
+    def _with_fingerprint(self, song_info):
+        song_info.pop('duplicate_of', None)
+        song_info.update(self._fingerprint_results.pop(song_info.get('file_path'), {}))
+        return song_info
+
+    def _generator(self, station_name):
+        if station_name not in self._generators:
+            self._generators[station_name] = HOI4MusicModGenerator(
+                station_name=station_name,
+                output_dir=self.output_dir,
+                progress_callback=self.progress_callback,
+                memory_budget=self.memory_budget,
+                source=self.source,
+                fingerprint_check=self._check_fingerprint if self.dedupe_mode in DEDUPE_MODES else None
+            )
+        return self._generators[station_name]
+
+    def _create_jobs(self):
+        self.queue.clear()
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        build_stations = self._shard_stations()
+        self.queue.metadata = {'stations': self.stations, 'zip_mod': self.zip_mod, 'created_at': time.time()}
+
+        write_job_ids = []
+        for station_name, station_data in build_stations.items():
+            songs_list = station_data.get("songs", [])
+            if not songs_list:
+                self._log(f"⚠️ 스테이션 '{station_name}'에 곡이 없어 건너뜁니다.")
+                continue
+
+            deps = []
+            album_art_path = station_data.get("album_art", "").strip()
+            if album_art_path and Path(album_art_path).exists():
+                deps.append(self.queue.add('art', station_name, {'image_path': album_art_path})['id'])
+            else:
+                self._log(f"  - '{station_name}' 앨범 아트가 지정되지 않았거나 경로가 올바르지 않아 건너뜁니다.")
+
+            deps.extend(self._create_song_jobs(station_name, songs_list, resolve_encoding(station_data)))
+            payload = {'shard_of': station_data['shard_of']} if station_data.get('shard_of') else None
+            write_job_ids.append(self.queue.add('write', station_name, payload, deps=deps)['id'])
+
+        self.queue.add('package', deps=write_job_ids)
+        self._plan_encoding_sizes()
+        self.queue.save()
+
+    def _shard_stations(self, only=None):
+        """
+        예산을 넘는 스테이션을 하위 스테이션으로 나눈 빌드용 스테이션 딕셔너리를 반환 (self.stations와 곡 정보는 바꾸지 않음)
+        이미 변환된 OGG는 새 스테이션 폴더로 옮겨 다시 변환하지 않도록 하고,
+        이번 빌드에 없는 스테이션(이전에 나뉘었던 하위 스테이션 등)의 모드 파일은 게임이 빈 스테이션을 불러오지 않도록 삭제
+        only를 주면 그 스테이션(과 하위 스테이션)만 다룸 (감시 폴더 갱신용. 하위 스테이션 이름은 전체 빌드와 같음)
+        """
+        sharded, origins = shard_stations(self.stations, self.shard_max_songs, self.shard_max_decoded_mb)
+        base_names = [only] if only else list(self.stations)
+        build_stations = {name: {**data, 'songs': [dict(song) for song in data.get('songs', [])]}
+                          for name, data in sharded.items() if origins.get(name, name) in base_names}
+        origins = {name: origin for name, origin in origins.items() if name in build_stations}
+        # 같은 파일 이름의 곡을 동시에 변환하지 않도록 원래 스테이션 단위로 이름을 구분 (바뀐 영어명은 write 작업이 반영)
+        for base_name in base_names:
+            unique_song_names([song for name, data in build_stations.items() if origins.get(name, name) == base_name
+                               for song in data['songs']])
+
+        moved = {}
+        for station_name, station_data in build_stations.items():
+            base_name = origins.get(station_name, station_name)
+            for song in station_data['songs']:
+                old_path = song.get('file_path')
+                if not old_path or not is_shard_folder(Path(old_path).parent.name, base_name, self.stations) \
+                        or Path(old_path).parent.name == station_name:
+                    continue
+                new_path = f"{station_name}/{Path(old_path).name}"
+                source, destination = self.output_dir / "music" / old_path, self.output_dir / "music" / new_path
+                if source.exists() and not destination.exists():
+                    destination.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(source, destination)
+                song['file_path'] = moved[old_path] = new_path
+        for station_data in build_stations.values():
+            for song in station_data['songs']:
+                if song.get('duplicate_of') in moved:
+                    song['duplicate_of'] = moved[song['duplicate_of']]
+
+        music_dir = self.output_dir / "music"
+        stale = [name for name in base_names if name not in build_stations]
+        if music_dir.is_dir():
+            stale.extend(path.name for path in music_dir.iterdir()
+                         if path.is_dir() and path.name not in build_stations and path.name not in self.stations
+                         and any(is_shard_folder(path.name, base_name, self.stations) for base_name in base_names))
+        for station_name in stale:
+            FileWriter(self.output_dir, station_name).remove_files()
+            (self.output_dir / "gfx" / f"{station_name}_album_art.dds").unlink(missing_ok=True)
+            try:
+                (music_dir / station_name).rmdir()
+            except OSError:
+                pass
+
+        for base_name in dict.fromkeys(origins.values()):
+            shard_names = [name for name, origin in origins.items() if origin == base_name]
+            self._log(f"✂️ 스테이션 '{base_name}'을(를) {len(shard_names)}개로 분할: {', '.join(shard_names)}")
+        if moved:
+            self._log(f"  이미 변환된 {len(moved)}곡을 스테이션 폴더로 옮겼습니다.")
+        return build_stations
+
+    def _plan_encoding_sizes(self):
+        """곡별 예상 크기를 계산하고, 목표 용량이 지정되면 그 안에 맞도록 곡별 품질을 조정"""
+        pending = [job for job in self.queue.jobs if job['kind'] in SONG_JOB_KINDS and job['state'] != DONE]
+        existing = [job for job in self.queue.jobs if job['kind'] in SONG_JOB_KINDS and job['state'] == DONE
+                    and (self.output_dir / "music" / job['result']['file_path']).exists()]
+        replannable = [job for job in existing if 'encoding' in job['payload']] if self.target_size_mb else []
+        existing_bytes = sum((self.output_dir / "music" / job['result']['file_path']).stat().st_size
+                             for job in existing if job not in replannable)
+
+        if self.target_size_mb:
+            target_bytes = self.target_size_mb * 1024 * 1024 - existing_bytes
+            items = [(job['id'], song_duration(job['payload']['song']), job['payload']['encoding']) for job in pending + replannable]
+            planned, predicted_total = plan_target_size(items, target_bytes)
+            requeued = [job for job in replannable if not encoding_matches(job['result'].get('encoding'), planned[job['id']])]
+            for job in requeued:
+                job['state'], job['result'] = PENDING, None
+            kept_bytes = sum((self.output_dir / "music" / job['result']['file_path']).stat().st_size
+                             for job in replannable if job not in requeued)
+            existing_bytes += kept_bytes
+            predicted_total -= sum(predict_size(song_duration(job['payload']['song']), planned[job['id']])
+                                   for job in replannable if job not in requeued)
+            target_bytes -= kept_bytes
+            pending.extend(requeued)
+            for job in pending:
+                job['payload']['encoding'] = planned[job['id']]
+            if requeued:
+                self._log(f"🔄 목표 용량에 맞추기 위해 이미 변환된 {len(requeued)}곡을 다른 품질로 다시 변환합니다.")
+            self._log(f"🎯 목표 용량 {self.target_size_mb}MB: 기존 파일 {existing_bytes / 1024 / 1024:.1f}MB, "
+                      f"새로 변환할 {len(pending)}곡 예상 {predicted_total / 1024 / 1024:.1f}MB")
+            if predicted_total > target_bytes:
+                self._log("  ⚠️ 최저 품질로도 목표 용량을 맞출 수 없습니다.")
+
+        for job in pending:
+            job['payload']['predicted_size'] = predict_size(song_duration(job['payload']['song']), job['payload']['encoding'])
+
+    def _report_sizes(self, jobs):
+        """이번 실행에서 변환한 곡의 예상 크기와 실제 크기를 비교하여 출력"""
+        predicted = actual = 0
+        for job in jobs:
+            if job['state'] != DONE or 'predicted_size' not in job['payload']:
+                continue
+            ogg_path = self.output_dir / "music" / job['result']['file_path']
+            if ogg_path.exists():
+                predicted += job['payload']['predicted_size']
+                actual += ogg_path.stat().st_size
+        if actual:
+            error = (actual - predicted) / actual * 100
+            self._log(f"📦 변환 용량: 예상 {predicted / 1024 / 1024:.1f}MB / 실제 {actual / 1024 / 1024:.1f}MB (오차 {error:+.0f}%)")
+
+    def _report_duplicates(self, jobs):
+        duplicates = [job for job in jobs if job['kind'] in SONG_JOB_KINDS and job['state'] == DONE and job['result'].get('duplicate_of')]
+        if not duplicates:
+            return
+        action = "병합됨" if self.dedupe_mode == 'merge' else "변환은 완료, 곡 목록에 표시됨"
+        self._log(f"🔁 중복 의심 곡 {len(duplicates)}개 ({action})")
+        for job in duplicates:
+            self._log(f"  - {job['result']['file_path']} → {job['result']['duplicate_of']}")
+
+    def _create_song_jobs(self, station_name, songs_list, encoding):
+        output_music_dir = self.output_dir / "music" / station_name
+        output_music_dir.mkdir(parents=True, exist_ok=True)
+
+        song_ogg_paths = []
+        for song_info in songs_list:
+            file_name_base = song_file_name(song_info)
+            song_ogg_paths.append((song_info, file_name_base, output_music_dir / f"{file_name_base}.ogg"))
+
+        verify_results = OggVerifier(progress_callback=self.progress_callback).verify_files(p for _, _, p in song_ogg_paths)
+        for ogg_path, (is_valid, _) in verify_results.items():
+            if not is_valid:
+                ogg_path.unlink()
+
+        job_ids = []
+        for song_info, file_name_base, ogg_path in song_ogg_paths:
+            kind = 'convert' if song_info.get('source') == 'local' else 'download'
+            duplicate_of = song_info.get('duplicate_of')
+            if self.dedupe_mode == 'merge' and duplicate_of and (self.output_dir / "music" / duplicate_of).exists():
+                self._log(f"🔁 '{song_info.get('korean_name', file_name_base)}'은(는) '{duplicate_of}'와(과) 중복이므로 건너뜁니다.")
+                job = self.queue.add(kind, station_name, {'song': song_info}, state=DONE, result=dict(song_info))
+            elif song_info.get(REMOVED_FLAG):
+                # 재생목록에서 빠진 곡은 다시 받을 수 없으므로 변환된 파일이 있으면 그대로 쓰고, 없으면 모드에서 제외
+                valid = verify_results.get(ogg_path, (False, ""))[0]
+                if not valid:
+                    self._log(f"⏭️ '{song_info.get('korean_name', file_name_base)}'은(는) 재생목록에서 빠진 곡이므로 건너뜁니다.")
+                result = {'name': file_name_base, 'file_path': f"{station_name}/{file_name_base}.ogg", **song_info}
+                job = self.queue.add(kind, station_name, {'song': song_info}, state=DONE, result=result)
+            elif verify_results.get(ogg_path, (False, ""))[0] and not self.target_size_mb \
+                    and not encoding_matches(song_info.get('encoding'), encoding):
+                self._log(f"🔄 '{song_info.get('korean_name', file_name_base)}'은(는) 인코딩 설정이 바뀌어 다시 변환합니다.")
+                job = self.queue.add(kind, station_name, {'song': song_info, 'encoding': dict(encoding)})
+            elif verify_results.get(ogg_path, (False, ""))[0]:
+                self._log(f"✅ '{song_info.get('korean_name', file_name_base)}' 파일이 이미 존재합니다. 건너뜁니다.")
+                result = dict(song_info)
+                if 'name' not in result:
+                    result['name'] = file_name_base
+                    result['file_path'] = f"{station_name}/{file_name_base}.ogg"
+                # 목표 용량이 있으면 인코딩이 기록된 곡도 계획에 다시 포함하여 계획한 인코딩과 다르면 다시 변환
+                payload = {'song': song_info, 'encoding': dict(encoding)} if song_info.get('encoding') else {'song': song_info}
+                job = self.queue.add(kind, station_name, payload, state=DONE, result=result)
+            else:
+                job = self.queue.add(kind, station_name, {'song': song_info, 'encoding': dict(encoding)})
+            job_ids.append(job['id'])
+        return job_ids
+
+    def run(self):
+        """준비된 작업 큐를 우선순위 순으로 실행. 패키징까지 성공하면 True"""
+        self._progress = {}
+        self.memory_budget.start_run()
+        run_jobs = [job for job in self.queue.jobs if job['state'] == PENDING]
+        for job in run_jobs:
+            self._progress.setdefault((job['station'], job['kind']), [0, 0])[1] += 1
+        self._throughput = ThroughputMeter(self.progress_callback, self.pause_controller, workers=self.max_encoders)
+        if self.background:
+            self._log(f"🌙 백그라운드 모드: 변환 작업자 {self.max_encoders}개, 다운로드 {self.max_downloads}개, 낮은 CPU/디스크 우선순위")
+        if any(job['kind'] in SONG_JOB_KINDS for job in run_jobs):
+            # 변환 전에 인코더를 골라 두어 벤치마크가 곡 변환 도중에 끼어들지 않도록 함
+            try:
+                encoder_for_output_dir(self.output_dir, self.progress_callback)
+            except RuntimeError as e:
+                self._log(f"⚠️ {e}")
+
+        while not self.pause_controller.cancelled:
+            job = self.queue.next_ready()
+            if job is None:
+                break
+            if job['kind'] == 'download':
+                self._run_timed_batch('download', self._run_download_batch)
+            elif job['kind'] == 'convert':
+                self._run_timed_batch('convert', self._run_convert_batch)
+            elif job['kind'] == 'write':
+                self._run_write_batch(self.queue.ready_jobs(kinds=('write',)))
+            else:
+                self._run_job(job)
+        self.memory_budget.report()
+        self._throughput.report()
+        self.history.save()
+        self._report_sizes(run_jobs)
+        self._report_duplicates(run_jobs)
+        if self.pause_controller.cancelled:
+            self.cancelled = True
+            summary = self.queue.summary()
+            self._log(f"⏹️ 빌드 취소: 완료 {summary[DONE]}개, 남은 작업 {summary[PENDING]}개 (다음 실행에서 이어서 진행할 수 있습니다)")
+            return False
+
+        package_jobs = [job for job in self.queue.jobs if job['kind'] == 'package']
+        success = bool(package_jobs) and package_jobs[0]['state'] == DONE
+        if success and not self.queue.has_unfinished_work():
+            self.queue.clear()
+        elif self.queue.failed_jobs():
+            self._log(f"⚠️ 실패한 작업 {len(self.queue.failed_jobs())}개가 남아 있습니다. '실패 작업 재시도'로 다시 실행할 수 있습니다.")
+
+        if success and self.zip_mod:
+            self.zip_mod_folder()
+        return success
+
+    def _log_job_progress(self, job):
+        progress = self._progress.get((job['station'], job['kind']))
+        if not progress or job['kind'] not in SONG_JOB_KINDS:
+            return
+        with self._progress_lock:
+            progress[0] += 1
+            current = progress[0]
+        label = "로컬 파일 처리" if job['kind'] == 'convert' else "다운로드 처리"
+        self._log(f"\n[{current}/{progress[1]}] '{job['station']}' 스테이션 {label} 중...")
+
+    def _before_job(self):
+        """
+        일시 정지 중이면 재개될 때까지 기다림
+        빌드가 취소되었으면 BuildCancelled 발생 (작업은 대기 상태로 남음)
+        """
+        self.pause_controller.wait()
+
+    def _thread_initializer(self):
+        return lower_current_thread_priority if self.background else None
+
+    def _thread_pool(self, max_workers):
+        """이 빌더가 쓰고 버리는 스레드 풀. 백그라운드 모드면 스레드를 만들 때 우선순위를 낮춤"""
+        return ThreadPoolExecutor(max_workers=max_workers, initializer=self._thread_initializer())
+
+    def _record_throughput(self, job, result):
+        if self._throughput and job['kind'] in SONG_JOB_KINDS and result:
+            self._throughput.add(song_duration(result))
+
+    def _run_job(self, job):
+        handler = getattr(self, f"_run_{job['kind']}_job")
+        try:
+            self._before_job()
+        except BuildCancelled:
+            return
+        self.queue.mark_running(job)
+        self._log_job_progress(job)
+        try:
+            result = handler(job)
+            self.queue.mark_done(job, result)
+            self._record_throughput(job, result)
+        except Exception as e:
+            self._log(f"  ❌ 작업 실패 ({job['kind']}): {e}")
+            self.queue.mark_failed(job, e)
+
+    def _run_timed_batch(self, kind, run_batch):
+        """배치를 실행하고, 캐시를 쓰지 않고 완료한 곡의 길이와 걸린 시간을 빌드 계획용 처리량으로 기록"""
+        jobs = self.queue.ready_jobs(kinds=(kind,))
+        started_at = time.monotonic()
+        run_batch(jobs)
+        audio_seconds = sum(song_duration(job['result']) for job in jobs
+                            if job['state'] == DONE and job['id'] not in self._cached_job_ids)
+        self.history.record(kind, audio_seconds, time.monotonic() - started_at)
+
+    def _run_write_batch(self, jobs):
+        """준비된 스테이션 모드 파일 생성 작업을 병렬로 실행 (스테이션마다 곡 목록을 한 번만 순회하며 스트리밍 기록)"""
+        if len(jobs) == 1 and not self.background:
+            self._run_job(jobs[0])
+            return
+        with self._thread_pool(self.file_writer.max_workers) as executor:
+            list(executor.map(self._run_job, jobs))
+
+    def _run_convert_batch(self, jobs):
+        """로컬 변환 작업을 병렬로 실행. 동시 실행 수는 메모리 예산(MediaProcessor.convert_to_ogg)이 제한"""
+        for job in jobs:
+            self._generator(job['station'])
+        if self.encode_executor:
+            list(self.encode_executor.map(self._run_job, jobs))
+            return
+        with self._thread_pool(self.max_encoders) as executor:
+            list(executor.map(self._run_job, jobs))
+
+    def _run_download_batch(self, jobs):
+        """준비된 다운로드 작업을 적응형 동시 실행 스케줄러로 한꺼번에 실행"""
+        scheduler = self.download_scheduler or DownloadScheduler(
+            progress_callback=self.progress_callback,
+            max_workers=self.max_downloads,
+            initial_workers=min(2, self.max_downloads),
+            bandwidth_limit=self.bandwidth_limit
+        )
+        for job in jobs:
+            self._generator(job['station'])
+
+        def make_task(job):
+            def task(on_chunk):
+                self._before_job()
+                self.queue.mark_running(job)
+                self._log_job_progress(job)
+                result = self._run_download_job(job, on_chunk=self._cancellable(on_chunk), on_transfer_done=on_chunk.finish)
+                self._record_throughput(job, result)
+                return result
+            return task
+
+        jobs_by_id = {job['id']: job for job in jobs}
+
+        def on_result(job_id, ok, value):
+            # 곡마다 끝나는 즉시 상태를 저장하여, 배치 도중 종료되어도 완료된 다운로드는 다시 하지 않도록 함
+            job = jobs_by_id[job_id]
+            if ok:
+                self.queue.mark_done(job, value)
+            elif isinstance(value, BuildCancelled):
+                if job['state'] != PENDING:
+                    self.queue.mark_pending(job)
+            else:
+                self._log(f"  ❌ 작업 실패 (download): {value}")
+                self.queue.mark_failed(job, value)
+
+        scheduler.run([(job['id'], make_task(job)) for job in jobs], on_result=on_result,
+                      thread_initializer=self._thread_initializer())
+
+    def _cancellable(self, on_chunk):
+        """다운로드 청크마다 취소 여부를 확인하여, 취소되면 받고 있던 곡도 중단"""
+        def checked(size):
+            if self.pause_controller.cancelled:
+                raise BuildCancelled()
+            on_chunk(size)
+        return checked
+
+    def _run_art_job(self, job):
+        image_path = job['payload']['image_path']
+        dds_path = self.output_dir / "gfx" / f"{job['station']}_album_art.dds"
+        if dds_path.exists():
+            dds_path.unlink()  # 캐시와 하드 링크되어 있을 수 있으므로 덮어쓰지 않고 새로 만듦
+
+        if self.transcode_cache:
+            key = art_cache_key(image_path)
+            with self.transcode_cache.lock(key):
+                cached = self.transcode_cache.lookup(key, suffix='.dds')
+                if cached:
+                    link_or_copy(cached[0], dds_path)
+                    self._log(f"♻️ 앨범 아트 캐시 사용: {dds_path.name}")
+                    return
+                self._process_album_art(job['station'], image_path)
+                self.transcode_cache.store(key, dds_path, {'image_path': str(image_path)}, suffix='.dds')
+                return
+        self._process_album_art(job['station'], image_path)
+
+    def _process_album_art(self, station_name, image_path):
+        if not self._generator(station_name).process_album_art(image_path):
+            raise Exception("앨범 아트 처리 실패")
+
+    def _run_cached_song_job(self, job, convert):
+        """
+        변환 캐시에 같은 원본/자르기/인코딩 결과가 있으면 다운로드와 변환 없이 재사용하고,
+        없으면 convert()로 변환한 뒤 결과를 캐시에 저장
+        """
+        if not self.transcode_cache:
+            return convert()
+        key = song_cache_key(job['payload']['song'], job['payload'].get('encoding'))
+        with self.transcode_cache.lock(key):
+            cached = self.transcode_cache.lookup(key)
+            if cached:
+                return self._reuse_cached_song(job, *cached)
+            result = convert()
+            ogg_path = self.output_dir / "music" / result['file_path']
+            if ogg_path.exists():
+                self.transcode_cache.store(key, ogg_path, {field: result[field] for field in CACHED_SONG_FIELDS if field in result})
+            return result
+
+    def _reuse_cached_song(self, job, cached_file, meta):
+        song_info = job['payload']['song']
+        processor = self._generator(job['station']).media_processor
+        display_name, english_display, file_name = processor.song_names(
+            song_info.get('korean_name'), song_info.get('english_name'), meta['original_title'])
+        file_path = f"{job['station']}/{file_name}.ogg"
+        result = {
+            **song_info, 'name': file_name, 'display_name': display_name, 'english_display': english_display,
+            'original_title': meta['original_title'], 'file_path': file_path,
+            'duration': meta['duration'], 'original_duration': meta['original_duration'],
+            'trim_start': song_info.get('trim_start', 0), 'volume': song_info.get('volume', 0.8)
+        }
+        if job['kind'] == 'convert':
+            result['source'] = 'local'
+        if job['payload'].get('encoding'):
+            result['encoding'] = job['payload']['encoding']
+
+        with self._progress_lock:
+            self.cache_hits += 1
+            self._cached_job_ids.add(job['id'])
+        if meta.get('fingerprint') and self.dedupe_mode in DEDUPE_MODES:
+            try:
+                self._check_fingerprint(decode_fingerprint(meta['fingerprint']), file_path)
+            except DuplicateSongError:
+                return self._with_fingerprint(result)
+            result = self._with_fingerprint(result)
+        link_or_copy(cached_file, self.output_dir / "music" / file_path)
+        self._log(f"  ♻️ 변환 캐시 사용: {file_path}")
+        return result
+
+    def _run_convert_job(self, job):
+        return self._run_cached_song_job(job, lambda: self._convert_local_song(job))
+
+    def _convert_local_song(self, job):
+        song_info = job['payload']['song']
+        generated_song_info = self._generator(job['station']).media_processor.process_local_song(
+            song_info, encoding=job['payload'].get('encoding'))
+        if not generated_song_info:
+            raise Exception(f"로컬 파일 변환 실패: {song_info.get('url')}")
+        return self._with_fingerprint({**song_info, **generated_song_info})
+
+    def _run_download_job(self, job, on_chunk=None, on_transfer_done=None):
+        return self._run_cached_song_job(job, lambda: self._download_song(job, on_chunk, on_transfer_done))
+
+    def _download_song(self, job, on_chunk=None, on_transfer_done=None):
+        song_info = job['payload']['song']
+        generated_song_info = self._generator(job['station']).media_processor.download_and_convert_song(
+            url=song_info['url'],
+            korean_name=song_info.get('korean_name'),
+            english_name=song_info.get('english_name'),
+            trim_start=song_info.get('trim_start', 0),
+            volume=song_info.get('volume', 0.8),
+            on_chunk=on_chunk,
+            raise_errors=True,
+            encoding=job['payload'].get('encoding'),
+            on_transfer_done=on_transfer_done
+        )
+        return self._with_fingerprint({**song_info, **generated_song_info})
+
+    def _run_write_job(self, job):
+        station_name = job['station']
+        self._log("\n" + "="*20 + f" '{station_name}' 스테이션 파일 생성 " + "="*20)
+
+        station_songs = self._write_job_songs(job)
+        generated_songs = [song for song in map(self._station_file_song, self._write_job_songs(job, done_only=True)) if song]
+
+        if not generated_songs and station_songs and all(song.get('duplicate_of') for song in station_songs):
+            self._store_station_songs(job)
+            self._log(f"⚠️ 스테이션 '{station_name}'의 곡이 모두 다른 곡과 중복되어 모드 파일을 생성하지 않습니다.")
+            return
+
+        if not generated_songs:
+            raise Exception(f"스테이션 '{station_name}' 모드 파일 생성 실패: 다운로드된 곡이 없습니다.")
+        self._log(f"\n📄 '{station_name}' HOI4 모드 파일 생성 중... (총 {len(generated_songs)}곡)")
+        self.file_writer.write_station(station_name, generated_songs)
+        self._store_station_songs(job)
+        self._log(f"✅ 스테이션 '{station_name}' 모드 파일 생성 완료.")
+
+    def _write_job_songs(self, job, done_only=False):
+        """write 작업에 속한 곡 목록. 완료된 곡은 변환 결과, 실패한 곡은 다음 실행에서 재시도할 수 있도록 원래 곡 정보"""
+        songs = []
+        for dep_id in job['deps']:
+            dep = self.queue.get(dep_id)
+            if dep['kind'] in SONG_JOB_KINDS and (dep['state'] == DONE or not done_only):
+                songs.append(dep['result'] if dep['state'] == DONE else dep['payload']['song'])
+        return songs
+
+    def _station_file_song(self, song):
+        """
+        모드 파일에 쓸 곡 정보. OGG가 없는 병합된 중복 곡은 원본이 다른 스테이션에 있으면 그 파일을 가리키도록 하고,
+        같은 스테이션 안의 중복이면 None (모드 파일에서 제외)
+        """
+        if (self.output_dir / "music" / song['file_path']).exists():
+            return song
+        duplicate_of = song.get('duplicate_of')
+        if duplicate_of and (self.output_dir / "music" / duplicate_of).exists() \
+                and Path(duplicate_of).parent != Path(song['file_path']).parent:
+            return {**song, 'file_path': duplicate_of}
+        return None
+
+    def _store_station_songs(self, job):
+        """write 작업의 곡 목록을 사용자의 스테이션에 반영. 하위 스테이션이면 같은 원본의 모든 하위 스테이션 곡을 순서대로 합침"""
+        base_name = job['payload'].get('shard_of')
+        if not base_name:
+            self.stations[job['station']]["songs"] = self._write_job_songs(job)
+            return
+        self.stations[base_name]["songs"] = [
+            song for other in self.queue.jobs
+            if other['kind'] == 'write' and other['payload'].get('shard_of') == base_name
+            for song in self._write_job_songs(other)]
+
+    def _write_descriptor(self):
+        mod_name = self.output_dir.name
+        descriptor_content = [
+            'version="1.0"',
+            'tags={',
+            '\t"Sound"',
+            '}',
+            f'name="{mod_name.replace("_", " ").title()}"',
+            'supported_version="1.14.*"'
+        ]
+        with open(self.output_dir / "descriptor.mod", 'w', encoding='utf-8') as f:
+            f.write('\n'.join(descriptor_content) + '\n')
+        self._log(f"\n📝 descriptor.mod 파일 생성 완료.")
+
+    def _write_mod_data(self, only=None):
+        """
+        스테이션 데이터를 mod_data.json에 저장. only를 주면 기존 파일에서 그 스테이션만 바꿈
+        (감시 폴더 갱신 시 GUI에서 아직 빌드하지 않은 다른 스테이션의 편집 내용을 저장하지 않도록)
+        """
+        mod_data_path = self.output_dir / "mod_data.json"
+        if only:
+            stations = {}
+            if mod_data_path.exists():
+                with open(mod_data_path, 'r', encoding='utf-8') as f:
+                    stations = json.load(f).get('stations', {})
+            stations[only] = self.stations[only]
+        else:
+            stations = self.stations
+        mod_data = {'stations': stations}
+        with open(mod_data_path, 'w', encoding='utf-8') as f:
+            json.dump(mod_data, f, ensure_ascii=False, indent=2)
+        self._log(f"\n✅ 전체 모드 데이터 저장: {mod_data_path}")
+
+    def _run_package_job(self, job):
+        if self.stations:
+            self._write_descriptor()
+
+        if any(self.queue.get(dep_id)['state'] == FAILED for dep_id in job['deps']):
+            raise Exception("일부 스테이션 모드 파일 생성에 실패했습니다.")
+
+        self._write_mod_data()
+        self._log("\n" + "="*60)
+        self._log("🎼 HOI4 음악 모드 생성/업데이트 완료!")
+        self._log(f"  - 출력 디렉토리: {self.output_dir}")
+        self._log("="*60)
+
+        # 실패한 작업이 남아 있으면 재시도를 위해 임시 다운로드 폴더를 유지
+        temp_dir = self.output_dir / "temp"
+        if temp_dir.exists() and not self.queue.failed_jobs():
+            shutil.rmtree(temp_dir)
+
+    @staticmethod
+    def _source_state(path):
+        stat = Path(path).stat()
+        return {'source_size': stat.st_size, 'source_mtime_ns': stat.st_mtime_ns}
+
+    def scan_folder_changes(self, station_name, folder):
+        """
+        감시 폴더와 스테이션의 로컬 곡 목록을 비교하여 (변환할 파일 목록, 삭제된 파일 목록) 반환
+        새 파일, 크기/수정 시각이 바뀐 파일, OGG가 없는 파일을 변환 대상으로 봄
+        """
+        folder = Path(folder).resolve()
+        current = {path.resolve(): path for path in LibraryScanner.iter_audio_files(folder)}
+        known = {}
+        for song in self.stations.get(station_name, {}).get("songs", []):
+            if song.get('source') == 'local' and Path(song['url']).resolve().is_relative_to(folder):
+                known[Path(song['url']).resolve()] = song
+
+        changed, deleted = [], [path for path in known if path not in current]
+        for resolved, path in current.items():
+            song = known.get(resolved)
+            if song is None or not song.get('file_path') or not (self.output_dir / "music" / song['file_path']).exists():
+                changed.append(path)
+                continue
+            try:
+                state = self._source_state(path)
+            except OSError:
+                continue
+            if any(song.get(key) != value for key, value in state.items()) and not song.get('duplicate_of'):
+                changed.append(path)
+        self._log(f"🔍 감시 폴더 비교: 변환 필요 {len(changed)}곡, 삭제됨 {len(deleted)}곡")
+        return changed, deleted
+
+    def _release_duplicates(self, file_path, station_name):
+        """
+        원본 곡이 삭제되었을 때 그 곡을 가리키던 중복 표시를 해제
+        파일이 있는 곡은 색인에 다시 추가하고, 병합되어 파일이 없는 같은 스테이션 곡 목록을 반환 (다시 변환 필요)
+        """
+        orphaned = []
+        for name, data in self.stations.items():
+            for song in data.get("songs", []):
+                if not file_path or song.get('duplicate_of') != file_path:
+                    continue
+                song.pop('duplicate_of')
+                if (self.output_dir / "music" / song['file_path']).exists():
+                    if song.get('fingerprint'):
+                        self.fingerprints.add(song['file_path'], decode_fingerprint(song['fingerprint']))
+                elif name == station_name:
+                    orphaned.append(song)
+        return orphaned
+
+    def update_station(self, station_name, changed_paths=(), deleted_paths=()):
+        """
+        바뀐 로컬 파일만 다시 변환하고 해당 스테이션의 모드 파일과 mod_data.json만 다시 생성
+        (감시 폴더 모드에서 사용. 작업 큐를 거치지 않음)
+        """
+        if not changed_paths and not deleted_paths:
+            return
+        started_at = time.monotonic()
+        station = self.stations.setdefault(station_name, {"songs": [], "album_art": ""})
+        songs = station["songs"]
+        if not self._fingerprints_loaded and self.dedupe_mode in DEDUPE_MODES:
+            self._build_fingerprint_index([song for data in self.stations.values() for song in data.get("songs", [])])
+
+        by_path = {Path(song['url']).resolve(): song for song in songs if song.get('source') == 'local'}
+        orphaned = []
+        for path in deleted_paths:
+            song = by_path.pop(Path(path).resolve(), None)
+            if song is None:
+                continue
+            songs.remove(song)
+            if song.get('file_path'):
+                self.fingerprints.discard(song['file_path'])
+                ogg_path = self.output_dir / "music" / song['file_path']
+                if ogg_path.exists() and not any(other.get('file_path') == song['file_path'] for data in self.stations.values() for other in data.get("songs", [])):
+                    ogg_path.unlink()
+            self._log(f"🗑️ 삭제된 파일을 스테이션 '{station_name}'에서 제거: {Path(path).name}")
+            orphaned.extend(self._release_duplicates(song.get('file_path'), station_name))
+
+        to_convert = [song for song in orphaned if song.get('source') == 'local']
+        for path in changed_paths:
+            song = by_path.get(Path(path).resolve())
+            if song is None:
+                song = LibraryScanner.make_song_info(probe_audio_file(path))
+                unique_song_names([song], songs)
+                songs.append(song)
+                by_path[Path(path).resolve()] = song
+            if song not in to_convert:
+                to_convert.append(song)
+
+        encoding = resolve_encoding(station)
+
+        def folder_for(song):
+            # 하위 스테이션 폴더에 있던 곡은 그 자리에서 다시 변환
+            folder = Path(song['file_path']).parent.name if song.get('file_path') else station_name
+            return folder if is_shard_folder(folder, station_name, self.stations) else station_name
+
+        generators = {folder: self._generator(folder) for folder in {folder_for(song) for song in to_convert}}
+
+        def convert(song):
+            folder = folder_for(song)
+            if song.get('file_path'):
+                self.fingerprints.discard(song['file_path'])
+            generated_song_info = generators[folder].media_processor.process_local_song(song, encoding=encoding)
+            if not generated_song_info:
+                return False
+            result = self._with_fingerprint({**song, **generated_song_info, **self._source_state(song['url'])})
+            song.pop('duplicate_of', None)
+            song.update(result)
+            return True
+
+        with self._thread_pool(self.max_encoders) as executor:
+            converted = sum(executor.map(convert, to_convert))
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        # 전체 빌드와 같이 하위 스테이션으로 나누고, 나뉜 스테이션마다 모드 파일을 씀 (이전의 나뉘지 않은/하위 스테이션 파일은 정리)
+        build_stations = self._shard_stations(only=station_name)
+        shard_songs = [song for data in build_stations.values() for song in data['songs']]
+        moved = False
+        for song, built in zip(songs, shard_songs):
+            moved = moved or song.get('file_path') != built.get('file_path')
+            for key in ('file_path', 'duplicate_of'):
+                if key in built:
+                    song[key] = built[key]
+        if moved and self.dedupe_mode in DEDUPE_MODES:
+            self._build_fingerprint_index([song for data in self.stations.values() for song in data.get("songs", [])])
+        album_art_path = station.get("album_art", "").strip()
+        for build_name, build_data in build_stations.items():
+            if album_art_path and Path(album_art_path).exists() and not (self.output_dir / "gfx" / f"{build_name}_album_art.dds").exists():
+                self._generator(build_name).process_album_art(album_art_path)
+            generated_songs = [song for song in map(self._station_file_song, [song for song in build_data['songs'] if song.get('file_path')]) if song]
+            if generated_songs:
+                self.file_writer.write_station(build_name, generated_songs)
+            else:
+                self._log(f"⚠️ 스테이션 '{build_name}'에 변환된 곡이 없어 모드 파일을 갱신하지 않았습니다.")
+        if not (self.output_dir / "descriptor.mod").exists():
+            self._write_descriptor()
+        self._write_mod_data(only=station_name)
+        self._log(f"🔄 스테이션 '{station_name}' 갱신 완료: 변환 {converted}/{len(to_convert)}곡, 삭제 {len(deleted_paths)}곡 "
+                  f"({time.monotonic() - started_at:.1f}초)")
+
+    def zip_mod_folder(self):
+        self._log("\n📦 모드 폴더 압축 시작...")
+        try:
+            archive_name = self.output_dir.name
+            archive_path = self.output_dir.parent / archive_name
+
+            shutil.make_archive(str(archive_path), 'zip', root_dir=self.output_dir.parent, base_dir=archive_name)
+
+            self._log(f"  ✅ 압축 완료: {archive_path}.zip")
+        except Exception as e:
+            self._log(f"  ❌ 압축 실패: {e}")
@@ -5,13 +5,15 @@ from media_processor import MediaProcessor
 from file_writer import FileWriter
 
 class HOI4MusicModGenerator:
-    def __init__(self, station_name="my_station", output_dir="hoi4_music_mod", progress_callback=None):
+    def __init__(self, station_name="my_station", output_dir="hoi4_music_mod", progress_callback=None, memory_budget=None, source=None,
+                 fingerprint_check=None):
         self.station_name = self.sanitize_station_name(station_name)
         self.output_dir = Path(output_dir)
         self.songs = []
         self.progress_callback = progress_callback
 
-        self.media_processor = MediaProcessor(self.output_dir, self.station_name, self.progress_callback)
+        self.media_processor = MediaProcessor(self.output_dir, self.station_name, self.progress_callback, memory_budget, source,
+                                              fingerprint_check)
         self.file_writer = FileWriter(self.output_dir, self.station_name, self.progress_callback)
 
         self.create_directory_structure()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Ogg CRC(다항식 0x04C11DB7, 비반사)를 zlib.crc32(반사형)로 계산하기 위한 비트 반전 테이블
+_BIT_REVERSE_TABLE = bytes(int(f"{i:08b}"[::-1], 2) for i in range(256))
+_PAGE_HEADER = struct.Struct('<4sBBqIIIB')
+
+
+def _reverse_bits32(value):
+    return int(f"{value:032b}"[::-1], 2)
+
+
+def ogg_crc(data):
+    """Ogg 페이지 CRC 계산 (C로 구현된 zlib.crc32 사용)"""
+    raw = zlib.crc32(data.translate(_BIT_REVERSE_TABLE), 0xFFFFFFFF) ^ 0xFFFFFFFF
+    return _reverse_bits32(raw)
+
+
+class OggVerifier:
+    def __init__(self, progress_callback=None, max_workers=None):
+        self.progress_callback = progress_callback
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+
+    def _log(self, message):
+        if self.progress_callback:
+            self.progress_callback(message)
+
+    def verify_file(self, path):
+        """
+        오디오를 디코딩하지 않고 Ogg 페이지 헤더/CRC와 Vorbis 식별 헤더를 검사
+        (정상 여부, 실패 사유) 튜플을 반환
+        """
+        path = Path(path)
+        try:
+            with open(path, 'rb', buffering=1024 * 1024) as f:
+                return self._verify_stream(f)
+        except OSError as e:
+            return False, f"파일을 열 수 없음: {e}"
+
+    def _verify_stream(self, f):
+        page_count = 0
+        first_packet = b''
+        saw_eos = False
+        serial = None
+
+        while True:
+            header = f.read(_PAGE_HEADER.size)
+            if not header:
+                break
+            if len(header) < _PAGE_HEADER.size:
+                return False, f"페이지 {page_count} 헤더가 잘렸습니다."
+
+            capture, version, header_type, _granule, page_serial, sequence, crc, segment_count = _PAGE_HEADER.unpack(header)
+            if capture != b'OggS':
+                return False, f"페이지 {page_count}에서 OggS 동기 패턴을 찾을 수 없습니다."
+            if version != 0:
+                return False, f"지원하지 않는 Ogg 버전: {version}"
+            if saw_eos:
+                return False, "스트림 종료(EOS) 페이지 뒤에 데이터가 있습니다."
+
+            lacing = f.read(segment_count)
+            if len(lacing) < segment_count:
+                return False, f"페이지 {page_count} 세그먼트 테이블이 잘렸습니다."
+            body_size = sum(lacing)
+            body = f.read(body_size)
+            if len(body) < body_size:
+                return False, f"페이지 {page_count} 본문이 잘렸습니다. (인코딩 중단 의심)"
+
+            page = header[:22] + b'\x00\x00\x00\x00' + header[26:] + lacing + body
+            if ogg_crc(page) != crc:
+                return False, f"페이지 {page_count} CRC 불일치"
+
+            if page_count == 0:
+                if not header_type & 0x02:
+                    return False, "첫 페이지에 스트림 시작(BOS) 플래그가 없습니다."
+                serial = page_serial
+                first_packet = body[:lacing[0]] if segment_count else b''
+            elif page_serial != serial:
+                return False, "여러 논리 스트림이 섞여 있습니다."
+            if sequence != page_count:
+                return False, f"페이지 순서 번호 불일치 (예상 {page_count}, 실제 {sequence})"
+
+            saw_eos = bool(header_type & 0x04)
+            page_count += 1
+
+        if page_count == 0:
+            return False, "빈 파일입니다."
+        if not saw_eos:
+            return False, "스트림 종료(EOS) 페이지가 없습니다. (인코딩 중단 의심)"
+        return self._check_vorbis_identification(first_packet)
+
+    @staticmethod
+    def _check_vorbis_identification(packet):
+        if len(packet) < 30 or packet[:7] != b'\x01vorbis':
+            return False, "Vorbis 식별 헤더가 아닙니다."
+        version, channels, sample_rate = struct.unpack_from('<IBI', packet, 7)
+        if version != 0 or channels == 0 or sample_rate == 0:
+            return False, "Vorbis 식별 헤더 값이 올바르지 않습니다."
+        if not packet[29] & 0x01:
+            return False, "Vorbis 식별 헤더의 프레이밍 비트가 없습니다."
+        return True, ""
+
+    def verify_files(self, paths):
+        """
+        여러 OGG 파일을 병렬로 검사하여 {경로: (정상 여부, 실패 사유)} 반환
+        존재하지 않는 파일은 결과에 포함하지 않음
+        """
+        existing = [Path(p) for p in paths if Path(p).exists()]
+        if not existing:
+            return {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = dict(zip(existing, executor.map(self.verify_file, existing)))
+
+        broken = [(p, reason) for p, (ok, reason) in results.items() if not ok]
+        self._log(f"🔍 OGG 무결성 검사: {len(existing)}개 중 {len(existing) - len(broken)}개 정상")
+        for p, reason in broken:
+            self._log(f"  ⚠️ 손상된 파일: {p.name} - {reason}")
+        return results
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+재생목록과 연결된 스테이션을 재생목록의 현재 상태에 맞춤
+스테이션에 {'playlist': {'id', 'url', 'video_ids'}}를 저장해 두고, 동기화할 때는 영상 ID 목록만 받아
+새 영상만 제목을 조회/추가하고, 빠진 영상은 표시(또는 삭제)하고, 순서 변경을 반영
+이미 있는 곡의 정보(name, file_path 등)는 그대로 유지하므로 모드 생성 시 새 곡만 다운로드/변환됨
+
+    python playlist_sync.py <모드 출력 폴더> [--station 이름] [--drop-removed] [--build]
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from media_sources import create_media_source, video_id_from_url, playlist_id_from_url
+
+REMOVE_MODES = ('flag', 'drop')
+REMOVED_FLAG = 'removed_from_playlist'
+
+
+def link_playlist(station_data, playlist_url):
+    """스테이션을 재생목록과 연결 (곡 목록은 sync에서 채움)"""
+    playlist_id = playlist_id_from_url(playlist_url)
+    if not playlist_id:
+        raise ValueError(f"재생목록 URL이 아닙니다: {playlist_url}")
+    previous = station_data.get('playlist') or {}
+    station_data['playlist'] = {
+        'id': playlist_id,
+        'url': playlist_url,
+        'video_ids': previous.get('video_ids', []) if previous.get('id') == playlist_id else [],
+    }
+    return station_data['playlist']
+
+
+class PlaylistSync:
+    def __init__(self, source=None, progress_callback=None, remove_mode='flag', max_workers=8):
+        if remove_mode not in REMOVE_MODES:
+            raise ValueError(f"remove_mode는 {REMOVE_MODES} 중 하나여야 합니다.")
+        self.source = source or create_media_source()
+        self.progress_callback = progress_callback
+        self.remove_mode = remove_mode
+        self.max_workers = max_workers
+
+    def _log(self, message):
+        if self.progress_callback:
+            self.progress_callback(message)
+
+    def _new_song(self, entry, playlist_id):
+        title = entry['title'] or entry['video_id']
+        return {
+            'url': entry['url'],
+            'korean_name': title,
+            'english_name': title,
+            'trim_start': 0,
+            'volume': 0.8,
+            'weight': 1,
+            'source': 'youtube',
+            'video_id': entry['video_id'],
+            'playlist_id': playlist_id,
+        }
+
+    def _fetch_titles(self, entries):
+        """제목이 없는(목록 조회만 한) 새 영상만 제목을 조회. 실패하면 영상 ID를 이름으로 사용"""
+        missing = [entry for entry in entries if not entry['title']]
+        if not missing:
+            return
+
+        def fetch(entry):
+            try:
+                entry['title'] = self.source.video_title(entry['url'])
+            except Exception as e:
+                self._log(f"  - 영상 정보 가져오기 실패 ({entry['video_id']}): {e}")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(fetch, missing))
+
+    def sync(self, station_data):
+        """
+        재생목록과 비교한 새 곡 목록과 요약을 반환 (station_data는 바꾸지 않음)
+        {'songs', 'playlist', 'added', 'removed', 'restored', 'reordered'}
+        """
+        return self.merge(station_data, self.fetch(station_data))
+
+    def _playlist(self, station_data):
+        playlist = station_data.get('playlist')
+        if not playlist:
+            raise ValueError("재생목록과 연결되지 않은 스테이션입니다.")
+        return playlist
+
+    def _split_songs(self, station_data, playlist_id, current_ids):
+        """이전에 재생목록으로 추가된 곡과, 처음 연결할 때 이미 목록에 있던 같은 영상의 곡을 재생목록 곡으로 간주"""
+        linked, manual = {}, []
+        for song in station_data.get('songs', []):
+            video_id = song.get('video_id') or (video_id_from_url(song['url']) if song.get('source') == 'youtube' else None)
+            if video_id and video_id not in linked and (song.get('playlist_id') == playlist_id or video_id in current_ids):
+                linked[video_id] = song
+            else:
+                manual.append(song)
+        return linked, manual
+
+    def fetch(self, station_data):
+        """
+        재생목록의 영상 목록을 받아 스테이션에 없는 영상만 제목을 조회 (네트워크 사용, 작업 스레드에서 호출)
+        반환한 항목 목록은 merge에 넘김
+        """
+        playlist = self._playlist(station_data)
+        entries, current_ids = [], []
+        for entry in self.source.list_playlist_entries(playlist['url']):
+            # 재생목록에 같은 영상이 여러 번 있으면 처음 위치만 사용
+            if entry['video_id'] and entry['video_id'] not in current_ids:
+                entries.append(entry)
+                current_ids.append(entry['video_id'])
+        linked, _ = self._split_songs(station_data, playlist['id'], current_ids)
+        self._fetch_titles([entry for entry in entries if entry['video_id'] not in linked])
+        return entries
+
+    def merge(self, station_data, entries):
+        """
+        fetch로 받은 항목을 station_data의 현재 곡 목록과 비교한 새 곡 목록과 요약을 반환 (네트워크를 사용하지 않음)
+        GUI는 동기화 중에 바뀐 곡 목록을 잃지 않도록 Tk 스레드에서 현재 목록으로 다시 호출
+        """
+        playlist = self._playlist(station_data)
+        playlist_id = playlist['id']
+        current_ids = [entry['video_id'] for entry in entries]
+        linked, _ = self._split_songs(station_data, playlist_id, current_ids)
+
+        new_entries = [entry for entry in entries if entry['video_id'] not in linked]
+        new_songs = {entry['video_id']: self._new_song(entry, playlist_id) for entry in new_entries}
+
+        # 직접 추가한 곡과 빠져서 표시만 한 곡은 원래 목록에서 바로 앞에 있던, 재생목록에 남은 곡 뒤에 그대로 둠
+        linked_ids = {id(song): video_id for video_id, song in linked.items()}
+        following, anchor = {None: []}, None
+        for song in station_data.get('songs', []):
+            video_id = linked_ids.get(id(song))
+            if video_id in current_ids:
+                anchor = video_id
+                following[anchor] = []
+            elif video_id is None:
+                following[anchor].append(song)
+            elif self.remove_mode == 'flag':
+                following[anchor].append({**song, REMOVED_FLAG: True})
+
+        songs, restored = list(following[None]), 0
+        for video_id in current_ids:
+            if video_id in linked:
+                song = dict(linked[video_id])
+                if song.pop(REMOVED_FLAG, None):
+                    restored += 1
+                song['video_id'], song['playlist_id'] = video_id, playlist_id
+                songs.append(song)
+            else:
+                songs.append(new_songs[video_id])
+            songs.extend(following.get(video_id, []))
+        removed = [song for video_id, song in linked.items() if video_id not in current_ids]
+
+        kept_before = [video_id for video_id in linked if video_id in current_ids]
+        kept_after = [video_id for video_id in current_ids if video_id in linked]
+        return {
+            'songs': songs,
+            'playlist': {**playlist, 'video_ids': current_ids, 'synced_at': time.time()},
+            'added': len(new_entries),
+            'removed': len(removed),
+            'restored': restored,
+            'reordered': kept_before != kept_after,
+        }
+
+    def log_result(self, station_name, result):
+        action = "표시" if self.remove_mode == 'flag' else "삭제"
+        self._log(f"🔄 재생목록 동기화 '{station_name}': 새 곡 {result['added']}개, 빠진 곡 {result['removed']}개({action}), "
+                  f"복귀 {result['restored']}개{', 순서 변경됨' if result['reordered'] else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="재생목록과 연결된 스테이션을 동기화")
+    parser.add_argument('output_dir', help="모드 출력 폴더 (mod_data.json 사용)")
+    parser.add_argument('--station', help="동기화할 스테이션 (기본: 재생목록과 연결된 모든 스테이션)")
+    parser.add_argument('--drop-removed', action='store_true', help="재생목록에서 빠진 곡을 표시하지 않고 목록에서 삭제")
+    parser.add_argument('--build', action='store_true', help="동기화 후 바뀐 곡만 모드에 반영")
+    args = parser.parse_args()
+
+    mod_data_path = Path(args.output_dir) / "mod_data.json"
+    with open(mod_data_path, 'r', encoding='utf-8') as f:
+        stations = json.load(f).get('stations', {})
+
+    syncer = PlaylistSync(progress_callback=print, remove_mode='drop' if args.drop_removed else 'flag')
+    targets = [args.station] if args.station else [name for name, data in stations.items() if data.get('playlist')]
+    for station_name in targets:
+        result = syncer.sync(stations[station_name])
+        stations[station_name]['songs'] = result['songs']
+        stations[station_name]['playlist'] = result['playlist']
+        syncer.log_result(station_name, result)
+
+    if args.build:
+        from mod_builder import ModBuilder
+        builder = ModBuilder(args.output_dir, stations, progress_callback=print)
+        builder.prepare()
+        raise SystemExit(0 if builder.run() else 1)
+    with open(mod_data_path, 'w', encoding='utf-8') as f:
+        json.dump({'stations': stations}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlparse
+from ogg_verifier import OggVerifier
+from station_analyzer import merge_shards
+
+ONLINE_SCHEMES = ('http', 'https')
+YOUTUBE_HOSTS = ('youtube.com', 'www.youtube.com', 'm.youtube.com', 'music.youtube.com', 'youtu.be')
+
+
+def _is_schemeless_youtube(url_or_path):
+    """'youtube.com/watch?v=...', 'youtu.be/...'처럼 스킴 없이 입력한 유튜브 주소인지 확인"""
+    host = url_or_path.strip().split('/', 1)[0].lower()
+    return '/' in url_or_path.strip() and host in YOUTUBE_HOSTS
+
+
+def classify_source(url_or_path):
+    """파일 시스템에 접근하지 않고 주소 형식만으로 'youtube'(온라인) 또는 'local' 판별"""
+    if urlparse(url_or_path.strip()).scheme.lower() in ONLINE_SCHEMES or _is_schemeless_youtube(url_or_path):
+        return 'youtube'
+    return 'local'
+
+
+def normalize_url(url_or_path):
+    """스킴 없이 입력한 유튜브 주소에 https://를 붙임 (그 밖의 주소와 경로는 그대로)"""
+    url_or_path = url_or_path.strip()
+    return f"https://{url_or_path}" if _is_schemeless_youtube(url_or_path) else url_or_path
+
+
+def parse_txt_song_list(lines):
+    """'한글명 | 영어명 | URL | 자르기 | 볼륨 | 가중치' 형식(앞부분 생략 가능)의 텍스트 목록 파싱"""
+    parsed_songs = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'): continue
+        parts = [p.strip() for p in line.split('|')]
+        song = {'trim_start': 0, 'volume': 0.8, 'weight': 1}
+        if len(parts) >= 1: song['url'] = parts[-1]
+        if len(parts) >= 2:
+            if re.search(r'[가-힣]', parts[0]): song['korean_name'] = parts[0]
+            else: song['english_name'] = parts[0]
+        if len(parts) >= 3:
+            song['korean_name'] = parts[0]; song['english_name'] = parts[1]
+        if len(parts) >= 4:
+            try: song['trim_start'] = int(parts[3])
+            except: pass
+        if len(parts) >= 5:
+            try: song['volume'] = float(parts[4])
+            except: pass
+        if len(parts) >= 6:
+            try: song['weight'] = int(parts[5])
+            except: pass
+        if 'url' in song: parsed_songs.append(song)
+    return parsed_songs
+
+
+class ProjectLoader:
+    """
+    모드 데이터(mod_data.json)와 곡 목록 파일을 읽고, 참조된 로컬 파일/앨범 아트/OGG를 병렬로 확인
+    GUI의 Tk 스레드를 막지 않도록 백그라운드 스레드에서 사용
+    """
+    def __init__(self, progress_callback=None, max_workers=16):
+        self.progress_callback = progress_callback
+        self.max_workers = max_workers
+
+    def _log(self, message):
+        if self.progress_callback:
+            self.progress_callback(message)
+
+    def load_mod_data(self, mod_path):
+        song_data_path = Path(mod_path) / "mod_data.json"
+        if not song_data_path.exists():
+            raise FileNotFoundError(f"선택한 폴더에 'mod_data.json' 파일이 없습니다.\n이 프로그램으로 생성한 모드가 맞는지 확인해주세요.")
+        with open(song_data_path, 'r', encoding='utf-8') as f:
+            stations = json.load(f).get('stations', {})
+        if not stations:
+            raise ValueError("모드 데이터에 스테이션 정보가 없습니다.")
+        for base_name in merge_shards(stations):
+            self._log(f"🔗 나뉘어 저장된 스테이션 '{base_name}'을(를) 하나로 합쳤습니다.")
+
+        for station_name, station_data in stations.items():
+            if not isinstance(station_data.get("songs"), list):
+                self._log(f"⚠️ 스테이션 '{station_name}'의 곡 목록 형식이 잘못되어 리스트로 변환합니다.")
+                station_data["songs"] = []
+        return stations
+
+    def load_song_list(self, file_path):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            if str(file_path).endswith('.json'):
+                songs = json.load(f)
+            else:
+                songs = parse_txt_song_list(f)
+        for song in songs:
+            if song.get('url'):
+                song['url'] = normalize_url(song['url'])
+            song.setdefault('source', classify_source(song.get('url', '')))
+        return songs
+
+    def _check_path(self, path):
+        try:
+            return os.path.isfile(path)
+        except (OSError, ValueError):
+            return False
+
+    def check_references(self, stations, mod_path=None):
+        """
+        로컬 원본 파일과 앨범 아트 경로의 존재 여부, (mod_path가 있으면) 변환된 OGG의 무결성을 병렬로 확인
+        {'missing_sources': [...], 'missing_art': [...], 'broken_oggs': [...]} 반환
+        """
+        local_sources = {song['url'] for data in stations.values() for song in data.get("songs", [])
+                         if song.get('url') and song.get('source', classify_source(song['url'])) == 'local'}
+        art_paths = {data['album_art'].strip() for data in stations.values() if data.get('album_art', '').strip()}
+        paths = sorted(local_sources | art_paths)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            exists = dict(zip(paths, executor.map(self._check_path, paths)))
+
+        summary = {
+            'missing_sources': sorted(path for path in local_sources if not exists[path]),
+            'missing_art': sorted(path for path in art_paths if not exists[path]),
+            'broken_oggs': [],
+        }
+        if mod_path is not None:
+            ogg_paths = [Path(mod_path) / "music" / song['file_path']
+                         for data in stations.values() for song in data.get("songs", []) if song.get('file_path')]
+            verify_results = OggVerifier(progress_callback=self.progress_callback, max_workers=self.max_workers).verify_files(ogg_paths)
+            summary['broken_oggs'] = sorted(str(path) for path, (ok, _) in verify_results.items() if not ok)
+
+        self._log(f"🔍 참조 파일 확인: 로컬 원본 {len(local_sources)}개 중 없음 {len(summary['missing_sources'])}개, "
+                  f"앨범 아트 {len(art_paths)}개 중 없음 {len(summary['missing_art'])}개")
+        for path in (summary['missing_sources'] + summary['missing_art'])[:20]:
+            self._log(f"  - 찾을 수 없음: {path}")
+        return summary
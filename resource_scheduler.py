@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+import os
+import platform
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_MEMORY_BUDGET_MB = 2048
+DEFAULT_SAMPLE_RATE = 48000
+DEFAULT_CHANNELS = 2
+DEFAULT_DURATION = 600
+
+# pydub은 디코딩된 PCM 전체를 메모리에 올리고, 자르기/내보내기 과정에서 사본이 생김
+PEAK_MEMORY_FACTOR = 3
+PCM_SAMPLE_WIDTH = 2
+
+# 백그라운드 모드: 코어의 일부만 사용하고, 작업 스레드(와 그 스레드가 실행하는 ffmpeg)의 CPU/디스크 우선순위를 낮춤
+BACKGROUND_CORE_FRACTION = 0.25
+BACKGROUND_NICE_INCREMENT = 10
+THROUGHPUT_REPORT_INTERVAL = 15
+_IOPRIO_SYSCALLS = {'x86_64': 251, 'amd64': 251, 'aarch64': 30, 'arm64': 30, 'i386': 289, 'i686': 289, 'armv7l': 314}
+_IOPRIO_CLASS_IDLE = 3
+_IOPRIO_CLASS_SHIFT = 13
+_IOPRIO_WHO_PROCESS = 1
+_WINDOWS_THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+_DARWIN_PRIO_THREAD = 3
+_DARWIN_PRIO_BACKGROUND = 0x1000
+_lowered_threads = threading.local()
+
+
+def estimate_peak_memory(duration, sample_rate=None, channels=None):
+    """길이 × 샘플레이트 × 채널 수로 pydub 변환 한 건의 최대 메모리 사용량(바이트)을 추정"""
+    duration = duration or DEFAULT_DURATION
+    sample_rate = sample_rate or DEFAULT_SAMPLE_RATE
+    channels = channels or DEFAULT_CHANNELS
+    return int(duration * sample_rate * channels * PCM_SAMPLE_WIDTH * PEAK_MEMORY_FACTOR)
+
+
+def peak_rss_bytes():
+    """
+    프로세스가 시작된 뒤의 최대 RSS를 (현재 프로세스, 종료된 자식 프로세스 중 최대) 바이트 튜플로 반환
+    자식 값을 알 수 없으면(Windows) None, 측정할 수 없으면 튜플 대신 None
+    """
+    try:
+        import resource
+        scale = 1 if sys.platform == 'darwin' else 1024
+        own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+        children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+        return own, children
+    except ImportError:
+        pass
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize, None
+    except (ImportError, AttributeError, OSError):
+        pass
+    return None
+
+
+class MemoryBudget:
+    """
+    메모리 예산 안에서만 디코딩/인코딩 작업을 시작하도록 허용하는 스케줄러
+    예산보다 큰 작업은 다른 작업이 없을 때 단독으로 실행
+    """
+    def __init__(self, budget_bytes=DEFAULT_MEMORY_BUDGET_MB * 1024 * 1024, progress_callback=None):
+        self.budget_bytes = budget_bytes
+        self.progress_callback = progress_callback
+        self._condition = threading.Condition()
+        self._reserved = 0
+        self._active = 0
+        self.peak_reserved = 0
+        self.peak_active = 0
+        self.jobs_admitted = 0
+        self._rss_at_start = None
+
+    def _log(self, message):
+        if self.progress_callback:
+            self.progress_callback(message)
+
+    @contextmanager
+    def reserve(self, estimate):
+        with self._condition:
+            while self._active and self._reserved + estimate > self.budget_bytes:
+                self._condition.wait()
+            self._reserved += estimate
+            self._active += 1
+            self.jobs_admitted += 1
+            self.peak_reserved = max(self.peak_reserved, self._reserved)
+            self.peak_active = max(self.peak_active, self._active)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._reserved -= estimate
+                self._active -= 1
+                self._condition.notify_all()
+
+    def start_run(self):
+        """
+        실행마다 처음에 호출하여 최대값 기록을 새로 시작 (배치/데몬 빌드는 예산 하나를 여러 실행이 공유)
+        최대 RSS는 프로세스 단위로만 알 수 있으므로 시작 시점 값을 기억해 두고 report에서 비교
+        """
+        with self._condition:
+            self.peak_reserved = self._reserved
+            self.peak_active = self._active
+            self.jobs_admitted = 0
+        self._rss_at_start = peak_rss_bytes()
+
+    def report(self):
+        """이번 실행의 예상 최대 사용량과 실제 최대 RSS를 로그로 출력"""
+        if not self.jobs_admitted:
+            return
+        mb = 1024 * 1024
+        message = (f"🧠 메모리 예산 {self.budget_bytes / mb:.0f}MB: 예상 최대 사용량 {self.peak_reserved / mb:.0f}MB, "
+                   f"최대 동시 변환 {self.peak_active}개")
+        rss = peak_rss_bytes()
+        if rss:
+            before = self._rss_at_start or (0, None)
+            message += self._rss_text("프로세스 최대 RSS", rss[0], before[0])
+            if rss[1]:
+                message += self._rss_text("자식 프로세스 최대", rss[1], before[1], parenthesized=True)
+        self._log(message)
+
+    @staticmethod
+    def _rss_text(label, peak, peak_at_start, parenthesized=False):
+        """최대값이 이번 실행 중에 늘었으면 그 값을, 아니면 이전 실행의 최대값 이하였음을 표시"""
+        mb = 1024 * 1024
+        if peak_at_start and peak <= peak_at_start:
+            text = f"{label}: 이번 실행은 이전 최대 {peak / mb:.0f}MB 이하"
+        else:
+            text = f"{label} {peak / mb:.0f}MB"
+        return f" ({text})" if parenthesized else f", {text}"
+
+
+def background_worker_count(requested=None):
+    """백그라운드 모드에서 사용할 작업자 수 (코어 수의 일부, 요청 값보다 크지 않게)"""
+    cap = max(1, int((os.cpu_count() or 1) * BACKGROUND_CORE_FRACTION))
+    return min(cap, requested) if requested else cap
+
+
+def _set_linux_io_priority_idle(thread_id):
+    import ctypes
+    syscall_number = _IOPRIO_SYSCALLS.get(platform.machine().lower())
+    if syscall_number is None:
+        return False
+    libc = ctypes.CDLL(None, use_errno=True)
+    return libc.syscall(syscall_number, _IOPRIO_WHO_PROCESS, thread_id, _IOPRIO_CLASS_IDLE << _IOPRIO_CLASS_SHIFT) == 0
+
+
+def lower_current_thread_priority():
+    """
+    현재 스레드의 CPU/디스크 우선순위를 낮춤 (스레드마다 한 번만). 실패하거나 지원하지 않는 환경에서는 무시
+    Linux에서는 권한 없이 되돌릴 수 없으므로, 백그라운드 빌드용으로 만든 스레드 풀의 initializer로만 사용
+    Linux에서는 이 스레드가 실행하는 자식 프로세스(ffmpeg 등)도 낮아진 우선순위를 물려받음
+    Windows에서는 물려받지 않으므로 자식 프로세스를 만들 때 background_creationflags()를 사용
+    """
+    if getattr(_lowered_threads, 'done', False):
+        return
+    _lowered_threads.done = True
+    try:
+        if sys.platform.startswith('linux'):
+            thread_id = threading.get_native_id()
+            current = os.getpriority(os.PRIO_PROCESS, thread_id)
+            os.setpriority(os.PRIO_PROCESS, thread_id, min(19, current + BACKGROUND_NICE_INCREMENT))
+            _set_linux_io_priority_idle(thread_id)
+        elif sys.platform == 'win32':
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), _WINDOWS_THREAD_MODE_BACKGROUND_BEGIN)
+        elif sys.platform == 'darwin':
+            os.setpriority(_DARWIN_PRIO_THREAD, 0, _DARWIN_PRIO_BACKGROUND)
+    except (OSError, AttributeError, ImportError):
+        pass
+
+
+def background_creationflags():
+    """우선순위를 낮춘 스레드에서 Windows 자식 프로세스를 만들 때 쓸 creationflags (그 밖에는 0)"""
+    if sys.platform == 'win32' and getattr(_lowered_threads, 'done', False):
+        return getattr(subprocess, 'BELOW_NORMAL_PRIORITY_CLASS', 0)
+    return 0
+
+
+class BuildCancelled(Exception):
+    """취소된 빌드에서 새 작업을 시작하려 할 때 발생"""
+    def __init__(self):
+        super().__init__("빌드가 취소되었습니다.")
+
+
+class PauseController:
+    """
+    작업 시작 전에 wait()를 호출하여 전체 작업을 일시 정지/재개. 진행 중인 곡은 끝까지 처리
+    cancel() 후에는 wait()가 BuildCancelled를 발생시켜 남은 작업을 시작하지 않음
+    """
+    def __init__(self):
+        self._running = threading.Event()
+        self._running.set()
+        self._lock = threading.Lock()
+        self._paused_at = None
+        self._paused_seconds = 0.0
+        self._cancelled = False
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def pause(self):
+        with self._lock:
+            if self._paused_at is None:
+                self._paused_at = time.monotonic()
+                self._running.clear()
+
+    def resume(self):
+        with self._lock:
+            if self._paused_at is not None:
+                self._paused_seconds += time.monotonic() - self._paused_at
+                self._paused_at = None
+                self._running.set()
+
+    def cancel(self):
+        self._cancelled = True
+        self.resume()  # 일시 정지 중에 기다리던 작업도 깨워서 취소되도록 함
+
+    def reset(self):
+        """취소 상태를 해제 (같은 컨트롤러로 다음 빌드를 시작할 때)"""
+        self._cancelled = False
+
+    def wait(self):
+        self._running.wait()
+        if self._cancelled:
+            raise BuildCancelled()
+
+    def paused_seconds(self):
+        with self._lock:
+            current = time.monotonic() - self._paused_at if self._paused_at is not None else 0.0
+            return self._paused_seconds + current
+
+
+class ThroughputMeter:
+    """완료한 곡 수와 곡 길이로 처리량을 계산하고 일정 간격으로 로그 출력 (일시 정지 시간은 제외)"""
+    def __init__(self, progress_callback=None, pause_controller=None, workers=None, interval=THROUGHPUT_REPORT_INTERVAL):
+        self.progress_callback = progress_callback
+        self.pause_controller = pause_controller
+        self.workers = workers
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._paused_at_start = pause_controller.paused_seconds() if pause_controller else 0.0
+        self._last_report = self._started_at
+        self.songs = 0
+        self.audio_seconds = 0.0
+
+    def _log(self, message):
+        if self.progress_callback:
+            self.progress_callback(message)
+
+    def _active_seconds(self):
+        paused = self.pause_controller.paused_seconds() - self._paused_at_start if self.pause_controller else 0.0
+        return max(time.monotonic() - self._started_at - paused, 1e-6)
+
+    def _summary(self):
+        elapsed = self._active_seconds()
+        workers = f", 작업자 {self.workers}개" if self.workers else ""
+        return f"분당 {self.songs / elapsed * 60:.1f}곡, 실시간 대비 {self.audio_seconds / elapsed:.1f}배{workers}"
+
+    def add(self, audio_seconds):
+        with self._lock:
+            self.songs += 1
+            self.audio_seconds += audio_seconds
+            now = time.monotonic()
+            if now - self._last_report < self.interval:
+                return
+            self._last_report = now
+            message = f"⏱️ 처리량: {self._summary()}"
+        self._log(message)
+
+    def report(self):
+        if self.songs:
+            self._log(f"⏱️ 전체 처리량: {self.songs}곡, {self._summary()}")
@@ -17,7 +17,7 @@ if ERRORLEVEL 1 (
 
 python -m pip install --upgrade pip
 
-pip install --upgrade pytubefix pydub pillow
+pip install --upgrade pytubefix pydub pillow numpy
 
 echo Running gui.py...
 python gui.py
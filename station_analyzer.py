@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+스테이션별로 게임이 불러올 때의 부담(곡 수, OGG 파일 수/용량, 디코딩된 PCM 크기, 스크립트 파일 크기)을 분석하고,
+예산을 넘는 스테이션을 번호가 붙은 하위 스테이션(<스테이션>_1, <스테이션>_2 ...)으로 나눔
+
+    python station_analyzer.py <모드 출력 폴더> [--max-songs 300] [--max-decoded-mb 4096]
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from library_scanner import probe_audio_file
+from encoding_profiles import resolve_encoding, song_duration
+
+DECODED_SAMPLE_BYTES = 2
+DEFAULT_SAMPLE_RATE = 44100
+DEFAULT_CHANNELS = 2
+
+
+def decoded_size(duration, sample_rate, channels):
+    """16비트 PCM으로 디코딩했을 때의 크기(바이트)"""
+    return int(duration * sample_rate * channels * DECODED_SAMPLE_BYTES)
+
+
+def estimate_song_footprint(song, encoding):
+    """변환 전 곡의 디코딩 크기 추정 (인코딩 설정의 채널/샘플레이트, 없으면 44.1kHz 스테레오 기준)"""
+    return decoded_size(song_duration(song), encoding.get('sample_rate') or DEFAULT_SAMPLE_RATE,
+                        encoding.get('channels') or DEFAULT_CHANNELS)
+
+
+def _shard_groups(stations):
+    """같은 원본 스테이션에서 나뉜 하위 스테이션(shard_of)을 원래 순서대로 묶음"""
+    groups = {}
+    for station_name, station_data in stations.items():
+        groups.setdefault(station_data.get('shard_of') or station_name, []).append(station_name)
+    return groups
+
+
+def is_shard_folder(folder, base_name, stations):
+    """folder가 base_name 스테이션 또는 그 하위 스테이션(사용자가 만든 같은 이름의 스테이션 제외)의 폴더인지 확인"""
+    if folder == base_name:
+        return True
+    suffix = folder[len(base_name) + 1:] if folder.startswith(f"{base_name}_") else ''
+    return suffix.isdigit() and folder not in stations
+
+
+def merge_shards(stations):
+    """
+    이전 버전이 mod_data.json에 저장한 하위 스테이션(shard_of)을 원래 스테이션으로 다시 합침 (딕셔너리를 직접 수정)
+    합친 원래 스테이션 이름 목록을 반환
+    """
+    groups = {base_name: members for base_name, members in _shard_groups(stations).items() if members != [base_name]}
+    if not groups:
+        return []
+    merged = {}
+    for station_name, station_data in stations.items():
+        base_name = station_data.get('shard_of') or station_name
+        if base_name not in groups:
+            merged[station_name] = station_data
+        elif base_name not in merged:
+            members = groups[base_name]
+            template = {key: value for key, value in stations[members[0]].items() if key not in ('songs', 'shard_of')}
+            merged[base_name] = {**template, 'songs': [song for member in members for song in stations[member].get('songs', [])]}
+    stations.clear()
+    stations.update(merged)
+    return list(groups)
+
+
+def shard_stations(stations, max_songs=None, max_decoded_mb=None):
+    """
+    곡 수나 디코딩 크기가 예산을 넘는 스테이션을 순서를 유지한 채 하위 스테이션으로 나눈 새 스테이션 딕셔너리와
+    {하위 스테이션 이름: 원래 스테이션 이름} 매핑을 반환. 이미 나뉜 스테이션은 곡을 다시 합쳐 앞에서부터 채우므로
+    뒤에 곡을 추가해도 앞쪽 하위 스테이션의 곡은 그대로 유지됨
+    """
+    max_decoded_bytes = max_decoded_mb * 1024 * 1024 if max_decoded_mb else None
+    if not max_songs and not max_decoded_bytes:
+        return stations, {}
+
+    groups = _shard_groups(stations)
+    sharded, origins = {}, {}
+    for base_name, members in groups.items():
+        template = {key: value for key, value in stations[members[0]].items() if key not in ('songs', 'shard_of')}
+        songs = [song for member in members for song in stations[member].get('songs', [])]
+        encoding = resolve_encoding(template)
+
+        shards, current, current_bytes = [], [], 0
+        for song in songs:
+            footprint = estimate_song_footprint(song, encoding)
+            if current and ((max_songs and len(current) >= max_songs) or
+                            (max_decoded_bytes and current_bytes + footprint > max_decoded_bytes)):
+                shards.append(current)
+                current, current_bytes = [], 0
+            current.append(song)
+            current_bytes += footprint
+        shards.append(current)
+
+        if len(shards) == 1 and members == [base_name]:
+            sharded[base_name] = stations[base_name]
+            continue
+        index = 0
+        for shard_songs in shards:
+            index += 1
+            # 사용자가 만든 같은 이름의 스테이션과 겹치지 않도록 번호를 건너뜀
+            while f"{base_name}_{index}" in stations and f"{base_name}_{index}" not in members:
+                index += 1
+            shard_name = f"{base_name}_{index}"
+            sharded[shard_name] = {**template, 'songs': shard_songs, 'shard_of': base_name}
+            origins[shard_name] = base_name
+    return sharded, origins
+
+
+class StationAnalyzer:
+    def __init__(self, output_dir, stations, progress_callback=None, max_workers=16):
+        self.output_dir = Path(output_dir)
+        self.stations = stations
+        self.progress_callback = progress_callback
+        self.max_workers = max_workers
+
+    def _log(self, message):
+        if self.progress_callback:
+            self.progress_callback(message)
+
+    def _scan_music_folder(self, station_name):
+        folder = self.output_dir / "music" / station_name
+        try:
+            with os.scandir(folder) as entries:
+                return [Path(entry.path) for entry in entries if entry.is_file() and entry.name.endswith('.ogg')]
+        except OSError:
+            return []
+
+    def _station_folders(self, station_name, station_data):
+        """스테이션 자신과, 곡이 나뉘어 빌드된 하위 스테이션(<스테이션>_<번호>)의 폴더 이름 목록"""
+        folders = [station_name]
+        for song in station_data.get('songs', []):
+            folder = Path(song['file_path']).parent.name if song.get('file_path') else ''
+            if folder and folder not in folders and is_shard_folder(folder, station_name, self.stations):
+                folders.append(folder)
+        return folders
+
+    def _file_size(self, path):
+        try:
+            return path.stat().st_size
+        except OSError:
+            return 0
+
+    def analyze(self):
+        """스테이션별 {'station', 'songs', 'ogg_files', 'ogg_bytes', 'duration', 'decoded_bytes', 'script_bytes'} 목록"""
+        results = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for station_name, station_data in self.stations.items():
+                folders = self._station_folders(station_name, station_data)
+                ogg_files = [path for folder in folders for path in self._scan_music_folder(folder)]
+                probes = list(executor.map(probe_audio_file, ogg_files))
+                ogg_bytes = sum(executor.map(self._file_size, ogg_files))
+
+                duration, decoded_bytes = 0.0, 0
+                for probe in probes:
+                    if probe['duration']:
+                        duration += probe['duration']
+                        decoded_bytes += decoded_size(probe['duration'], probe['sample_rate'] or DEFAULT_SAMPLE_RATE,
+                                                      probe['channels'] or DEFAULT_CHANNELS)
+                # 아직 변환되지 않은 곡은 인코딩 설정으로 추정
+                converted = {probe['path'] for probe in probes}
+                encoding = resolve_encoding(station_data)
+                for song in station_data.get('songs', []):
+                    ogg_path = self.output_dir / "music" / song['file_path'] if song.get('file_path') else None
+                    if song.get('duplicate_of') or (ogg_path and str(ogg_path) in converted):
+                        continue
+                    duration += song_duration(song)
+                    decoded_bytes += estimate_song_footprint(song, encoding)
+
+                script_paths = [self.output_dir / "music" / f"{folder}{suffix}"
+                                for folder in folders for suffix in ("_soundtrack.txt", "_music.asset")]
+                results.append({
+                    'station': station_name,
+                    'songs': len(station_data.get('songs', [])),
+                    'ogg_files': len(ogg_files),
+                    'ogg_bytes': ogg_bytes,
+                    'duration': duration,
+                    'decoded_bytes': decoded_bytes,
+                    'script_bytes': sum(self._file_size(path) for path in script_paths),
+                })
+        return results
+
+    def report(self, results, max_songs=None, max_decoded_mb=None):
+        self._log("\n📊 스테이션 로드 부담 분석")
+        self._log(f"  {'스테이션':<24} {'곡':>6} {'OGG':>6} {'OGG(MB)':>9} {'재생(분)':>9} {'디코딩(MB)':>11} {'스크립트(KB)':>12}")
+        for result in results:
+            decoded_mb = result['decoded_bytes'] / 1024 / 1024
+            over_budget = (max_songs and result['songs'] > max_songs) or (max_decoded_mb and decoded_mb > max_decoded_mb)
+            self._log(f"{'⚠️' if over_budget else '  '}{result['station']:<24} {result['songs']:>6} {result['ogg_files']:>6} "
+                      f"{result['ogg_bytes'] / 1024 / 1024:>9.1f} {result['duration'] / 60:>9.1f} {decoded_mb:>11.1f} "
+                      f"{result['script_bytes'] / 1024:>12.1f}")
+        total_decoded = sum(result['decoded_bytes'] for result in results) / 1024 / 1024
+        self._log(f"  총 {len(results)}개 스테이션, 곡 {sum(result['songs'] for result in results)}개, 디코딩 크기 {total_decoded:.1f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="스테이션별 게임 로드 부담 분석")
+    parser.add_argument('output_dir', help="모드 출력 폴더 (mod_data.json 사용)")
+    parser.add_argument('--max-songs', type=int, help="스테이션당 최대 곡 수 (넘으면 ⚠️ 표시)")
+    parser.add_argument('--max-decoded-mb', type=float, help="스테이션당 최대 디코딩 크기(MB)")
+    args = parser.parse_args()
+
+    with open(Path(args.output_dir) / "mod_data.json", 'r', encoding='utf-8') as f:
+        stations = json.load(f).get('stations', {})
+    merge_shards(stations)
+    analyzer = StationAnalyzer(args.output_dir, stations, progress_callback=print)
+    analyzer.report(analyzer.analyze(), args.max_songs, args.max_decoded_mb)
+
+
+if __name__ == "__main__":
+    main()
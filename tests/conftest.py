@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+import sys
+from pathlib import Path
+
+# 모듈이 저장소 최상위에 있으므로 테스트에서 바로 import할 수 있도록 경로에 추가
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
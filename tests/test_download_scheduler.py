@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import time
+import urllib.error
+from download_scheduler import DownloadScheduler, is_throttle_error
+from fake_media_server import FakeMediaServer
+from media_sources import HTTPMediaSource
+
+
+def make_task(server, output_dir, video_id, on_error=None):
+    source = HTTPMediaSource(server.base_url)
+
+    def task(on_chunk):
+        try:
+            media = source.open(server.video_url(video_id), on_progress=lambda size, remaining, total: on_chunk(size))
+            return media.download(output_dir, video_id)
+        except Exception as e:
+            if on_error:
+                on_error(e)
+            raise
+    return task
+
+
+def test_is_throttle_error_uses_status_code_only():
+    assert is_throttle_error(urllib.error.HTTPError('http://x', 429, 'Too Many Requests', {}, None))
+    assert not is_throttle_error(urllib.error.HTTPError('http://x', 404, 'Not Found', {}, None))
+    assert not is_throttle_error(IOError("video id 4291 failed"))
+
+
+def test_throttle_backs_off_and_retries(tmp_path):
+    with FakeMediaServer(video_count=1, duration=1, throttle_rate=1.0, seed=1) as server:
+        def stop_throttling(error):
+            server.throttle_rate = 0.0  # 첫 요청만 429
+
+        scheduler = DownloadScheduler(max_workers=4, initial_workers=4)
+        started_at = time.monotonic()
+        results = scheduler.run([('song', make_task(server, tmp_path, 'vid0000', stop_throttling))])
+        elapsed = time.monotonic() - started_at
+
+    ok, path = results['song']
+    assert ok and (tmp_path / "vid0000.wav").exists()
+    assert server.stats['throttled'] == 1
+    assert scheduler.concurrency == 2
+    assert elapsed >= 2.0  # 첫 대기 시간만큼 물러난 뒤 다시 시도
+
+
+def test_throttle_gives_up_after_max_retries(tmp_path):
+    with FakeMediaServer(video_count=1, duration=1, throttle_rate=1.0, seed=1) as server:
+        scheduler = DownloadScheduler(max_workers=2, initial_workers=2, max_retries=1)
+        results = scheduler.run([('song', make_task(server, tmp_path, 'vid0000'))])
+
+    ok, error = results['song']
+    assert not ok and is_throttle_error(error)
+    assert server.stats['throttled'] == 2
+
+
+def test_mid_transfer_failure_is_not_retried_and_releases_slots(tmp_path):
+    with FakeMediaServer(video_count=3, duration=3, failure_rate=1.0, seed=1) as server:
+        scheduler = DownloadScheduler(max_workers=3, initial_workers=3)
+        tasks = [(video_id, make_task(server, tmp_path, video_id)) for video_id in server.videos]
+        results = scheduler.run(tasks)
+
+        assert all(not ok and not is_throttle_error(error) for ok, error in results.values())
+        assert server.stats['failed'] == 3 and server.stats['streams'] == 3
+        assert server.stats['throttled'] == 0 and scheduler.concurrency == 3
+
+        # 실패한 작업이 다운로드 자리를 모두 반납했으면 다음 실행이 그대로 진행됨
+        server.failure_rate = 0.0
+        results = scheduler.run(tasks)
+    assert all(ok for ok, _ in results.values())
+    assert all((tmp_path / f"{video_id}.wav").stat().st_size == len(server.audio_bytes(video_id)) for video_id in server.videos)
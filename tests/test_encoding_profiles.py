@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from encoding_profiles import plan_target_size, predict_size, MIN_QUALITY
+
+
+def total_size(items, planned):
+    return sum(predict_size(duration, planned[key]) for key, duration, _ in items)
+
+
+def test_keeps_encoding_when_it_fits():
+    items = [('a', 200, {'quality': 5}), ('b', 100, {'quality': 3})]
+    planned, total = plan_target_size(items, 10 ** 9)
+    assert planned == {'a': {'quality': 5}, 'b': {'quality': 3}}
+    assert total == total_size(items, planned)
+
+
+def test_lowers_highest_quality_first():
+    items = [('a', 100, {'quality': 5}), ('b', 100, {'quality': 3})]
+    target = predict_size(100, {'quality': 4}) + predict_size(100, {'quality': 3})
+    planned, total = plan_target_size(items, target)
+    assert planned['a']['quality'] == 4 and planned['b']['quality'] == 3
+    assert total == target
+
+
+def test_longer_song_lowered_first_at_same_quality():
+    items = [('short', 60, {'quality': 5}), ('long', 300, {'quality': 5})]
+    target = predict_size(60, {'quality': 5}) + predict_size(300, {'quality': 4})
+    planned, _ = plan_target_size(items, target)
+    assert planned['long']['quality'] == 4 and planned['short']['quality'] == 5
+
+
+def test_stops_at_min_quality_when_target_unreachable():
+    items = [('a', 300, {'quality': 5, 'channels': 2}), ('b', 300, {'quality': 2})]
+    planned, total = plan_target_size(items, 1)
+    assert all(encoding['quality'] == MIN_QUALITY for encoding in planned.values())
+    assert planned['a']['channels'] == 2
+    assert total == total_size(items, planned) > 1
+
+
+def test_does_not_modify_input():
+    encoding = {'quality': 5}
+    plan_target_size([('a', 300, encoding)], 1)
+    assert encoding == {'quality': 5}
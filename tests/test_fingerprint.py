@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pytest
+from fingerprint import (FingerprintIndex, compute_fingerprint, encode_fingerprint, decode_fingerprint,
+                         FINGERPRINT_SAMPLE_RATE, FRAME_SIZE, HOP_SIZE)
+
+
+def song_samples(seed, seconds=30):
+    """곡처럼 시간에 따라 대역 에너지가 바뀌는 합성 신호 (잡음을 0.5초마다 다른 필터로 거름)"""
+    random = np.random.default_rng(seed)
+    blocks = []
+    block_size = FINGERPRINT_SAMPLE_RATE // 2
+    for _ in range(seconds * 2):
+        spectrum = np.fft.rfft(random.standard_normal(block_size))
+        spectrum *= random.uniform(0.1, 1.0, len(spectrum)) ** 4
+        blocks.append(np.fft.irfft(spectrum, block_size))
+    samples = np.concatenate(blocks)
+    return (samples / np.abs(samples).max() * 20000).astype(np.float32)
+
+
+@pytest.fixture
+def index():
+    index = FingerprintIndex()
+    for seed in range(3):
+        index.add(f"station/song{seed}.ogg", compute_fingerprint(song_samples(seed)))
+    return index
+
+
+def test_short_input_has_empty_fingerprint():
+    assert len(compute_fingerprint(np.zeros(FRAME_SIZE))) == 0
+
+
+def test_encode_round_trip():
+    fingerprint = compute_fingerprint(song_samples(0, seconds=5))
+    assert np.array_equal(decode_fingerprint(encode_fingerprint(fingerprint)), fingerprint)
+
+
+def test_finds_same_song_with_different_trim(index):
+    samples = song_samples(1)
+    # 자르기 위치가 달라도(홉 크기의 배수가 아닌 위치 포함) 같은 곡으로 찾음
+    for trim in (HOP_SIZE * 7, FINGERPRINT_SAMPLE_RATE * 3 + 100):
+        match = index.find(compute_fingerprint(samples[trim:]))
+        assert match is not None and match[0] == "station/song1.ogg"
+        assert match[1] < index.threshold
+
+
+def test_finds_song_with_added_noise(index):
+    samples = song_samples(2)
+    noisy = samples + np.random.default_rng(99).standard_normal(len(samples)).astype(np.float32) * 200
+    match = index.find(compute_fingerprint(noisy))
+    assert match is not None and match[0] == "station/song2.ogg"
+
+
+def test_different_song_does_not_match(index):
+    assert index.find(compute_fingerprint(song_samples(10))) is None
+
+
+def test_discard_and_exclude(index):
+    fingerprint = compute_fingerprint(song_samples(0))
+    assert index.find(fingerprint, exclude="station/song0.ogg") is None
+    index.discard("station/song0.ogg")
+    assert "station/song0.ogg" not in index
+    assert index.find(fingerprint) is None
+
+
+def test_add_ignores_duplicate_key_and_empty_fingerprint(index):
+    index.add("station/song0.ogg", compute_fingerprint(song_samples(5)))
+    index.add("station/empty.ogg", np.zeros(0, dtype=np.uint32))
+    assert len(index) == 3
+
+
+def test_find_or_add(index):
+    fingerprint = compute_fingerprint(song_samples(4))
+    assert index.find_or_add("other/song4.ogg", fingerprint) is None
+    assert "other/song4.ogg" in index
+    match = index.find_or_add("other/copy.ogg", fingerprint)
+    assert match is not None and match[0] == "other/song4.ogg"
+    assert "other/copy.ogg" not in index
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import json
+import job_queue
+from job_queue import JobQueue, PENDING, RUNNING, DONE, FAILED
+
+
+def make_queue(tmp_path, count=3):
+    queue = JobQueue(tmp_path / "build_queue.json")
+    for i in range(count):
+        queue.add('convert', 'station', {'index': i})
+    queue.save()
+    return queue
+
+
+def read_state(queue):
+    with open(queue.state_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_state_changes_go_to_journal_until_load(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.mark_done(queue.get(0), result={'file_path': 'station/a.ogg'})
+    queue.mark_failed(queue.get(1), RuntimeError("boom"))
+
+    assert queue.journal_path.exists()
+    assert [job['state'] for job in read_state(queue)['jobs']] == [PENDING] * 3
+
+    reloaded = JobQueue(queue.state_path)
+    assert reloaded.load()
+    assert [job['state'] for job in reloaded.jobs] == [DONE, FAILED, PENDING]
+    assert reloaded.get(0)['result'] == {'file_path': 'station/a.ogg'}
+    assert reloaded.get(1)['error'] == "boom"
+    # 다시 불러오면 저널을 상태 파일로 합침
+    assert not queue.journal_path.exists()
+    assert [job['state'] for job in read_state(queue)['jobs']] == [DONE, FAILED, PENDING]
+
+
+def test_load_without_compact_leaves_files_untouched(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.mark_done(queue.get(2))
+    state_before = queue.state_path.read_bytes()
+    journal_before = queue.journal_path.read_bytes()
+
+    reloaded = JobQueue(queue.state_path)
+    assert reloaded.load(compact=False)
+    assert reloaded.get(2)['state'] == DONE
+    assert queue.state_path.read_bytes() == state_before
+    assert queue.journal_path.read_bytes() == journal_before
+
+
+def test_replay_ignores_truncated_last_line(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.mark_done(queue.get(0))
+    with open(queue.journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"id": 1, "state": "do')  # 기록 중에 종료됨
+
+    reloaded = JobQueue(queue.state_path)
+    reloaded.load()
+    assert [job['state'] for job in reloaded.jobs] == [DONE, PENDING, PENDING]
+
+
+def test_running_jobs_return_to_pending(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.mark_running(queue.get(0))
+    queue.save()
+
+    reloaded = JobQueue(queue.state_path)
+    reloaded.load()
+    assert reloaded.get(0)['state'] == PENDING
+    assert read_state(queue)['jobs'][0]['state'] == RUNNING  # 저널이 없으면 다시 쓰지 않음
+
+
+def test_journal_compacts_when_longer_than_threshold(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_queue, 'MIN_JOURNAL_RECORDS', 2)
+    queue = make_queue(tmp_path, count=2)
+    queue.mark_done(queue.get(0))
+    queue.mark_done(queue.get(1))
+    assert queue.journal_path.exists()
+
+    queue.mark_pending(queue.get(1))
+    assert not queue.journal_path.exists()
+    assert [job['state'] for job in read_state(queue)['jobs']] == [DONE, PENDING]
+
+
+def test_retry_failed_resets_dependents(tmp_path):
+    queue = JobQueue(tmp_path / "build_queue.json")
+    song = queue.add('download', 'station')
+    write = queue.add('write', 'station', deps=[song['id']])
+    queue.mark_failed(song, "network")
+    queue.mark_done(write)
+
+    assert queue.retry_failed() == 1
+    assert (song['state'], write['state']) == (PENDING, PENDING)
+    assert not queue.journal_path.exists()
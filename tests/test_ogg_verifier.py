@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import struct
+import pytest
+from ogg_verifier import OggVerifier, ogg_crc
+
+BOS, EOS = 0x02, 0x04
+
+
+def ogg_page(header_type, sequence, body, serial=1):
+    lacing = bytes([255] * (len(body) // 255) + [len(body) % 255])
+    page = bytearray(struct.pack('<4sBBqIIIB', b'OggS', 0, header_type, 0, serial, sequence, 0, len(lacing)) + lacing + body)
+    page[22:26] = struct.pack('<I', ogg_crc(bytes(page)))
+    return bytes(page)
+
+
+def vorbis_identification():
+    # 버전, 채널, 샘플레이트, 최대/공칭/최소 비트레이트, 블록 크기, 프레이밍 비트
+    return b'\x01vorbis' + struct.pack('<IBIiiiBB', 0, 2, 44100, 0, 128000, 0, 0xB8, 1)
+
+
+def ogg_bytes():
+    return (ogg_page(BOS, 0, vorbis_identification()) + ogg_page(0, 1, b'a' * 1000)
+            + ogg_page(EOS, 2, b'b' * 300))
+
+
+@pytest.fixture
+def verifier():
+    return OggVerifier(max_workers=2)
+
+
+def test_valid_file(tmp_path, verifier):
+    path = tmp_path / "song.ogg"
+    path.write_bytes(ogg_bytes())
+    assert verifier.verify_file(path) == (True, "")
+
+
+@pytest.mark.parametrize('cut', [10, 40, 500, 1100, -100, -1])
+def test_truncated_file(tmp_path, verifier, cut):
+    path = tmp_path / "song.ogg"
+    path.write_bytes(ogg_bytes()[:cut])
+    ok, reason = verifier.verify_file(path)
+    assert not ok and reason
+
+
+def test_missing_eos_page(tmp_path, verifier):
+    path = tmp_path / "song.ogg"
+    path.write_bytes(ogg_page(BOS, 0, vorbis_identification()) + ogg_page(0, 1, b'a' * 1000))
+    ok, reason = verifier.verify_file(path)
+    assert not ok and "EOS" in reason
+
+
+def test_corrupted_page(tmp_path, verifier):
+    data = bytearray(ogg_bytes())
+    data[-50] ^= 0xFF
+    path = tmp_path / "song.ogg"
+    path.write_bytes(bytes(data))
+    ok, reason = verifier.verify_file(path)
+    assert not ok and "CRC" in reason
+
+
+def test_empty_file(tmp_path, verifier):
+    path = tmp_path / "song.ogg"
+    path.write_bytes(b'')
+    assert not verifier.verify_file(path)[0]
+
+
+def test_verify_files_skips_missing(tmp_path, verifier):
+    good, broken = tmp_path / "good.ogg", tmp_path / "broken.ogg"
+    good.write_bytes(ogg_bytes())
+    broken.write_bytes(ogg_bytes()[:-1])
+    results = verifier.verify_files([good, broken, tmp_path / "missing.ogg"])
+    assert set(results) == {good, broken}
+    assert results[good][0] and not results[broken][0]
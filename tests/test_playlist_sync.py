@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import pytest
+from playlist_sync import PlaylistSync, REMOVED_FLAG
+
+
+def linked_song(video_id, **fields):
+    return {'url': f'https://www.youtube.com/watch?v={video_id}', 'source': 'youtube', 'video_id': video_id,
+            'playlist_id': 'PL', 'korean_name': video_id, **fields}
+
+
+def manual_song(name):
+    return {'url': f'/music/{name}.mp3', 'source': 'local', 'korean_name': name}
+
+
+def entries(*video_ids):
+    return [{'video_id': video_id, 'url': f'https://www.youtube.com/watch?v={video_id}', 'title': f'title {video_id}'}
+            for video_id in video_ids]
+
+
+def names(result):
+    return [song['korean_name'] + ('*' if song.get(REMOVED_FLAG) else '') for song in result['songs']]
+
+
+@pytest.fixture
+def station():
+    songs = [manual_song('M0'), linked_song('A', file_path='s/a.ogg'), linked_song('R1'), manual_song('M1'),
+             linked_song('R2'), manual_song('M2'), linked_song('B'), manual_song('M3')]
+    return {'playlist': {'id': 'PL', 'url': 'https://www.youtube.com/playlist?list=PL', 'video_ids': []}, 'songs': songs}
+
+
+def test_merge_keeps_manual_and_removed_songs_in_place(station):
+    result = PlaylistSync(source=object()).merge(station, entries('B', 'N', 'A'))
+    assert names(result) == ['M0', 'B', 'M3', 'title N', 'A', 'R1*', 'M1', 'R2*', 'M2']
+    assert (result['added'], result['removed'], result['restored'], result['reordered']) == (1, 2, 0, True)
+    assert result['playlist']['video_ids'] == ['B', 'N', 'A']
+    assert result['songs'][4]['file_path'] == 's/a.ogg'
+
+
+def test_merge_drop_mode_removes_songs(station):
+    result = PlaylistSync(source=object(), remove_mode='drop').merge(station, entries('A', 'B'))
+    assert names(result) == ['M0', 'A', 'M1', 'M2', 'B', 'M3']
+    assert result['removed'] == 2 and not result['reordered']
+
+
+def test_merge_restores_flagged_song(station):
+    syncer = PlaylistSync(source=object())
+    station['songs'] = syncer.merge(station, entries('A', 'B'))['songs']
+    result = syncer.merge(station, entries('A', 'R1', 'B'))
+    assert names(result) == ['M0', 'A', 'R1', 'M1', 'R2*', 'M2', 'B', 'M3']
+    assert result['restored'] == 1 and result['added'] == 0
+
+
+def test_merge_does_not_modify_station(station):
+    before = [dict(song) for song in station['songs']]
+    PlaylistSync(source=object()).merge(station, entries('B'))
+    assert station['songs'] == before
+
+
+def test_first_link_adopts_songs_already_in_station():
+    station = {'playlist': {'id': 'PL', 'url': 'u', 'video_ids': []},
+               'songs': [manual_song('M0'), {**linked_song('A'), 'playlist_id': None}]}
+    result = PlaylistSync(source=object()).merge(station, entries('A', 'N'))
+    assert names(result) == ['M0', 'A', 'title N']
+    assert result['songs'][1]['playlist_id'] == 'PL' and result['added'] == 1
+
+
+def test_merge_requires_linked_playlist():
+    with pytest.raises(ValueError):
+        PlaylistSync(source=object()).merge({'songs': []}, [])
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import copy
+from station_analyzer import shard_stations, merge_shards, is_shard_folder
+
+
+def make_stations():
+    return {
+        'rock': {'songs': [{'url': f'rock{i}', 'english_name': f'rock {i}'} for i in range(5)], 'album_art': 'rock.png'},
+        'jazz': {'songs': [{'url': 'jazz0', 'english_name': 'jazz 0'}], 'album_art': ''},
+    }
+
+
+def test_shard_and_merge_round_trip():
+    stations = make_stations()
+    sharded, origins = shard_stations(copy.deepcopy(stations), max_songs=2)
+
+    assert list(sharded) == ['rock_1', 'rock_2', 'rock_3', 'jazz']
+    assert [len(sharded[name]['songs']) for name in ('rock_1', 'rock_2', 'rock_3')] == [2, 2, 1]
+    assert all(sharded[name]['shard_of'] == 'rock' and sharded[name]['album_art'] == 'rock.png' for name in origins)
+    assert origins == {'rock_1': 'rock', 'rock_2': 'rock', 'rock_3': 'rock'}
+    assert sharded['jazz'] == stations['jazz']
+
+    assert merge_shards(sharded) == ['rock']
+    assert sharded == stations
+
+
+def test_no_limits_returns_stations_unchanged():
+    stations = make_stations()
+    sharded, origins = shard_stations(stations)
+    assert sharded is stations and origins == {}
+
+
+def test_resharding_keeps_earlier_shards():
+    sharded, _ = shard_stations(make_stations(), max_songs=2)
+    sharded['rock_3']['songs'].append({'url': 'rock5', 'english_name': 'rock 5'})
+    resharded, _ = shard_stations(sharded, max_songs=2)
+    assert resharded['rock_1']['songs'] == sharded['rock_1']['songs']
+    assert resharded['rock_2']['songs'] == sharded['rock_2']['songs']
+    assert [song['url'] for song in resharded['rock_3']['songs']] == ['rock4', 'rock5']
+
+
+def test_skips_user_station_with_shard_name():
+    stations = make_stations()
+    stations['rock_2'] = {'songs': [{'url': 'mine'}], 'album_art': ''}
+    sharded, origins = shard_stations(copy.deepcopy(stations), max_songs=2)
+    assert sorted(origins) == ['rock_1', 'rock_3', 'rock_4']
+    assert sharded['rock_2'] == stations['rock_2']
+
+    merge_shards(sharded)
+    assert sharded['rock'] == stations['rock'] and sharded['rock_2'] == stations['rock_2']
+    assert not is_shard_folder('rock_2', 'rock', sharded)
+    assert is_shard_folder('rock_3', 'rock', sharded)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from waveform import CACHE_DIR_NAME, source_cache_key
+
+CACHE_VERSION = 1
+
+
+def song_cache_key(song_info, encoding):
+    """같은 원본 + 같은 자르기 + 같은 인코딩 설정이면 같은 키 (모드/스테이션/곡 이름과 무관)"""
+    identity = json.dumps({
+        'version': CACHE_VERSION,
+        'source': source_cache_key(song_info['url']),
+        'trim_start': song_info.get('trim_start', 0),
+        'encoding': encoding or {},
+    }, sort_keys=True)
+    return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+
+def art_cache_key(image_path, template_path=Path("radio_station_cover_template.png")):
+    template = source_cache_key(template_path) if Path(template_path).exists() else None
+    identity = json.dumps({'version': CACHE_VERSION, 'image': source_cache_key(image_path), 'template': template}, sort_keys=True)
+    return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+
+def link_or_copy(source, destination):
+    """같은 파일 시스템이면 하드 링크(추가 용량 없음), 아니면 복사"""
+    destination = Path(destination)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    if destination.exists():
+        destination.unlink()
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+class TranscodeCache:
+    """
+    변환된 OGG와 앨범 아트 DDS를 원본/설정 기준 키로 저장하여 여러 모드, 여러 스테이션에서 재사용
+    같은 키를 동시에 만들지 않도록 키별 잠금을 제공 (먼저 시작한 작업이 끝나면 나머지는 캐시를 사용)
+    """
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.hits = 0
+        self.stores = 0
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    @classmethod
+    def for_output_dir(cls, output_dir):
+        return cls(Path(output_dir).resolve().parent / CACHE_DIR_NAME / "transcodes")
+
+    def lock(self, key):
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _paths(self, key, suffix):
+        directory = self.cache_dir / key[:2]
+        return directory / f"{key}{suffix}", directory / f"{key}.json"
+
+    def contains(self, key, suffix='.ogg'):
+        """적중 횟수를 세지 않고 캐시에 항목이 있는지만 확인 (빌드 계획용)"""
+        return all(path.exists() for path in self._paths(key, suffix))
+
+    def lookup(self, key, suffix='.ogg'):
+        """캐시에 있으면 (파일 경로, 메타데이터), 없으면 None"""
+        file_path, meta_path = self._paths(key, suffix)
+        if not file_path.exists() or not meta_path.exists():
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with self._locks_lock:
+            self.hits += 1
+        return file_path, meta
+
+    def store(self, key, source_file, meta, suffix='.ogg'):
+        file_path, meta_path = self._paths(key, suffix)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = file_path.with_name(f"{file_path.name}.tmp")
+        link_or_copy(source_file, temp_file)
+        os.replace(temp_file, file_path)
+        temp_meta = meta_path.with_name(f"{meta_path.name}.tmp")
+        with open(temp_meta, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(temp_meta, meta_path)
+        with self._locks_lock:
+            self.stores += 1
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from pathlib import Path
+import numpy as np
+from pydub import AudioSegment
+from media_sources import create_media_source
+from encoding_profiles import export_parameters
+
+# 모드 폴더(압축/배포 대상) 밖, 같은 상위 폴더의 모드들이 함께 쓰는 캐시 폴더
+CACHE_DIR_NAME = ".hoi4_music_cache"
+PEAKS_PER_SECOND = 50
+PREVIEW_ENCODING = {'quality': -1, 'channels': 1, 'sample_rate': 22050}
+PREVIEW_CLIP_SECONDS = 15
+# 미리 듣기 구간 파일을 최근에 쓴 순서로 이 개수만 남김
+MAX_PREVIEW_CLIPS = 30
+
+
+def source_cache_key(source):
+    """로컬 파일은 경로/크기/수정 시각, URL은 주소로 캐시 키 생성 (파일이 바뀌면 키도 바뀜)"""
+    path = Path(source)
+    if path.is_file():
+        stat = path.stat()
+        identity = f"{path.resolve()}|{stat.st_size}|{stat.st_mtime_ns}"
+    else:
+        identity = str(source)
+    return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+
+def compute_peaks(samples, sample_rate, channels, peaks_per_second=PEAKS_PER_SECOND):
+    """
+    인터리브된 정수 샘플 배열을 구간별 최소/최대값(-1.0~1.0)으로 축약
+    구간 크기로 reshape한 뒤 한 번에 min/max를 구하므로 곡 길이만큼의 파이썬 반복이 없음
+    """
+    samples = np.asarray(samples)
+    scale = float(np.iinfo(samples.dtype).max) if np.issubdtype(samples.dtype, np.integer) else 1.0
+    bucket = max(1, int(sample_rate / peaks_per_second)) * channels
+    count = len(samples) // bucket
+    if count == 0:
+        return np.zeros(0, dtype=np.float16), np.zeros(0, dtype=np.float16)
+
+    blocks = samples[:count * bucket].reshape(count, bucket)
+    mins = (blocks.min(axis=1) / scale).astype(np.float16)
+    maxs = (blocks.max(axis=1) / scale).astype(np.float16)
+    return mins, maxs
+
+
+def resample_peaks(mins, maxs, width):
+    """저장된 피크를 화면 폭(픽셀 수)에 맞게 다시 축약"""
+    if len(mins) == 0 or width <= 0:
+        return mins, maxs
+    if len(mins) <= width:
+        positions = np.linspace(0, len(mins) - 1, width).astype(int)
+        return mins[positions], maxs[positions]
+    edges = np.linspace(0, len(mins), width + 1).astype(int)[:-1]
+    return np.minimum.reduceat(mins, edges), np.maximum.reduceat(maxs, edges)
+
+
+def play_audio_file(path):
+    """ffplay가 있으면 창 없이 재생하고, 없으면 OS 기본 플레이어로 열기"""
+    ffplay = shutil.which('ffplay')
+    if ffplay:
+        return subprocess.Popen([ffplay, '-nodisp', '-autoexit', '-loglevel', 'quiet', str(path)])
+    if sys.platform == 'win32':
+        os.startfile(str(path))
+    elif sys.platform == 'darwin':
+        subprocess.Popen(['open', str(path)])
+    else:
+        subprocess.Popen(['xdg-open', str(path)])
+
+
+class WaveformCache:
+    """
+    곡 원본별 파형 개요(최소/최대 피크)와 저용량 미리 듣기 파일을 모드 폴더 옆 캐시 폴더에 저장
+    원본은 처음 요청될 때 한 번만 디코딩하며, 이후에는 캐시 파일만 읽음
+    """
+    def __init__(self, output_dir, progress_callback=None, source=None):
+        self.cache_dir = Path(output_dir).resolve().parent / CACHE_DIR_NAME
+        self.waveform_dir = self.cache_dir / "waveforms"
+        self.preview_dir = self.cache_dir / "previews"
+        self.clip_dir = self.preview_dir / "clips"
+        self.progress_callback = progress_callback
+        self.source = source
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def _log(self, message):
+        if self.progress_callback:
+            self.progress_callback(message)
+
+    def _lock_for(self, key):
+        with self._locks_lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _paths(self, key):
+        return self.waveform_dir / f"{key}.npz", self.preview_dir / f"{key}.ogg"
+
+    def get_cached(self, song_source):
+        """캐시된 파형이 있으면 {'duration', 'mins', 'maxs', 'preview'} 반환, 없으면 None (디코딩하지 않음)"""
+        waveform_path, preview_path = self._paths(source_cache_key(song_source))
+        if not waveform_path.exists():
+            return None
+        with np.load(waveform_path) as data:
+            return {'duration': float(data['duration']), 'mins': data['mins'], 'maxs': data['maxs'],
+                    'preview': preview_path if preview_path.exists() else None}
+
+    def load(self, song_source):
+        """파형을 반환. 캐시가 없으면 원본(로컬 파일 또는 URL)을 한 번 디코딩하여 파형과 미리 듣기 파일을 함께 생성"""
+        key = source_cache_key(song_source)
+        with self._lock_for(key):
+            cached = self.get_cached(song_source)
+            if cached:
+                return cached
+            self._build(song_source, key)
+            return self.get_cached(song_source)
+
+    def _build(self, song_source, key):
+        waveform_path, preview_path = self._paths(key)
+        self.waveform_dir.mkdir(parents=True, exist_ok=True)
+        self.preview_dir.mkdir(parents=True, exist_ok=True)
+
+        downloaded = None
+        input_path = Path(song_source)
+        if not input_path.is_file():
+            self._log(f"🌊 파형 분석용 다운로드: {song_source}")
+            media = (self.source or create_media_source()).open(song_source)
+            downloaded = input_path = Path(media.download(self.cache_dir, f"{key}_source"))
+
+        try:
+            self._log(f"🌊 파형 분석 중: {Path(song_source).name if downloaded is None else song_source}")
+            audio = AudioSegment.from_file(input_path)
+            samples = np.array(audio.get_array_of_samples())
+            mins, maxs = compute_peaks(samples, audio.frame_rate, audio.channels)
+
+            temp_preview = preview_path.with_suffix('.tmp.ogg')
+            audio.export(temp_preview, format="ogg", codec="libvorbis", parameters=export_parameters(PREVIEW_ENCODING)).close()
+            os.replace(temp_preview, preview_path)
+
+            temp_waveform = waveform_path.with_suffix('.tmp.npz')
+            np.savez(temp_waveform, duration=len(audio) / 1000, mins=mins, maxs=maxs)
+            os.replace(temp_waveform, waveform_path)
+        finally:
+            if downloaded is not None and downloaded.exists():
+                downloaded.unlink()
+
+    def make_clip(self, song_source, start, seconds=PREVIEW_CLIP_SECONDS):
+        """
+        미리 듣기 파일에서 start초부터 seconds초 구간을 잘라 반환 (저용량 파일만 디코딩)
+        재생 중인 이전 구간을 덮어쓰지 않도록 원본/구간별 파일을 만들고, 같은 구간은 다시 만들지 않음
+        구간 파일은 최근에 쓴 MAX_PREVIEW_CLIPS개만 남김
+        """
+        waveform = self.load(song_source)
+        if not waveform or not waveform['preview']:
+            raise FileNotFoundError("미리 듣기 파일을 만들 수 없습니다.")
+        clip_key = f"{source_cache_key(song_source)}_{int(max(0, start) * 1000)}_{seconds}"
+        clip_path = self.clip_dir / f"{clip_key}.ogg"
+        with self._lock_for(clip_key):
+            if clip_path.exists():
+                os.utime(clip_path)  # 최근에 쓴 파일로 표시
+                return clip_path
+            self.clip_dir.mkdir(parents=True, exist_ok=True)
+            temp_clip = clip_path.with_suffix('.tmp.ogg')
+            command = [AudioSegment.converter, '-y', '-loglevel', 'error', '-ss', str(max(0, start)), '-t', str(seconds),
+                       '-i', str(waveform['preview']), '-c:a', 'libvorbis', *export_parameters(PREVIEW_ENCODING),
+                       '-f', 'ogg', str(temp_clip)]
+            result = subprocess.run(command, capture_output=True, text=True, check=False)
+            if result.returncode != 0:
+                raise RuntimeError(f"미리 듣기 구간 생성 실패: {result.stderr.strip()}")
+            os.replace(temp_clip, clip_path)
+        self._prune_clips(clip_path)
+        return clip_path
+
+    def _prune_clips(self, keep):
+        """오래 쓰지 않은 구간 파일부터 지워 MAX_PREVIEW_CLIPS개만 남김 (재생 중이라 지울 수 없는 파일은 다음에 정리)"""
+        with self._lock_for("clips"):
+            clips = []
+            for path in self.clip_dir.glob("*.ogg"):
+                try:
+                    clips.append((path.stat().st_mtime, path))
+                except OSError:
+                    continue
+            clips.sort(reverse=True)
+            for _, path in clips[MAX_PREVIEW_CLIPS:]:
+                if path == keep or path.name.endswith('.tmp.ogg'):
+                    continue
+                try:
+                    path.unlink()
+                except OSError:
+                    pass